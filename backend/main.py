@@ -8,8 +8,10 @@ Proyecto 3: FlightOnTime ✈️ — Predicción de Retrasos de Vuelos
 
 Endpoints:
     POST /predict - Predice si un vuelo será puntual o retrasado
+    POST /predict/batch - Predice un lote de vuelos en una sola llamada
     GET /health - Verifica estado de la API
     GET /model-info - Información del modelo
+    GET /metrics/microbatch - Estadísticas del micro-batching de /predict
 
 Autor: MODELS THAT MATTER
 Fecha: 2026-01-13
@@ -17,8 +19,8 @@ Fecha: 2026-01-13
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field, field_validator, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator, model_validator, ConfigDict, ValidationError
+from typing import Optional, List, Dict, Any, Union
 from datetime import datetime
 import joblib
 import json
@@ -26,20 +28,33 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 import sys
+import os
+import asyncio
+from collections import Counter
 from contextlib import asynccontextmanager
 
 # Agregar src al path
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
+from features import FeatureVectorBuilder
+from airports import get_airport_index, fill_geo_features
+
 # Inicializar FastAPI
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    global micro_batcher
     print("\n" + "=" * 70)
     print("INICIANDO FLIGHTONTIME API")
     print("=" * 70)
     cargar_modelo()
+    if MICROBATCH_ENABLED:
+        micro_batcher = MicroBatcher(MICROBATCH_MAX_SIZE, MICROBATCH_WINDOW_MS)
+        micro_batcher.start()
+        print(f"✅ Micro-batching activo: hasta {MICROBATCH_MAX_SIZE} vuelos / {MICROBATCH_WINDOW_MS} ms")
     print("=" * 70 + "\n")
     yield
+    if micro_batcher is not None:
+        await micro_batcher.stop()
 
 app = FastAPI(
     title="FlightOnTime API",
@@ -68,10 +83,21 @@ MODEL_PATH = BASE_DIR / "models" / "model.joblib"
 METADATA_PATH = BASE_DIR / "models" / "metadata.json"
 FEATURE_ENGINEER_PATH = BASE_DIR / "models" / "feature_engineer.joblib"
 
+# Máximo de vuelos aceptados por llamada a /predict/batch
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "50000"))
+
+# Micro-batching de /predict: agrupa peticiones concurrentes durante una
+# ventana de MICROBATCH_WINDOW_MS o hasta MICROBATCH_MAX_SIZE vuelos
+MICROBATCH_ENABLED = os.getenv("MICROBATCH_ENABLED", "1") == "1"
+MICROBATCH_WINDOW_MS = float(os.getenv("MICROBATCH_WINDOW_MS", "5"))
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "256"))
+
 # Variables globales para modelo
 model = None
 metadata = None
 feature_engineer = None
+feature_builder = None
+micro_batcher = None
 
 
 # ============================================================================
@@ -85,7 +111,9 @@ class FlightRequest(BaseModel):
     origen: str = Field(..., description="Código IATA aeropuerto origen (ej: JFK, GRU)", min_length=3, max_length=3)
     destino: str = Field(..., description="Código IATA aeropuerto destino (ej: LAX, GIG)", min_length=3, max_length=3)
     fecha_partida: str = Field(..., description="Fecha/hora de partida ISO 8601 (ej: 2025-11-10T14:30:00)")
-    distancia_km: float = Field(..., description="Distancia del vuelo en kilómetros", gt=0)
+    distancia_km: Optional[float] = Field(
+        None, description="Distancia del vuelo en kilómetros (si falta se estima por gran círculo)", gt=0
+    )
 
     # Campos opcionales (si están disponibles mejoran la predicción)
     temperatura: Optional[float] = Field(None, description="Temperatura en °C", ge=-50, le=60)
@@ -108,6 +136,18 @@ class FlightRequest(BaseModel):
         """Valida que los códigos estén en mayúsculas."""
         return v.upper()
 
+    @model_validator(mode='after')
+    def completar_distancia(self):
+        """Estima la distancia de gran círculo si no se informó."""
+        if self.distancia_km is None:
+            distancia = get_airport_index().distance_km(self.origen, self.destino)
+            if distancia is None:
+                raise ValueError(
+                    'distancia_km es obligatoria si origen o destino no están en el índice de aeropuertos'
+                )
+            self.distancia_km = round(distancia, 1)
+        return self
+
     model_config = ConfigDict(
         json_schema_extra={
             "example": {
@@ -148,6 +188,60 @@ class FlightResponse(BaseModel):
     )
 
 
+class BatchFlightRequest(BaseModel):
+    """Modelo de entrada para predicción por lotes."""
+
+    # Cada vuelo se valida por separado para reportar errores por ítem
+    # (también los elementos que no son objetos JSON)
+    vuelos: List[Any] = Field(
+        ...,
+        description=f"Lista de vuelos con el mismo formato que /predict (máximo {MAX_BATCH_SIZE})",
+        min_length=1,
+        max_length=MAX_BATCH_SIZE
+    )
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "vuelos": [
+                    {
+                        "aerolinea": "AA",
+                        "origen": "JFK",
+                        "destino": "LAX",
+                        "fecha_partida": "2025-11-10T14:30:00",
+                        "distancia_km": 3983
+                    },
+                    {
+                        "aerolinea": "DL",
+                        "origen": "ATL",
+                        "destino": "ORD",
+                        "fecha_partida": "2025-11-10T08:00:00",
+                        "distancia_km": 975,
+                        "temperatura": 22.0
+                    }
+                ]
+            }
+        }
+    )
+
+
+class BatchItemResult(BaseModel):
+    """Resultado de un vuelo dentro de un lote."""
+
+    indice: int = Field(..., description="Posición del vuelo en la lista de entrada")
+    resultado: Optional[FlightResponse] = Field(None, description="Predicción (si el vuelo es válido)")
+    error: Optional[str] = Field(None, description="Error de validación (si el vuelo es inválido)")
+
+
+class BatchFlightResponse(BaseModel):
+    """Modelo de salida para predicción por lotes."""
+
+    total: int
+    exitosos: int
+    errores: int
+    resultados: List[BatchItemResult]
+
+
 class ModelInfo(BaseModel):
     """Información del modelo."""
     
@@ -161,6 +255,22 @@ class ModelInfo(BaseModel):
     registros_entrenamiento: int
 
 
+class MicroBatchStats(BaseModel):
+    """Estadísticas del micro-batching de /predict."""
+
+    activo: bool
+    ventana_ms: float
+    max_lote: int
+    lotes_procesados: int
+    peticiones_procesadas: int
+    lotes_fallidos: int
+    peticiones_fallidas: int
+    tamano_medio_lote: float
+    histograma_tamano_lote: Dict[str, int] = Field(
+        ..., description="Número de lotes por rango de tamaño (potencias de 2)"
+    )
+
+
 class HealthResponse(BaseModel):
     """Respuesta del endpoint de salud."""
     
@@ -176,7 +286,7 @@ class HealthResponse(BaseModel):
 
 def cargar_modelo():
     """Carga el modelo, metadata y feature engineer."""
-    global model, metadata, feature_engineer
+    global model, metadata, feature_engineer, feature_builder
     
     try:
         # Cargar modelo
@@ -189,10 +299,20 @@ def cargar_modelo():
         # Cargar feature engineer
         feature_engineer = joblib.load(FEATURE_ENGINEER_PATH)
         
+        # Ruta rápida sin pandas (lookups precalculados en orden del modelo)
+        if getattr(feature_engineer, 'label_encoders', None):
+            feature_builder = FeatureVectorBuilder.from_engineer(
+                feature_engineer, metadata['feature_names']
+            )
+        
+        # Índice de aeropuertos (se carga una vez y queda en memoria)
+        airports = get_airport_index()
+        
         print("✅ Modelo cargado exitosamente")
         print(f"   - Modelo: {metadata['model_name']}")
         print(f"   - Threshold: {metadata['threshold']}")
         print(f"   - Features: {len(metadata['feature_names'])}")
+        print(f"   - Aeropuertos indexados: {len(airports)}")
         
         return True
     except Exception as e:
@@ -200,15 +320,15 @@ def cargar_modelo():
         return False
 
 
-def preparar_features(request: FlightRequest) -> pd.DataFrame:
+def construir_features_base(request: FlightRequest) -> dict:
     """
-    Prepara las features para el modelo a partir de la request.
+    Construye el diccionario de features (sin codificar) de un vuelo.
     
     Args:
         request: Datos del vuelo
     
     Returns:
-        DataFrame con features preparadas
+        Diccionario con las features crudas
     """
     # Parsear fecha
     fecha = datetime.fromisoformat(request.fecha_partida.replace('Z', '+00:00'))
@@ -228,8 +348,8 @@ def preparar_features(request: FlightRequest) -> pd.DataFrame:
         'origin': request.origen,
         'dest': request.destino,
         'distance': distance_miles,
-        'latitude': 0.0,  # Valor por defecto (idealmente buscar en DB)
-        'longitude': 0.0,  # Valor por defecto
+        'latitude': None,  # Coordenadas del origen (índice de aeropuertos)
+        'longitude': None,
         'dist_met_km': 10.0,  # Valor por defecto
         'temp': request.temperatura if request.temperatura is not None else 20.0,
         'wind_spd': request.velocidad_viento if request.velocidad_viento is not None else 10.0,
@@ -237,8 +357,51 @@ def preparar_features(request: FlightRequest) -> pd.DataFrame:
         'climate_severity_idx': 0.3  # Calculado basado en clima (simplificado)
     }
     
+    return fill_geo_features(features)
+
+
+def preparar_features(request: FlightRequest) -> Union[np.ndarray, pd.DataFrame]:
+    """
+    Prepara las features para el modelo a partir de la request.
+    
+    Args:
+        request: Datos del vuelo
+    
+    Returns:
+        Matriz (1, n_features) en el orden del modelo
+    """
+    if feature_builder is not None:
+        return feature_builder.build(construir_features_base(request))
+    return preparar_features_dataframe([request])
+
+
+def preparar_features_batch(requests: List[FlightRequest]) -> Union[np.ndarray, pd.DataFrame]:
+    """
+    Prepara una única matriz de features para un lote de vuelos.
+    
+    Args:
+        requests: Lista de vuelos ya validados
+    
+    Returns:
+        Matriz con una fila por vuelo, en el orden de entrada
+    """
+    if feature_builder is not None:
+        return feature_builder.build_batch([construir_features_base(r) for r in requests])
+    return preparar_features_dataframe(requests)
+
+
+def preparar_features_dataframe(requests: List[FlightRequest]) -> pd.DataFrame:
+    """
+    Ruta con pandas: usada cuando el feature engineer no tiene LabelEncoders.
+    
+    Args:
+        requests: Lista de vuelos ya validados
+    
+    Returns:
+        DataFrame con una fila por vuelo, en el orden de entrada
+    """
     # Crear DataFrame
-    df = pd.DataFrame([features])
+    df = pd.DataFrame([construir_features_base(r) for r in requests])
     
     # Transformar categóricas si es necesario
     if hasattr(feature_engineer, 'transform_categorical'):
@@ -247,11 +410,11 @@ def preparar_features(request: FlightRequest) -> pd.DataFrame:
         except:
             # Si falla, usar encoding manual simple
             if 'op_unique_carrier' in df.columns:
-                df['op_unique_carrier_encoded'] = hash(df['op_unique_carrier'].iloc[0]) % 100
+                df['op_unique_carrier_encoded'] = df['op_unique_carrier'].map(lambda v: hash(v) % 100)
             if 'origin' in df.columns:
-                df['origin_encoded'] = hash(df['origin'].iloc[0]) % 500
+                df['origin_encoded'] = df['origin'].map(lambda v: hash(v) % 500)
             if 'dest' in df.columns:
-                df['dest_encoded'] = hash(df['dest'].iloc[0]) % 500
+                df['dest_encoded'] = df['dest'].map(lambda v: hash(v) % 500)
     
     # Asegurarse de que tenemos todas las features del modelo
     for feature_name in metadata['feature_names']:
@@ -268,6 +431,160 @@ def preparar_features(request: FlightRequest) -> pd.DataFrame:
     return df
 
 
+def construir_respuesta(proba: float, threshold: float, fecha_consulta: str) -> dict:
+    """
+    Construye la respuesta de predicción a partir de la probabilidad de retraso.
+    
+    Args:
+        proba: Probabilidad de retraso
+        threshold: Umbral de decisión
+        fecha_consulta: Marca de tiempo de la consulta
+    
+    Returns:
+        Diccionario con el formato de FlightResponse
+    """
+    prediction = 1 if proba >= threshold else 0
+    
+    # Determinar previsión y nivel de confianza
+    prevision = "Retrasado" if prediction == 1 else "Puntual"
+    
+    # Calcular confianza basado en qué tan lejos está de 0.5
+    distancia_decision = abs(proba - 0.5)
+    if distancia_decision > 0.3:
+        confianza = "Alta"
+    elif distancia_decision > 0.15:
+        confianza = "Media"
+    else:
+        confianza = "Baja"
+    
+    return {
+        "prevision": prevision,
+        "probabilidad": round(float(proba), 4),
+        "confianza": confianza,
+        "detalles": {
+            "umbral_usado": threshold,
+            "probabilidad_puntual": round(float(1 - proba), 4),
+            "probabilidad_retrasado": round(float(proba), 4),
+            "fecha_consulta": fecha_consulta
+        }
+    }
+
+
+class MicroBatcher:
+    """
+    Agrupa peticiones concurrentes de /predict en una sola llamada al modelo.
+    
+    Cada petición se encola con un Future; un worker asíncrono junta lo que
+    llegue durante `window_ms` (o hasta `max_batch_size` vuelos), prepara una
+    sola matriz de features, ejecuta `predict_proba` en un hilo y resuelve
+    cada Future con su probabilidad.
+    """
+    
+    def __init__(self, max_batch_size: int, window_ms: float):
+        self.max_batch_size = max(1, max_batch_size)
+        self.window_ms = window_ms
+        self.histograma: Counter = Counter()
+        self.lotes_procesados = 0
+        self.peticiones_procesadas = 0
+        self.lotes_fallidos = 0
+        self.peticiones_fallidas = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self) -> None:
+        """Inicia el worker en el event loop actual."""
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._worker())
+    
+    async def stop(self) -> None:
+        """Detiene el worker."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def predecir(self, request: FlightRequest) -> float:
+        """Encola un vuelo y espera su probabilidad de retraso."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((request, future))
+        return await future
+    
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            lote = [await self._queue.get()]
+            deadline = loop.time() + self.window_ms / 1000.0
+            
+            # Juntar peticiones hasta agotar la ventana o llenar el lote
+            while len(lote) < self.max_batch_size:
+                restante = deadline - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(await asyncio.wait_for(self._queue.get(), restante))
+                except asyncio.TimeoutError:
+                    break
+            
+            requests = [request for request, _ in lote]
+            probas = None
+            try:
+                probas = await loop.run_in_executor(None, self._predecir_lote, requests)
+            except Exception as e:
+                for _, future in lote:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for (_, future), proba in zip(lote, probas):
+                    if not future.done():
+                        future.set_result(float(proba))
+            finally:
+                # Los lotes que fallan también cuentan en las estadísticas
+                self._registrar(len(lote), fallido=probas is None)
+    
+    @staticmethod
+    def _predecir_lote(requests: List[FlightRequest]) -> np.ndarray:
+        X = preparar_features_batch(requests)
+        return model.predict_proba(X)[:, 1]
+    
+    def _registrar(self, tamano: int, fallido: bool = False) -> None:
+        self.lotes_procesados += 1
+        self.peticiones_procesadas += tamano
+        if fallido:
+            self.lotes_fallidos += 1
+            self.peticiones_fallidas += tamano
+        # Bucket = menor potencia de 2 >= tamano
+        self.histograma[1 << (tamano - 1).bit_length()] += 1
+    
+    def estadisticas(self) -> dict:
+        """Retorna las estadísticas acumuladas del micro-batching."""
+        return {
+            "activo": self._task is not None,
+            "ventana_ms": self.window_ms,
+            "max_lote": self.max_batch_size,
+            "lotes_procesados": self.lotes_procesados,
+            "peticiones_procesadas": self.peticiones_procesadas,
+            "lotes_fallidos": self.lotes_fallidos,
+            "peticiones_fallidas": self.peticiones_fallidas,
+            "tamano_medio_lote": round(
+                self.peticiones_procesadas / self.lotes_procesados, 2
+            ) if self.lotes_procesados else 0.0,
+            "histograma_tamano_lote": {
+                f"<={bucket}": count for bucket, count in sorted(self.histograma.items())
+            }
+        }
+
+
+def formatear_error_validacion(error: ValidationError) -> str:
+    """Resume los errores de Pydantic de un vuelo en una sola línea."""
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in err['loc']) or 'vuelo'}: {err['msg']}"
+        for err in error.errors()
+    )
+
+
 # ============================================================================
 # ENDPOINTS
 # ============================================================================
@@ -282,10 +599,11 @@ async def root():
         "documentacion": "/docs",
         "endpoints": {
             "prediccion": "POST /predict",
+            "prediccion_lote": "POST /predict/batch",
             "salud": "GET /health",
-            "info_modelo": "GET /model-info"
+            "info_modelo": "GET /model-info",
+            "micro_batching": "GET /metrics/microbatch"
         }
-    )
     }
 
 
@@ -318,6 +636,24 @@ async def get_model_info():
     }
 
 
+@app.get("/metrics/microbatch", response_model=MicroBatchStats, tags=["General"])
+async def get_microbatch_stats():
+    """Retorna el histograma de tamaños de lote del micro-batching de /predict."""
+    if micro_batcher is None:
+        return {
+            "activo": False,
+            "ventana_ms": MICROBATCH_WINDOW_MS,
+            "max_lote": MICROBATCH_MAX_SIZE,
+            "lotes_procesados": 0,
+            "peticiones_procesadas": 0,
+            "lotes_fallidos": 0,
+            "peticiones_fallidas": 0,
+            "tamano_medio_lote": 0.0,
+            "histograma_tamano_lote": {}
+        }
+    return micro_batcher.estadisticas()
+
+
 @app.post("/predict", response_model=FlightResponse, tags=["Predicción"])
 async def predict_flight_delay(request: FlightRequest):
     """
@@ -328,7 +664,7 @@ async def predict_flight_delay(request: FlightRequest):
     - origen: Código IATA de 3 letras del aeropuerto origen (JFK, GRU, etc.)
     - destino: Código IATA de 3 letras del aeropuerto destino (LAX, GIG, etc.)
     - fecha_partida: Fecha/hora en formato ISO 8601 (2025-11-10T14:30:00)
-    - distancia_km: Distancia del vuelo en kilómetros
+    - distancia_km (opcional si origen y destino son conocidos): Distancia del vuelo en kilómetros
     - temperatura (opcional): Temperatura en °C
     - velocidad_viento (opcional): Velocidad del viento en km/h
     - precipitacion (opcional): Precipitación en mm
@@ -347,44 +683,20 @@ async def predict_flight_delay(request: FlightRequest):
         )
     
     try:
-        # Preparar features
-        X = preparar_features(request)
-        
-        # Hacer predicción
-        proba = model.predict_proba(X)[0, 1]  # Probabilidad de retraso
+        if micro_batcher is not None:
+            # Se agrupa con otras peticiones concurrentes
+            proba = await micro_batcher.predecir(request)
+        else:
+            # Preparar features
+            X = preparar_features(request)
+            
+            # Hacer predicción
+            proba = model.predict_proba(X)[0, 1]  # Probabilidad de retraso
         
         # Usar threshold optimizado
         threshold = float(metadata['threshold'])
-        prediction = 1 if proba >= threshold else 0
-        
-        # Determinar previsión y nivel de confianza
-        prevision = "Retrasado" if prediction == 1 else "Puntual"
-        
-        # Calcular confianza basado en qué tan lejos está de 0.5
-        distancia_decision = abs(proba - 0.5)
-        if distancia_decision > 0.3:
-            confianza = "Alta"
-        elif distancia_decision > 0.15:
-            confianza = "Media"
-        else:
-            confianza = "Baja"
-        
-        # Preparar respuesta
-        response = {
-            "prevision": prevision,
-            "probabilidad": round(float(proba), 4),
-            "confianza": confianza,
-            "detalles": {
-                "umbral_usado": threshold,
-                "probabilidad_puntual": round(float(1 - proba), 4),
-                "probabilidad_retrasado": round(float(proba), 4),
-                "fecha_consulta": datetime.now().isoformat()
-            }
-    )
-        }
-    )
         
-        return response
+        return construir_respuesta(proba, threshold, datetime.now().isoformat())
     
     except Exception as e:
         raise HTTPException(
@@ -393,6 +705,67 @@ async def predict_flight_delay(request: FlightRequest):
         )
 
 
+@app.post("/predict/batch", response_model=BatchFlightResponse, tags=["Predicción"])
+def predict_flight_delay_batch(request: BatchFlightRequest):
+    """
+    Predice un lote de vuelos con una sola llamada al modelo.
+    
+    Es una función síncrona a propósito: FastAPI la ejecuta en su threadpool,
+    así la validación y la predicción de lotes grandes no bloquean el event
+    loop (ni la cola del micro-batcher de /predict).
+    
+    **Entrada**:
+    - vuelos: Lista de vuelos con el mismo formato que `POST /predict`
+      (máximo configurable con la variable de entorno `MAX_BATCH_SIZE`)
+    
+    **Salida**:
+    - total / exitosos / errores: Conteos del lote
+    - resultados: Un elemento por vuelo, en el orden de entrada, con
+      `resultado` (igual a la salida de /predict) o `error` de validación
+    """
+    # Verificar que el modelo esté cargado
+    if model is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Modelo no disponible. Intente más tarde."
+        )
+    
+    # Validar cada vuelo por separado para no rechazar el lote completo
+    resultados = [None] * len(request.vuelos)
+    validos = []
+    for i, item in enumerate(request.vuelos):
+        try:
+            validos.append((i, FlightRequest.model_validate(item)))
+        except ValidationError as e:
+            resultados[i] = {"indice": i, "error": formatear_error_validacion(e)}
+    
+    if validos:
+        try:
+            # Una sola matriz de features y una sola llamada a predict_proba
+            X = preparar_features_batch([vuelo for _, vuelo in validos])
+            probas = model.predict_proba(X)[:, 1]
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error en predicción: {str(e)}"
+            )
+        
+        threshold = float(metadata['threshold'])
+        fecha_consulta = datetime.now().isoformat()
+        for (i, _), proba in zip(validos, probas):
+            resultados[i] = {
+                "indice": i,
+                "resultado": construir_respuesta(proba, threshold, fecha_consulta)
+            }
+    
+    return {
+        "total": len(resultados),
+        "exitosos": len(validos),
+        "errores": len(resultados) - len(validos),
+        "resultados": resultados
+    }
+
+
 # ============================================================================
 # EJECUCIÓN
 # ============================================================================
@@ -400,17 +773,13 @@ async def predict_flight_delay(request: FlightRequest):
 if __name__ == "__main__":
     import uvicorn
 
-    print("
-" + "=" * 70)
+    print("\n" + "=" * 70)
     print("FLIGHTONTIME API - Modo Desarrollo")
     print("=" * 70)
-    print("
-Servidor corriendo en: http://localhost:8000")
+    print("\nServidor corriendo en: http://localhost:8000")
     print("Documentacion Swagger: http://localhost:8000/docs")
     print("Documentacion ReDoc: http://localhost:8000/redoc")
-    print("
-" + "=" * 70 + "
-")
+    print("\n" + "=" * 70 + "\n")
 
     uvicorn.run(
         "main:app",
@@ -18,6 +18,7 @@ from pathlib import Path
 
 # Agregar paths
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
 
 st.set_page_config(page_title="Predictive Simulator", page_icon="🥈", layout="wide")
 
@@ -163,11 +164,15 @@ def hacer_prediccion(aerolinea, origen, destino, fecha, hora, distancia, temp, v
                 'wind_spd': viento,
                 'precip_1h': lluvia,
                 'climate_severity_idx': min((viento / 100 + lluvia / 50) / 2, 1.0),
-                'latitude': 0.0,
-                'longitude': 0.0,
-                'dist_met_km': 10.0
+                'dist_met_km': 10.0,
+                'origin': origen,
+                'dest': destino
             }
             
+            # Coordenadas del aeropuerto de origen
+            from airports import fill_geo_features
+            fill_geo_features(features)
+            
             df = pd.DataFrame([features])
             
             # Features codificadas (simplificado)
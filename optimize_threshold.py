@@ -22,7 +22,9 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
-from sklearn.metrics import precision_score, recall_score, f1_score, confusion_matrix
+
+from dataset import load_dataset, dataset_filters_from_env
+from operating_curve import OperatingCurve
 
 # Configuración
 MODEL_PATH = Path("models/model.joblib")
@@ -72,8 +74,12 @@ class ThresholdOptimizer:
         """
         print("\n📊 Cargando datos de test...")
         
-        # Cargar dataset completo
-        df = pd.read_parquet(DATASET_PATH)
+        # Solo columnas del modelo; con muestra se leen row groups al azar
+        df = load_dataset(
+            DATASET_PATH,
+            sample_size=sample_size * 10 if sample_size else None,
+            **dataset_filters_from_env()
+        )
         
         # Tomar muestra primero si es necesario (antes de split para ser más rápido)
         if sample_size and len(df) > sample_size * 10:
@@ -171,39 +177,8 @@ class ThresholdOptimizer:
         if thresholds is None:
             thresholds = np.arange(0.1, 0.95, 0.01)
         
-        results = []
-        
-        for threshold in thresholds:
-            y_pred = (y_proba >= threshold).astype(int)
-            
-            precision = precision_score(y_test, y_pred, zero_division=0)
-            recall = recall_score(y_test, y_pred, zero_division=0)
-            f1 = f1_score(y_test, y_pred, zero_division=0)
-            
-            # Matriz de confusión
-            cm = confusion_matrix(y_test, y_pred)
-            tn, fp, fn, tp = cm.ravel()
-            
-            # Métricas adicionales
-            specificity = tn / (tn + fp) if (tn + fp) > 0 else 0
-            fpr = fp / (fp + tn) if (fp + tn) > 0 else 0
-            fnr = fn / (fn + tp) if (fn + tp) > 0 else 0
-            
-            results.append({
-                'threshold': threshold,
-                'precision': precision,
-                'recall': recall,
-                'f1': f1,
-                'specificity': specificity,
-                'false_positive_rate': fpr,
-                'false_negative_rate': fnr,
-                'true_positives': tp,
-                'false_positives': fp,
-                'true_negatives': tn,
-                'false_negatives': fn
-            })
-        
-        df_results = pd.DataFrame(results)
+        # Una sola pasada ordenada para todos los umbrales
+        df_results = OperatingCurve(y_test, y_proba).metrics(thresholds)
         print(f"✅ {len(df_results)} umbrales analizados")
         
         return df_results
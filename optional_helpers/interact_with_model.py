@@ -13,66 +13,91 @@ import joblib
 import json
 from datetime import datetime
 from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import pandas as pd
 
+from airports import fill_geo_features
+
 # Paths
 PROJECT_ROOT = Path(__file__).parent.parent
 MODEL_PATH = PROJECT_ROOT / 'models' / 'model.joblib'
 METADATA_PATH = PROJECT_ROOT / 'models' / 'metadata.json'
 FE_PATH = PROJECT_ROOT / 'models' / 'feature_engineer.joblib'
 
+# Cache de artefactos del proceso: ruta -> (mtime_ns, objeto cargado)
+_ARTIFACT_CACHE: Dict[str, Tuple[int, Any]] = {}
+
+
+def _load_cached(path: Path, loader: Callable[[Path], Any]) -> Any:
+    """
+    Carga un artefacto una sola vez por proceso.
+    Se recarga automáticamente si el archivo cambia (mtime distinto).
+    """
+    key = str(Path(path).resolve())
+    mtime = os.stat(key).st_mtime_ns
+    cached = _ARTIFACT_CACHE.get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    
+    obj = loader(Path(key))
+    _ARTIFACT_CACHE[key] = (mtime, obj)
+    return obj
+
+
+def _load_json(path: Path) -> dict:
+    with open(path, 'r') as f:
+        return json.load(f)
+
 
 def load_model():
-    """Carga el modelo y el feature engineer."""
+    """Carga el modelo y el feature engineer (cacheados por ruta y mtime)."""
     if not MODEL_PATH.exists():
         raise FileNotFoundError(f"Modelo no encontrado en {MODEL_PATH}. Ejecuta train_model.py primero.")
     
-    model = joblib.load(MODEL_PATH)
-    
-    with open(METADATA_PATH, 'r') as f:
-        metadata = json.load(f)
+    model = _load_cached(MODEL_PATH, joblib.load)
+    metadata = _load_cached(METADATA_PATH, _load_json)
     
     fe = None
     if FE_PATH.exists():
-        fe = joblib.load(FE_PATH)
+        fe = _load_cached(FE_PATH, joblib.load)
     
     return model, metadata, fe
 
 
-def predict_flight(aerolinea: str, origen: str, destino: str, 
-                   fecha_partida: str, distancia_km: float,
-                   temp: float = 20.0, wind_spd: float = 5.0,
-                   precip_1h: float = 0.0, climate_severity_idx: float = 0.0,
-                   dist_met_km: float = 10.0, latitude: float = 40.0,
-                   longitude: float = -74.0) -> dict:
+def _as_float(name: str, value: Any) -> Optional[float]:
+    """Convierte un valor numérico de entrada; ValueError si no es convertible."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Valor no numérico en {name}: {value!r}")
+
+
+def build_flight_features(aerolinea: str, origen: str, destino: str, 
+                          fecha_partida: str, distancia_km: Optional[float] = None,
+                          temp: float = 20.0, wind_spd: float = 5.0,
+                          precip_1h: float = 0.0, climate_severity_idx: float = 0.0,
+                          dist_met_km: float = 10.0, latitude: Optional[float] = None,
+                          longitude: Optional[float] = None) -> dict:
     """
-    Realiza predicción para un vuelo.
-    
-    Args:
-        aerolinea: Código de aerolínea (ej: "AA")
-        origen: Código IATA origen (ej: "JFK")
-        destino: Código IATA destino (ej: "LAX")
-        fecha_partida: Fecha/hora ISO (ej: "2025-03-15T14:30:00")
-        distancia_km: Distancia en kilómetros
-        temp: Temperatura (°C)
-        wind_spd: Velocidad del viento (km/h)
-        precip_1h: Precipitación última hora (mm)
-        climate_severity_idx: Índice de severidad climática
-        dist_met_km: Distancia a estación meteorológica (km)
-        latitude: Latitud del aeropuerto
-        longitude: Longitud del aeropuerto
-    
-    Returns:
-        dict con prevision y probabilidad
+    Construye el diccionario de features (formato del modelo) de un vuelo.
+    Acepta los mismos argumentos que `predict_flight`. Los valores numéricos
+    se validan aquí, por vuelo, para que uno inválido no llegue al modelo.
     """
-    # Cargar modelo
-    model, metadata, fe = load_model()
-    
     # Parsear fecha
     fecha = datetime.fromisoformat(fecha_partida)
     
-    # Crear DataFrame con formato del modelo
-    df = pd.DataFrame([{
+    numeric = {
+        name: _as_float(name, value) for name, value in (
+            ('distancia_km', distancia_km), ('temp', temp), ('wind_spd', wind_spd),
+            ('precip_1h', precip_1h), ('climate_severity_idx', climate_severity_idx),
+            ('dist_met_km', dist_met_km), ('latitude', latitude), ('longitude', longitude),
+        )
+    }
+    
+    # Features con formato del modelo
+    features = {
         # Temporales
         'year': fecha.year,
         'month': fecha.month,
@@ -81,21 +106,42 @@ def predict_flight(aerolinea: str, origen: str, destino: str,
         'dep_hour': fecha.hour,
         'sched_minute_of_day': fecha.hour * 60 + fecha.minute,
         # Distancia
-        'distance': distancia_km,
+        'distance': numeric['distancia_km'],
         # Clima
-        'temp': temp,
-        'wind_spd': wind_spd,
-        'precip_1h': max(0, precip_1h),  # -1 → 0
-        'climate_severity_idx': climate_severity_idx,
-        'dist_met_km': dist_met_km,
+        'temp': numeric['temp'],
+        'wind_spd': numeric['wind_spd'],
+        'precip_1h': max(0, numeric['precip_1h']),  # -1 → 0
+        'climate_severity_idx': numeric['climate_severity_idx'],
+        'dist_met_km': numeric['dist_met_km'],
         # Geográficas
-        'latitude': latitude,
-        'longitude': longitude,
+        'latitude': numeric['latitude'],
+        'longitude': numeric['longitude'],
         # Operación (para encoding)
         'op_unique_carrier': aerolinea,
         'origin': origen,
         'dest': destino,
-    }])
+    }
+    
+    # Coordenadas del origen y distancia desde el índice de aeropuertos
+    fill_geo_features(features, default_coords=(40.0, -74.0))
+    # Igual que el API y `api_input_to_features`: sin distancia no se predice
+    if features['distance'] is None:
+        raise ValueError(
+            f"distancia_km no informada y no se pudo estimar para {origen} → {destino}"
+        )
+    
+    return features
+
+
+def _predict_records(records: List[dict]) -> List[dict]:
+    """
+    Predice una lista de diccionarios de features con una sola llamada al modelo.
+    """
+    # Cargar modelo (cacheado)
+    model, metadata, fe = load_model()
+    
+    # Crear DataFrame
+    df = pd.DataFrame(records)
     
     # Transformar categóricas si hay feature engineer
     if fe is not None:
@@ -115,13 +161,50 @@ def predict_flight(aerolinea: str, origen: str, destino: str,
     
     # Predecir
     threshold = float(metadata.get('threshold', 0.5))
-    proba = model.predict_proba(X)[0, 1]
-    prediction = 1 if proba >= threshold else 0
+    probas = model.predict_proba(X)[:, 1]
     
-    return {
-        "prevision": "Retrasado" if prediction == 1 else "Puntual",
-        "probabilidad": round(float(proba), 4)
-    }
+    return [
+        {
+            "prevision": "Retrasado" if proba >= threshold else "Puntual",
+            "probabilidad": round(float(proba), 4)
+        }
+        for proba in probas
+    ]
+
+
+def predict_flight(aerolinea: str, origen: str, destino: str, 
+                   fecha_partida: str, distancia_km: Optional[float] = None,
+                   temp: float = 20.0, wind_spd: float = 5.0,
+                   precip_1h: float = 0.0, climate_severity_idx: float = 0.0,
+                   dist_met_km: float = 10.0, latitude: Optional[float] = None,
+                   longitude: Optional[float] = None) -> dict:
+    """
+    Realiza predicción para un vuelo.
+    
+    Args:
+        aerolinea: Código de aerolínea (ej: "AA")
+        origen: Código IATA origen (ej: "JFK")
+        destino: Código IATA destino (ej: "LAX")
+        fecha_partida: Fecha/hora ISO (ej: "2025-03-15T14:30:00")
+        distancia_km: Distancia en kilómetros (None = gran círculo origen-destino)
+        temp: Temperatura (°C)
+        wind_spd: Velocidad del viento (km/h)
+        precip_1h: Precipitación última hora (mm)
+        climate_severity_idx: Índice de severidad climática
+        dist_met_km: Distancia a estación meteorológica (km)
+        latitude: Latitud del aeropuerto (None = índice de aeropuertos)
+        longitude: Longitud del aeropuerto (None = índice de aeropuertos)
+    
+    Returns:
+        dict con prevision y probabilidad
+    """
+    features = build_flight_features(
+        aerolinea, origen, destino, fecha_partida, distancia_km,
+        temp=temp, wind_spd=wind_spd, precip_1h=precip_1h,
+        climate_severity_idx=climate_severity_idx, dist_met_km=dist_met_km,
+        latitude=latitude, longitude=longitude
+    )
+    return _predict_records([features])[0]
 
 
 def interactive_mode():
@@ -207,25 +290,41 @@ def interactive_mode():
 
 def batch_predict(data: list) -> list:
     """
-    Realiza predicciones en lote.
+    Realiza predicciones en lote con una sola llamada al modelo.
     
     Args:
         data: Lista de diccionarios con datos de vuelos
         
     Returns:
-        Lista de diccionarios con predicciones
+        Lista de diccionarios con predicciones (mismo orden que la entrada)
     """
-    results = []
-    for flight in data:
+    results: List[Optional[dict]] = [None] * len(data)
+    valid_idx, records = [], []
+    
+    # Errores de entrada se reportan por vuelo
+    for i, flight in enumerate(data):
         try:
-            result = predict_flight(**flight)
-            result['input'] = flight
-            results.append(result)
+            records.append(build_flight_features(**flight))
+            valid_idx.append(i)
         except Exception as e:
-            results.append({
-                'input': flight,
-                'error': str(e)
-            })
+            results[i] = {'input': flight, 'error': str(e)}
+    
+    if records:
+        try:
+            predictions = _predict_records(records)
+        except Exception:
+            # Si la llamada vectorizada falla, se puntúa vuelo a vuelo para
+            # que el error quede solo en el vuelo que lo provoca
+            predictions = []
+            for record in records:
+                try:
+                    predictions.append(_predict_records([record])[0])
+                except Exception as e:
+                    predictions.append({'error': str(e)})
+        for i, result in zip(valid_idx, predictions):
+            result['input'] = data[i]
+            results[i] = result
+    
     return results
 
 
@@ -16,10 +16,13 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 import joblib
 import json
+import numpy as np
 import pandas as pd
 from datetime import datetime
 from pathlib import Path
 
+from airports import fill_geo_features
+
 # Configuración
 MODEL_PATH = Path("models/model.joblib")
 METADATA_PATH = Path("models/metadata.json")
@@ -49,6 +52,13 @@ class FlightDelayPredictor:
         self.threshold = float(self.metadata['threshold'])
         self.features = self.metadata['feature_names']
         
+        # Columnas de entrada necesarias (las *_encoded se derivan de su categórica)
+        encoders = getattr(self.feature_engineer, 'label_encoders', {})
+        self.required_inputs = [
+            f[:-len('_encoded')] if f.endswith('_encoded') and f[:-len('_encoded')] in encoders else f
+            for f in self.features
+        ]
+        
         print(f"\n📊 Modelo: {self.metadata['model_name']}")
         print(f"📊 Umbral optimizado: {self.threshold:.4f}")
         print(f"📊 ROC-AUC: {self.metadata['metrics']['roc_auc']:.4f}")
@@ -79,11 +89,29 @@ class FlightDelayPredictor:
                     'latitude': float,
                     'longitude': float
                 }
+                latitude/longitude y distance son opcionales: si faltan se
+                obtienen del índice de aeropuertos (origen / gran círculo).
         
         Returns:
             pd.DataFrame: DataFrame con las features preparadas
         """
-        df = pd.DataFrame([flight_data])
+        return self.prepare_inputs([flight_data])
+    
+    def prepare_inputs(self, flights_data):
+        """
+        Prepara un único DataFrame de features para una lista de vuelos.
+        
+        Args:
+            flights_data (list): Lista de diccionarios con el formato de `prepare_input`
+        
+        Returns:
+            pd.DataFrame: Una fila por vuelo, en el orden de entrada
+        """
+        return self._prepare_records([fill_geo_features(dict(flight)) for flight in flights_data])
+    
+    def _prepare_records(self, records):
+        """DataFrame de features para vuelos con los datos geográficos ya completados."""
+        df = pd.DataFrame(records)
         
         # Si hay categóricas, transformarlas
         if hasattr(self.feature_engineer, 'label_encoders'):
@@ -96,6 +124,25 @@ class FlightDelayPredictor:
         
         return df[self.features]
     
+    def _build_result(self, proba, return_proba=True):
+        """Construye el diccionario de resultado a partir de la probabilidad."""
+        # Predicción binaria usando el umbral optimizado
+        prediction = 1 if proba >= self.threshold else 0
+        label = "Retrasado" if prediction == 1 else "Puntual"
+        
+        result = {
+            'prevision': label,
+            'probabilidad': float(proba),
+            'umbral_usado': self.threshold,
+            'confianza': 'Alta' if abs(proba - 0.5) > 0.3 else 'Media' if abs(proba - 0.5) > 0.15 else 'Baja'
+        }
+        
+        if return_proba:
+            result['prob_puntual'] = float(1 - proba)
+            result['prob_retrasado'] = float(proba)
+        
+        return result
+    
     def predict(self, flight_data, return_proba=True):
         """
         Realiza una predicción de retraso.
@@ -113,47 +160,91 @@ class FlightDelayPredictor:
         # Predecir probabilidad
         proba = self.model.predict_proba(X)[0, 1]
         
-        # Predicción binaria usando el umbral optimizado
-        prediction = 1 if proba >= self.threshold else 0
-        label = "Retrasado" if prediction == 1 else "Puntual"
-        
-        result = {
-            'prevision': label,
-            'probabilidad': float(proba),
-            'umbral_usado': self.threshold,
-            'confianza': 'Alta' if abs(proba - 0.5) > 0.3 else 'Media' if abs(proba - 0.5) > 0.15 else 'Baja'
-        }
-        
-        if return_proba:
-            result['prob_puntual'] = float(1 - proba)
-            result['prob_retrasado'] = float(proba)
-        
-        return result
+        return self._build_result(proba, return_proba)
     
-    def predict_batch(self, flights_data):
+    def predict_batch(self, flights_data, chunk_size=100_000):
         """
         Realiza predicciones para múltiples vuelos.
         
+        Cada bloque de `chunk_size` vuelos se prepara como un único DataFrame
+        y se puntúa con una sola llamada a `predict_proba`. Los vuelos con
+        datos incompletos se reportan con 'error' sin afectar al resto.
+        
         Args:
             flights_data (list): Lista de diccionarios con datos de vuelos
+            chunk_size (int): Vuelos por llamada al modelo (acota la memoria; > 0)
         
         Returns:
-            list: Lista de resultados de predicciones
+            list: Lista de resultados de predicciones (mismo orden que la entrada)
         """
-        results = []
-        for i, flight in enumerate(flights_data):
-            try:
-                result = self.predict(flight)
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size debe ser positivo, se recibió {chunk_size}")
+        
+        results = [None] * len(flights_data)
+        
+        for start in range(0, len(flights_data), chunk_size):
+            chunk = flights_data[start:start + chunk_size]
+            valid_idx, valid_flights = [], []
+            
+            # Validar campos requeridos por vuelo (tras completar los geográficos)
+            for offset, flight in enumerate(chunk):
+                i = start + offset
+                flight = fill_geo_features(dict(flight))
+                missing = [c for c in self.required_inputs if flight.get(c) is None]
+                if missing:
+                    results[i] = self._batch_error(i, f"Features faltantes: {missing}")
+                else:
+                    valid_idx.append(i)
+                    valid_flights.append(flight)
+            
+            if not valid_flights:
+                continue
+            
+            # Los vuelos ya tienen los datos geográficos completados arriba
+            X = self._prepare_records(valid_flights)
+            
+            # Valores no numéricos invalidan solo su fila
+            X, invalid = self._coerce_numeric(X)
+            if invalid.any():
+                for i, bad in zip(valid_idx, invalid):
+                    if bad:
+                        results[i] = self._batch_error(i, "Valores no numéricos en features")
+                X = X[~invalid]
+                valid_idx = [i for i, bad in zip(valid_idx, invalid) if not bad]
+                if not valid_idx:
+                    continue
+            
+            probas = self.model.predict_proba(X)[:, 1]
+            for i, proba in zip(valid_idx, probas):
+                result = self._build_result(proba)
                 result['vuelo_id'] = i + 1
-                results.append(result)
-            except Exception as e:
-                print(f"❌ Error en vuelo {i+1}: {str(e)}")
-                results.append({
-                    'vuelo_id': i + 1,
-                    'error': str(e)
-                })
+                results[i] = result
         
         return results
+    
+    @staticmethod
+    def _coerce_numeric(X):
+        """
+        Convierte columnas no numéricas a número.
+        Retorna (X convertido, máscara de filas con valores no convertibles).
+        """
+        invalid = np.zeros(len(X), dtype=bool)
+        non_numeric = [c for c in X.columns if not pd.api.types.is_numeric_dtype(X[c])]
+        if non_numeric:
+            X = X.copy()
+            for col in non_numeric:
+                converted = pd.to_numeric(X[col], errors='coerce')
+                invalid |= (converted.isna() & X[col].notna()).to_numpy()
+                X[col] = converted
+        return X, invalid
+    
+    @staticmethod
+    def _batch_error(i, message):
+        print(f"❌ Error en vuelo {i+1}: {message}")
+        return {
+            'vuelo_id': i + 1,
+            'error': message
+        }
 
 
 def ejemplo_prediccion_simple():
@@ -0,0 +1,280 @@
+"""
+FlightOnTime - Scoring de Archivos por Lotes
+============================================
+Puntúa archivos grandes de vuelos (Parquet, CSV o JSONL) en streaming,
+lote a lote con Arrow, y escribe probabilidades y etiquetas en Parquet.
+La memoria queda acotada por el tamaño de lote, no por el del archivo.
+
+Formatos de entrada aceptados:
+- Columnas del dataset (OP_UNIQUE_CARRIER, ORIGIN, DEST, YEAR, ...), igual
+  que en el entrenamiento out-of-core (`prepare_batch_dataframe`).
+- Contrato del API (aerolinea, origen, destino, fecha_partida, ...). Un
+  registro inválido (fecha mal formada, valor no numérico, distancia no
+  estimable) no detiene el archivo: su fila sale sin probabilidad y con el
+  motivo en la columna `error`.
+
+Uso:
+    python score_file.py vuelos.parquet -o outputs/scores.parquet
+    python score_file.py vuelos.jsonl -o scores.parquet --keep FL_DATE ORIGIN DEST
+
+Autor: FlightOnTime Team
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+import pyarrow.json as pj
+import pyarrow.parquet as pq
+
+from config import MODEL_PATH, METADATA_PATH, FEATURE_ENGINEER_PATH
+from airports import get_airport_index
+from features import api_input_to_features, encode_with_unknown
+from train_model import prepare_batch_dataframe
+
+# Filas por lote Arrow
+DEFAULT_BATCH_SIZE = 100_000
+
+# Columnas que identifican el formato del contrato del API
+API_COLUMNS = {'aerolinea', 'origen', 'destino', 'fecha_partida'}
+
+
+def iter_record_batches(path: Path, batch_size: int = DEFAULT_BATCH_SIZE,
+                        columns: Optional[List[str]] = None) -> Iterator[pa.RecordBatch]:
+    """
+    Itera el archivo en RecordBatches de Arrow sin cargarlo completo.
+    """
+    suffix = path.suffix.lower()
+
+    if suffix in ('.jsonl', '.json', '.ndjson'):
+        if hasattr(pj, 'open_json'):
+            # Lector streaming nativo por bloques de 16 MB; fecha_partida se
+            # mantiene como texto ISO (Arrow la convertiría a timestamp)
+            reader = pj.open_json(
+                str(path),
+                read_options=pj.ReadOptions(block_size=1 << 24),
+                parse_options=pj.ParseOptions(
+                    explicit_schema=pa.schema([('fecha_partida', pa.string())]),
+                    unexpected_field_behavior='infer'
+                )
+            )
+            for batch in reader:
+                yield batch.select(columns) if columns else batch
+        else:
+            rows = []
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        rows.append(json.loads(line))
+                    if len(rows) == batch_size:
+                        yield pa.RecordBatch.from_pylist(rows)
+                        rows = []
+            if rows:
+                yield pa.RecordBatch.from_pylist(rows)
+        return
+
+    if suffix == '.csv':
+        # Igual que en JSONL: fecha_partida como texto ISO, no timestamp, y
+        # los campos vacíos como nulos (no informados)
+        fmt = ds.CsvFileFormat(convert_options=pacsv.ConvertOptions(
+            column_types={'fecha_partida': pa.string()},
+            strings_can_be_null=True
+        ))
+    else:
+        fmt = 'parquet'
+    dataset = ds.dataset(str(path), format=fmt)
+    yield from dataset.to_batches(columns=columns, batch_size=batch_size)
+
+
+class FileScorer:
+    """
+    Aplica el modelo guardado a lotes Arrow y devuelve probabilidades.
+    """
+
+    def __init__(self):
+        self.model = joblib.load(MODEL_PATH)
+        with open(METADATA_PATH, 'r') as f:
+            self.metadata = json.load(f)
+        self.feature_engineer = joblib.load(FEATURE_ENGINEER_PATH)
+
+        self.threshold = float(self.metadata['threshold'])
+        self.feature_names = self.metadata['feature_names']
+        self.encoders = self.feature_engineer.label_encoders
+        self.class_sets = {col: set(le.classes_) for col, le in self.encoders.items()}
+        self.airports = get_airport_index()
+        self.numeric_features = [f for f in self.feature_names if not f.endswith('_encoded')]
+
+    def _api_record(self, row: dict) -> dict:
+        """Features crudas de un registro del API, con las numéricas validadas."""
+        # Los nulos del archivo equivalen a campos no informados
+        features = api_input_to_features({k: v for k, v in row.items() if v is not None})
+        for col in self.numeric_features:
+            value = features.get(col)
+            if value is None:
+                continue
+            try:
+                features[col] = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Valor no numérico en {col}: {value!r}")
+        return features
+
+    def _prepare_api_batch(self, batch: pa.RecordBatch) -> Tuple[pd.DataFrame, List[Optional[str]]]:
+        """
+        Retorna (features, errores): un error por fila (None si es válida).
+        Las filas inválidas quedan en NaN para conservar el orden del lote.
+        """
+        records, errors = {}, []
+        for i, row in enumerate(batch.to_pylist()):
+            try:
+                records[i] = self._api_record(row)
+                errors.append(None)
+            except KeyError as e:
+                errors.append(f"Campo requerido faltante: {e}")
+            except (TypeError, ValueError) as e:
+                errors.append(str(e))
+
+        if not records:
+            return pd.DataFrame(np.nan, index=range(batch.num_rows), columns=self.feature_names), errors
+
+        df = pd.DataFrame.from_dict(records, orient='index')
+        for col, le in self.encoders.items():
+            df[col], df[f"{col}_encoded"] = encode_with_unknown(df[col].str.upper(), le)
+        return df.reindex(range(batch.num_rows)), errors
+
+    def prepare(self, batch: pa.RecordBatch) -> Tuple[pd.DataFrame, List[Optional[str]]]:
+        """
+        Convierte un lote Arrow en la matriz de features del modelo.
+
+        Returns:
+            (matriz de features, error por fila o None si la fila es válida)
+        """
+        errors = [None] * batch.num_rows
+        if API_COLUMNS.issubset(batch.schema.names):
+            df, errors = self._prepare_api_batch(batch)
+        else:
+            df = prepare_batch_dataframe(batch, self.encoders, self.class_sets)
+
+        # Coordenadas del origen si el archivo no las trae
+        if 'latitude' not in df.columns or 'longitude' not in df.columns:
+            coords = self.airports.get_coords_many(df['origin'].astype(str).str.upper().tolist())
+            df['latitude'] = df.get('latitude', pd.Series(coords[:, 0], index=df.index))
+            df['longitude'] = df.get('longitude', pd.Series(coords[:, 1], index=df.index))
+
+        missing = [f for f in self.feature_names if f not in df.columns]
+        if missing:
+            raise ValueError(f"Columnas faltantes en el archivo: {missing}")
+
+        return df[self.feature_names].fillna(0), errors
+
+    def score(self, batch: pa.RecordBatch) -> Tuple[np.ndarray, List[Optional[str]]]:
+        """
+        Retorna (probabilidad de retraso por fila, error por fila). Las filas
+        con error tienen probabilidad NaN.
+        """
+        X, errors = self.prepare(batch)
+        proba = self.model.predict_proba(X)[:, 1].astype(np.float32)
+        proba[[error is not None for error in errors]] = np.nan
+        return proba, errors
+
+
+def score_file(input_path: Path, output_path: Path,
+               batch_size: int = DEFAULT_BATCH_SIZE,
+               keep_columns: Optional[List[str]] = None) -> int:
+    """
+    Puntúa `input_path` en streaming y escribe el resultado en `output_path`.
+
+    El Parquet de salida tiene una fila por vuelo, en el orden de entrada:
+    row_id, las columnas de `keep_columns`, prob_retraso, prediccion (0/1)
+    y error (motivo si la fila no se pudo puntuar; entonces prob_retraso y
+    prediccion quedan nulos).
+
+    Returns:
+        Número de filas puntuadas
+    """
+    scorer = FileScorer()
+    keep_columns = keep_columns or []
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    writer = None
+    total = 0
+    failed = 0
+    start_time = time.time()
+
+    try:
+        for batch in iter_record_batches(input_path, batch_size):
+            if batch.num_rows == 0:
+                continue
+
+            proba, errors = scorer.score(batch)
+            invalid = np.isnan(proba)
+            columns = {'row_id': pa.array(np.arange(total, total + batch.num_rows, dtype=np.int64))}
+            for col in keep_columns:
+                columns[col] = batch.column(col)
+            columns['prob_retraso'] = pa.array(proba, mask=invalid)
+            columns['prediccion'] = pa.array((proba >= scorer.threshold).astype(np.int8), mask=invalid)
+            columns['error'] = pa.array(errors, type=pa.string())
+            table = pa.table(columns)
+
+            if writer is None:
+                writer = pq.ParquetWriter(str(output_path), table.schema)
+            writer.write_table(table)
+
+            total += batch.num_rows
+            failed += int(invalid.sum())
+            elapsed = time.time() - start_time
+            print(f"   ✓ {total:,} filas ({total / max(elapsed, 1e-9):,.0f} filas/s)")
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if failed:
+        print(f"⚠️ {failed:,} filas no se pudieron puntuar (ver columna 'error')")
+    return total
+
+
+def main():
+    """Función principal."""
+    parser = argparse.ArgumentParser(description="Scoring por lotes de archivos de vuelos")
+    parser.add_argument('input', type=Path, help="Archivo de entrada (.parquet, .csv o .jsonl)")
+    parser.add_argument('-o', '--output', type=Path, default=Path("outputs/scores.parquet"),
+                        help="Parquet de salida (por defecto outputs/scores.parquet)")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Filas por lote (por defecto {DEFAULT_BATCH_SIZE:,})")
+    parser.add_argument('--keep', nargs='*', default=[],
+                        help="Columnas de entrada a copiar en la salida (ej: FL_DATE ORIGIN DEST)")
+    args = parser.parse_args()
+
+    print("="*70)
+    print("✈️  FLIGHTONTIME - SCORING DE ARCHIVO")
+    print("="*70)
+    print(f"📁 Entrada: {args.input}")
+    print(f"📁 Salida:  {args.output}")
+
+    start_time = time.time()
+    try:
+        total = score_file(args.input, args.output, args.batch_size, args.keep)
+    except Exception as e:
+        print(f"\n❌ Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return 1
+
+    elapsed = time.time() - start_time
+    print(f"\n✅ {total:,} vuelos puntuados en {elapsed:.1f} segundos")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
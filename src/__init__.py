@@ -31,16 +31,38 @@ from .config import (
 
 from .features import (
     FlightFeatureEngineer, 
+    FeatureVectorBuilder,
     get_features_for_model, 
     get_excluded_features,
     prepare_input_from_api
 )
 
+from .airports import (
+    AirportIndex,
+    get_airport_index,
+    fill_geo_features
+)
+
+from .dataset import (
+    load_dataset,
+    model_columns,
+    dataset_filters_from_env
+)
+
 from .modeling import (
     FlightDelayModel, 
     cross_validate_model
 )
 
+from .tuning import (
+    SuccessiveHalvingSearch
+)
+
+from .operating_curve import (
+    OperatingCurve,
+    ScoreHistogram
+)
+
 from .evaluation import (
     ModelEvaluator
 )
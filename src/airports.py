@@ -0,0 +1,134 @@
+"""
+FlightOnTime - Índice de Aeropuertos
+====================================
+Lookup de coordenadas por código IATA a partir de data/airports_be.csv.
+
+Se usa en predicción para rellenar las features geográficas (latitude,
+longitude del aeropuerto de origen) y para estimar la distancia del vuelo
+(gran círculo) cuando no viene informada.
+
+El CSV se carga una sola vez por proceso en arrays NumPy compactos con un
+diccionario código → fila, por lo que cada consulta es O(1) y sin I/O.
+"""
+
+import csv
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Ruta por defecto del índice de aeropuertos
+AIRPORTS_PATH = Path(__file__).parent.parent / "data" / "airports_be.csv"
+
+# Radio medio de la Tierra (km) y conversión km → millas (el modelo usa millas)
+EARTH_RADIUS_KM = 6371.0088
+KM_TO_MILES = 0.621371
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Distancia de gran círculo en km. Acepta escalares o arrays NumPy.
+    """
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class AirportIndex:
+    """
+    Índice compacto de aeropuertos: códigos IATA y coordenadas en arrays.
+    """
+
+    def __init__(self, codes: Sequence[str], latitudes: Sequence[float],
+                 longitudes: Sequence[float]):
+        self.codes = np.asarray([c.upper() for c in codes])
+        self.coords = np.column_stack([latitudes, longitudes]).astype(np.float64)
+        self._rows: Dict[str, int] = {code: i for i, code in enumerate(self.codes.tolist())}
+
+    @classmethod
+    def from_csv(cls, path: Path = AIRPORTS_PATH) -> 'AirportIndex':
+        """
+        Carga el índice desde un CSV con columnas iata, lat, lon.
+        """
+        codes, latitudes, longitudes = [], [], []
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                codes.append(row['iata'].strip())
+                latitudes.append(float(row['lat']))
+                longitudes.append(float(row['lon']))
+        return cls(codes, latitudes, longitudes)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __contains__(self, code: str) -> bool:
+        return isinstance(code, str) and code.upper() in self._rows
+
+    def get_coords(self, code: str) -> Optional[Tuple[float, float]]:
+        """
+        Retorna (latitud, longitud) del aeropuerto o None si no existe.
+        """
+        row = self._rows.get(code.upper()) if isinstance(code, str) else None
+        if row is None:
+            return None
+        lat, lon = self.coords[row]
+        return float(lat), float(lon)
+
+    def get_coords_many(self, codes: Sequence[str]) -> np.ndarray:
+        """
+        Retorna una matriz (n, 2) de coordenadas; NaN para códigos desconocidos.
+        """
+        rows = np.fromiter(
+            (self._rows.get(c.upper(), -1) if isinstance(c, str) else -1 for c in codes),
+            dtype=np.int64, count=len(codes)
+        )
+        out = np.full((len(rows), 2), np.nan)
+        known = rows >= 0
+        out[known] = self.coords[rows[known]]
+        return out
+
+    def distance_km(self, origin: str, dest: str) -> Optional[float]:
+        """
+        Distancia de gran círculo entre dos aeropuertos, o None si falta alguno.
+        """
+        a = self.get_coords(origin)
+        b = self.get_coords(dest)
+        if a is None or b is None:
+            return None
+        return float(haversine_km(a[0], a[1], b[0], b[1]))
+
+
+@lru_cache(maxsize=None)
+def get_airport_index(path: Path = AIRPORTS_PATH) -> AirportIndex:
+    """
+    Índice de aeropuertos compartido por el proceso (se carga una sola vez).
+    """
+    return AirportIndex.from_csv(path)
+
+
+def fill_geo_features(features: Dict,
+                      default_coords: Tuple[float, float] = (0.0, 0.0)) -> Dict:
+    """
+    Completa en el diccionario de features (formato del modelo) los campos
+    geográficos que falten o sean None:
+    - latitude/longitude: coordenadas del aeropuerto de origen
+      (`default_coords` si el origen no está en el índice)
+    - distance: distancia de gran círculo origen-destino en millas
+    """
+    index = get_airport_index()
+
+    if features.get('latitude') is None or features.get('longitude') is None:
+        lat, lon = index.get_coords(features.get('origin')) or default_coords
+        if features.get('latitude') is None:
+            features['latitude'] = lat
+        if features.get('longitude') is None:
+            features['longitude'] = lon
+
+    if features.get('distance') is None:
+        distance_km = index.distance_km(features.get('origin'), features.get('dest'))
+        if distance_km is not None:
+            features['distance'] = distance_km * KM_TO_MILES
+
+    return features
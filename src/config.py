@@ -184,6 +184,45 @@ MODELS_CONFIG = {
     }
 }
 
+# Rondas sin mejora en validación antes de detener XGBoost/LightGBM
+# (n_estimators pasa a ser el máximo; 0 desactiva el early stopping)
+EARLY_STOPPING_ROUNDS = 20
+
+# =============================================================================
+# BÚSQUEDA DE HIPERPARÁMETROS (successive halving)
+# =============================================================================
+
+# Espacios de búsqueda: (mínimo, máximo, escala) o lista de valores.
+# n_estimators no se busca: lo fija la ronda (recurso del halving)
+HYPERPARAMETER_SPACES = {
+    'XGBoost': {
+        'max_depth': [3, 4, 5, 6, 7, 8, 10],
+        'learning_rate': (0.02, 0.3, 'log'),
+        'subsample': (0.6, 1.0, 'linear'),
+        'colsample_bytree': (0.6, 1.0, 'linear'),
+        'min_child_weight': (1.0, 20.0, 'log'),
+        'reg_lambda': (0.1, 10.0, 'log'),
+    },
+    'LightGBM': {
+        'max_depth': [-1, 4, 6, 8, 10],
+        'num_leaves': [15, 31, 63, 127, 255],
+        'learning_rate': (0.02, 0.3, 'log'),
+        'subsample': (0.6, 1.0, 'linear'),
+        'subsample_freq': [1],  # Sin esto LightGBM ignora subsample
+        'colsample_bytree': (0.6, 1.0, 'linear'),
+        'min_child_samples': [10, 20, 50, 100, 200],
+    },
+}
+
+HYPERPARAMETER_SEARCH = {
+    'n_configs': 16,        # Configuraciones por modelo en la primera ronda
+    'eta': 3,               # Se promueve 1 de cada `eta` a la ronda siguiente
+    'min_rows': 20_000,     # Filas de la primera ronda
+    'max_rounds': 300,      # Árboles en la ronda final (datos completos)
+    'min_rounds': 25,       # Árboles mínimos en cualquier ronda
+    'metric': 'pr_auc',     # Métrica de validación para ordenar las pruebas
+}
+
 # =============================================================================
 # MÉTRICAS DE EVALUACIÓN
 # =============================================================================
@@ -198,6 +237,10 @@ SECONDARY_METRICS = ['accuracy', 'precision', 'recall', 'roc_auc', 'pr_auc']
 MIN_RECALL_TARGET = 0.40    # Detectar al menos 40% de retrasos
 MIN_PRECISION_TARGET = 0.35 # Al menos 35% de alertas correctas
 
+# Intervalos de confianza bootstrap de las métricas de test
+BOOTSTRAP_RESAMPLES = 1000
+BOOTSTRAP_CONFIDENCE = 0.95
+
 # =============================================================================
 # RESULTADOS ACTUALES DEL MODELO (XGBoost)
 # =============================================================================
@@ -0,0 +1,180 @@
+"""
+FlightOnTime - Carga del Dataset
+================================
+Lectura del parquet compartida por el entrenamiento y los scripts de análisis.
+
+- Proyección: solo se leen las columnas que usa el modelo (ALL_FEATURES en
+  su nombre original del parquet) más la variable objetivo.
+- Filtros: año, mes y aerolínea se empujan al lector de parquet, que descarta
+  row groups completos con sus estadísticas.
+- Muestreo: con `sample_size` se toma una muestra aleatoria simple de
+  `ROW_GROUP_OVERSAMPLE` veces las filas pedidas repartida entre todos los
+  row groups (semilla fija). Se lee un row group por vez y solo se conservan
+  sus filas sorteadas, así la memoria queda acotada por la muestra y no por
+  el archivo. Los exports de BTS vienen ordenados por fecha: leer row groups
+  enteros al azar daría unas pocas franjas de tiempo contiguas en lugar de
+  preservar la mezcla de meses y aerolíneas.
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+try:
+    from .config import NUMERIC_FEATURES, CATEGORICAL_FEATURES, RANDOM_STATE
+except ImportError:
+    from config import NUMERIC_FEATURES, CATEGORICAL_FEATURES, RANDOM_STATE
+
+
+# Columnas del parquet → nombres normalizados usados por el modelo
+DATASET_COLUMN_MAPPING = {
+    'YEAR': 'year',
+    'MONTH': 'month',
+    'DAY_OF_MONTH': 'day_of_month',
+    'DAY_OF_WEEK': 'day_of_week',
+    'OP_UNIQUE_CARRIER': 'op_unique_carrier',
+    'ORIGIN': 'origin',
+    'DEST': 'dest',
+    'DISTANCE': 'distance',
+    'DEP_HOUR': 'dep_hour',
+    'LATITUDE': 'latitude',
+    'LONGITUDE': 'longitude',
+    'DIST_MET_KM': 'dist_met_km',
+    'TEMP': 'temp',
+    'WIND_SPD': 'wind_spd',
+    'PRECIP_1H': 'precip_1h',
+    'CLIMATE_SEVERITY_IDX': 'climate_severity_idx',
+    'DEP_DEL15': 'is_delayed'
+}
+RAW_COLUMN_NAMES = {v: k for k, v in DATASET_COLUMN_MAPPING.items()}
+
+# Columnas objetivo candidatas, en orden de preferencia (se proyecta la primera)
+TARGET_CANDIDATES = ['DEP_DEL15', 'DEP_DELAY', 'ARR_DELAY']
+
+# Filas sorteadas por cada fila pedida al muestrear: margen para el muestreo
+# estratificado posterior
+ROW_GROUP_OVERSAMPLE = 2.0
+
+
+def model_columns(schema: pa.Schema) -> List[str]:
+    """
+    Columnas del parquet que necesita el modelo: las features (categóricas
+    sin codificar) con su nombre original y la variable objetivo.
+    """
+    names = set(schema.names)
+    raw = [RAW_COLUMN_NAMES.get(c, c) for c in NUMERIC_FEATURES + CATEGORICAL_FEATURES]
+    columns = [c for c in raw if c in names]
+    target = next((c for c in TARGET_CANDIDATES if c in names), None)
+    if target is not None:
+        columns.append(target)
+    return columns
+
+
+def build_filter(years: Optional[Sequence[int]] = None,
+                 months: Optional[Sequence[int]] = None,
+                 carriers: Optional[Sequence[str]] = None) -> Optional[ds.Expression]:
+    """
+    Expresión de filtro de Arrow para año, mes y aerolínea (None = sin filtro).
+    """
+    conditions = []
+    if years:
+        conditions.append(ds.field('YEAR').isin([int(y) for y in years]))
+    if months:
+        conditions.append(ds.field('MONTH').isin([int(m) for m in months]))
+    if carriers:
+        conditions.append(ds.field('OP_UNIQUE_CARRIER').isin([str(c).upper() for c in carriers]))
+
+    if not conditions:
+        return None
+    expression = conditions[0]
+    for condition in conditions[1:]:
+        expression = expression & condition
+    return expression
+
+
+def dataset_filters_from_env() -> Dict[str, list]:
+    """
+    Filtros desde variables de entorno (listas separadas por coma):
+    DATA_YEARS=2023,2024  DATA_MONTHS=6,7,8  DATA_CARRIERS=AA,DL
+    """
+    def _parse(name, cast):
+        value = os.getenv(name, '').strip()
+        return [cast(v.strip()) for v in value.split(',') if v.strip()] if value else None
+
+    filters = {
+        'years': _parse('DATA_YEARS', int),
+        'months': _parse('DATA_MONTHS', int),
+        'carriers': _parse('DATA_CARRIERS', str.upper),
+    }
+    return {k: v for k, v in filters.items() if v}
+
+
+def load_dataset(dataset_path: Path, columns: Optional[List[str]] = None,
+                 years: Optional[Sequence[int]] = None,
+                 months: Optional[Sequence[int]] = None,
+                 carriers: Optional[Sequence[str]] = None,
+                 sample_size: Optional[int] = None,
+                 random_state: int = RANDOM_STATE) -> pd.DataFrame:
+    """
+    Carga el dataset con proyección de columnas, filtros empujados al parquet
+    y, opcionalmente, muestreo aleatorio uniforme antes de materializar.
+
+    Args:
+        dataset_path: Archivo o directorio parquet
+        columns: Columnas a leer (None = `model_columns`)
+        years, months, carriers: Filtros (None = sin filtro)
+        sample_size: Filas a muestrear (None = todas); se sortean
+            `ROW_GROUP_OVERSAMPLE` veces esa cantidad de forma uniforme sobre
+            todo el dataset filtrado, y el muestreo exacto (p. ej.
+            estratificado) queda a cargo del llamador
+        random_state: Semilla del sorteo de filas
+
+    Returns:
+        DataFrame con los nombres de columna originales del parquet
+    """
+    dataset = ds.dataset(str(dataset_path))
+    if columns is None:
+        columns = model_columns(dataset.schema)
+    row_filter = build_filter(years, months, carriers)
+
+    if not sample_size:
+        table = dataset.to_table(columns=columns, filter=row_filter)
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
+    # Row groups que sobreviven al filtro según sus estadísticas, con sus
+    # filas que cumplen el filtro (solo se leen las columnas del filtro)
+    row_groups = [
+        row_group
+        for fragment in dataset.get_fragments(filter=row_filter)
+        for row_group in fragment.split_by_row_group(row_filter, schema=dataset.schema)
+    ]
+    counts = np.array([row_group.count_rows(filter=row_filter) for row_group in row_groups],
+                      dtype=np.int64)
+    rng = np.random.default_rng(random_state)
+    target_rows = min(int(sample_size * ROW_GROUP_OVERSAMPLE), int(counts.sum()))
+
+    # Muestra aleatoria simple sobre todas las filas: el reparto por row group
+    # sigue una hipergeométrica multivariada y dentro de cada uno se sortean
+    # posiciones, así la muestra conserva la mezcla de fechas del dataset
+    quotas = rng.multivariate_hypergeometric(counts, target_rows) if target_rows else np.zeros_like(counts)
+
+    tables = []
+    for row_group, quota in zip(row_groups, quotas):
+        if quota == 0:
+            continue
+        table = row_group.to_table(schema=dataset.schema, columns=columns, filter=row_filter)
+        rows = np.sort(rng.choice(table.num_rows, size=min(int(quota), table.num_rows), replace=False))
+        tables.append(table.take(rows))
+        del table
+
+    if not tables:
+        return dataset.schema.empty_table().select(columns).to_pandas()
+
+    table = pa.concat_tables(tables)
+    del tables
+    return table.to_pandas(split_blocks=True, self_destruct=True)
@@ -4,6 +4,12 @@ FlightOnTime - Evaluación
 Módulo para evaluación de modelos con visualizaciones y reportes.
 """
 
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Tuple, Optional
@@ -17,10 +23,23 @@ from sklearn.metrics import (
     roc_curve, auc, precision_recall_curve, average_precision_score
 )
 
+try:
+    from .config import (PRIMARY_METRIC, SECONDARY_METRICS, RANDOM_STATE,
+                         BOOTSTRAP_RESAMPLES, BOOTSTRAP_CONFIDENCE)
+    from .operating_curve import OperatingCurve, ScoreHistogram, histogram_metrics, bootstrap_histogram
+except ImportError:
+    from config import (PRIMARY_METRIC, SECONDARY_METRICS, RANDOM_STATE,
+                        BOOTSTRAP_RESAMPLES, BOOTSTRAP_CONFIDENCE)
+    from operating_curve import OperatingCurve, ScoreHistogram, histogram_metrics, bootstrap_histogram
+
 # Configuración de estilo
 plt.style.use('seaborn-v0_8-whitegrid')
 sns.set_palette("husl")
 
+# Réplicas bootstrap por tarea del pool: cada tarea tiene su semilla, así que
+# los intervalos no dependen del número de procesos
+BOOTSTRAP_CHUNK = 50
+
 
 class ModelEvaluator:
     """
@@ -159,29 +178,20 @@ class ModelEvaluator:
         plt.close()
     
     def plot_threshold_analysis(self, y_true: np.ndarray, y_proba: np.ndarray,
-                                model_name: str, save: bool = True) -> None:
+                                model_name: str, save: bool = True,
+                                curve: Optional[OperatingCurve] = None) -> None:
         """
         Analiza el impacto del umbral de decisión.
+
+        `curve` permite reutilizar una `OperatingCurve` ya construida sobre
+        las mismas probabilidades.
         """
+        curve = curve or OperatingCurve(y_true, y_proba)
         thresholds = np.arange(0.1, 0.9, 0.05)
-        precisions = []
-        recalls = []
-        f1s = []
-        
-        for t in thresholds:
-            y_pred = (y_proba >= t).astype(int)
-            
-            tp = np.sum((y_pred == 1) & (y_true == 1))
-            fp = np.sum((y_pred == 1) & (y_true == 0))
-            fn = np.sum((y_pred == 0) & (y_true == 1))
-            
-            precision = tp / (tp + fp) if (tp + fp) > 0 else 0
-            recall = tp / (tp + fn) if (tp + fn) > 0 else 0
-            f1 = 2 * precision * recall / (precision + recall) if (precision + recall) > 0 else 0
-            
-            precisions.append(precision)
-            recalls.append(recall)
-            f1s.append(f1)
+        df = curve.metrics(thresholds)
+        precisions = df['precision'].to_numpy()
+        recalls = df['recall'].to_numpy()
+        f1s = df['f1'].to_numpy()
         
         fig, ax = plt.subplots(figsize=(10, 6))
         ax.plot(thresholds, precisions, 'b-', lw=2, label='Precision')
@@ -269,11 +279,103 @@ class ModelEvaluator:
         
         plt.close()
     
+    def bootstrap_confidence_intervals(self, y_true: Optional[np.ndarray] = None,
+                                       y_proba: Optional[np.ndarray] = None,
+                                       threshold: float = 0.5,
+                                       histogram: Optional[ScoreHistogram] = None,
+                                       metrics: Optional[List[str]] = None,
+                                       n_resamples: int = BOOTSTRAP_RESAMPLES,
+                                       confidence: float = BOOTSTRAP_CONFIDENCE,
+                                       n_jobs: Optional[int] = None,
+                                       random_state: int = RANDOM_STATE) -> Dict:
+        """
+        Intervalos de confianza bootstrap (percentiles) de las métricas de test.
+
+        Se remuestrea el histograma de scores por clase en vez de las filas
+        (ver `bootstrap_histogram`), con las réplicas repartidas en un pool de
+        procesos. El umbral se redondea al borde de bin del histograma.
+
+        Args:
+            y_true, y_proba: Labels y probabilidades de test (si no se pasa `histogram`)
+            threshold: Umbral de decisión del modelo
+            histogram: ScoreHistogram ya construido sobre el test
+            metrics: Métricas a reportar (None = PRIMARY_METRIC + SECONDARY_METRICS)
+            n_resamples: Réplicas bootstrap
+            confidence: Nivel de confianza de los intervalos
+            n_jobs: Procesos del pool (None = todos los núcleos)
+            random_state: Semilla
+
+        Returns:
+            Dict con la configuración y, por métrica, estimate/low/high/std
+        """
+        start = time.time()
+        if histogram is None:
+            histogram = ScoreHistogram.from_scores(np.asarray(y_true), np.asarray(y_proba))
+        metrics = metrics or list(dict.fromkeys([PRIMARY_METRIC] + SECONDARY_METRICS))
+        n_jobs = n_jobs or os.cpu_count() or 1
+
+        # Solo los bins no vacíos; el umbral pasa a índice sobre ellos
+        nonzero = np.flatnonzero(histogram.pos + histogram.neg)
+        pos, neg = histogram.pos[nonzero], histogram.neg[nonzero]
+        cut_bin = np.searchsorted(histogram.edges, threshold, side='left')
+        cut = int(np.searchsorted(nonzero, cut_bin, side='left'))
+
+        sizes = [min(BOOTSTRAP_CHUNK, n_resamples - i) for i in range(0, n_resamples, BOOTSTRAP_CHUNK)]
+        seeds = np.random.SeedSequence(random_state).spawn(len(sizes))
+        args = (repeat(pos), repeat(neg), repeat(cut), sizes, seeds, repeat(metrics))
+
+        if n_jobs == 1 or len(sizes) <= 1:
+            parts = list(map(bootstrap_histogram, *args))
+        else:
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=min(n_jobs, len(sizes)), mp_context=context) as pool:
+                parts = list(pool.map(bootstrap_histogram, *args))
+        replicates = np.concatenate(parts)
+
+        estimates = histogram_metrics(pos, neg, cut)
+        alpha = (1 - confidence) / 2
+        low, high = np.nanpercentile(replicates, [100 * alpha, 100 * (1 - alpha)], axis=0)
+        std = np.nanstd(replicates, axis=0)
+
+        intervals = {
+            'method': 'percentile_bootstrap',
+            'confidence': confidence,
+            'n_resamples': n_resamples,
+            'n_rows': histogram.n_total,
+            'threshold': float(histogram.edges[min(cut_bin, histogram.n_bins)]),
+            'histogram_bins': histogram.n_bins,
+            'seconds': round(time.time() - start, 2),
+            'metrics': {
+                m: {
+                    'estimate': float(estimates[m]),
+                    'low': float(low[i]),
+                    'high': float(high[i]),
+                    'std': float(std[i]),
+                }
+                for i, m in enumerate(metrics)
+            },
+        }
+
+        print(f"\n📏 IC {confidence:.0%} bootstrap ({n_resamples} réplicas, "
+              f"{intervals['seconds']:.1f}s):")
+        for m, ci in intervals['metrics'].items():
+            print(f"   {m:<10} {ci['estimate']:.4f}  [{ci['low']:.4f}, {ci['high']:.4f}]")
+
+        return intervals
+    
     def save_metrics_report(self, results: Dict[str, Dict], 
-                            best_model_name: str) -> None:
+                            best_model_name: str,
+                            confidence_intervals: Optional[Dict] = None) -> None:
         """
         Guarda reporte de métricas en formato JSON y Markdown.
+
+        `confidence_intervals` (de `bootstrap_confidence_intervals`) se guarda
+        junto a las métricas del mejor modelo.
         """
+        if confidence_intervals:
+            results = {name: dict(metrics) for name, metrics in results.items()}
+            results[best_model_name]['confidence_intervals'] = confidence_intervals
+        
         # JSON
         json_path = self.metrics_dir / 'evaluation_results.json'
         with open(json_path, 'w') as f:
@@ -309,6 +411,17 @@ class ModelEvaluator:
                 f.write(f"- **ROC-AUC:** {m['roc_auc']:.4f}\n")
                 f.write(f"- **PR-AUC:** {m['pr_auc']:.4f}\n\n")
                 
+                if confidence_intervals:
+                    ci = confidence_intervals
+                    f.write(f"### Intervalos de Confianza ({ci['confidence']:.0%}, "
+                            f"bootstrap de {ci['n_resamples']} réplicas)\n\n")
+                    f.write("| Métrica | Estimación | Inferior | Superior |\n")
+                    f.write("|---------|------------|----------|----------|\n")
+                    for name, values in ci['metrics'].items():
+                        f.write(f"| {name} | {values['estimate']:.4f} | ")
+                        f.write(f"{values['low']:.4f} | {values['high']:.4f} |\n")
+                    f.write("\n")
+                
                 if 'confusion_matrix' in m:
                     cm = m['confusion_matrix']
                     f.write("### Matriz de Confusión\n\n")
@@ -335,6 +448,7 @@ class ModelEvaluator:
         model_name = model.best_model_name
         y_proba = model.predict_proba(X_test)
         y_pred = model.predict(X_test)
+        curve = OperatingCurve(y_test, y_proba)
         
         print("\n📊 Generando visualizaciones...")
         
@@ -352,12 +466,15 @@ class ModelEvaluator:
             self.plot_feature_importance(importance_df, model_name)
         
         # Análisis de umbral
-        self.plot_threshold_analysis(y_test, y_proba, model_name)
+        self.plot_threshold_analysis(y_test, y_proba, model_name, curve=curve)
         
         # Comparación de modelos
         self.plot_models_comparison(results)
         
+        # Intervalos de confianza de las métricas de test
+        intervals = self.bootstrap_confidence_intervals(y_test, y_proba, threshold=model.best_threshold)
+        
         # Reporte de métricas
-        self.save_metrics_report(results, model_name)
+        self.save_metrics_report(results, model_name, confidence_intervals=intervals)
         
         print("\n✅ Reporte completo generado")
@@ -19,9 +19,35 @@ import numpy as np
 from typing import List, Dict, Tuple, Optional
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 import warnings
+
+try:
+    from .airports import fill_geo_features
+except ImportError:
+    from airports import fill_geo_features
 warnings.filterwarnings('ignore')
 
 
+def encode_with_unknown(series: pd.Series, le: LabelEncoder) -> Tuple[pd.Series, np.ndarray]:
+    """
+    Codifica una columna categórica con un LabelEncoder ajustado, de forma vectorizada.
+    
+    Usa un índice hash sobre `le.classes_` en lugar de un `apply` por fila;
+    los valores no vistos se mapean a '__unknown__'. Equivale a
+    `le.transform` tras reemplazar los desconocidos.
+    
+    Returns:
+        (valores como str con '__unknown__' aplicado, códigos enteros)
+    """
+    values = series.astype(str)
+    classes = pd.Index(le.classes_)
+    codes = classes.get_indexer(values)
+    unknown_mask = codes < 0
+    if unknown_mask.any():
+        codes[unknown_mask] = classes.get_loc('__unknown__')
+        values = values.where(~unknown_mask, '__unknown__')
+    return values, codes.astype(np.int64)
+
+
 class FlightFeatureEngineer:
     """
     Clase para ingeniería de features de vuelos.
@@ -120,11 +146,10 @@ class FlightFeatureEngineer:
         
         for col, le in self.label_encoders.items():
             if col in df.columns:
+                values, codes = encode_with_unknown(df[col], le)
                 # Reemplazar valores desconocidos con '__unknown__'
-                df[col] = df[col].astype(str).apply(
-                    lambda x: x if x in le.classes_ else '__unknown__'
-                )
-                df[col + '_encoded'] = le.transform(df[col])
+                df[col] = values
+                df[col + '_encoded'] = codes
         
         return df
     
@@ -216,6 +241,66 @@ class FlightFeatureEngineer:
         return df, feature_cols
 
 
+class FeatureVectorBuilder:
+    """
+    Construye directamente la fila de features (float32) en el orden del modelo,
+    sin pasar por pandas. Pensado para predicción de baja latencia.
+    
+    Produce los mismos valores que `transform_categorical` + reindexado por
+    `feature_names`: las categóricas se resuelven con diccionarios
+    precalculados a partir de los LabelEncoders (con fallback '__unknown__') y
+    las features ausentes quedan en 0.
+    """
+    
+    def __init__(self, feature_names: List[str], label_encoders: Dict[str, LabelEncoder]):
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+        
+        # feature codificada -> (columna cruda, {clase: índice}, índice de '__unknown__')
+        self._categorical: Dict[str, Tuple[str, Dict[str, int], int]] = {}
+        for col, le in label_encoders.items():
+            lookup = {cls: idx for idx, cls in enumerate(le.classes_)}
+            self._categorical[f"{col}_encoded"] = (col, lookup, lookup['__unknown__'])
+        
+        self._slots = [(i, name, self._categorical.get(name))
+                       for i, name in enumerate(self.feature_names)]
+    
+    @classmethod
+    def from_engineer(cls, feature_engineer: 'FlightFeatureEngineer',
+                      feature_names: List[str]) -> 'FeatureVectorBuilder':
+        """
+        Crea el builder a partir de un FlightFeatureEngineer ajustado.
+        """
+        return cls(feature_names, feature_engineer.label_encoders)
+    
+    def _fill_row(self, row: np.ndarray, features: Dict) -> None:
+        for i, name, categorical in self._slots:
+            if categorical is not None:
+                col, lookup, unknown = categorical
+                if col in features:
+                    row[i] = lookup.get(str(features[col]), unknown)
+            elif name in features:
+                value = features[name]
+                row[i] = np.nan if value is None else value
+    
+    def build(self, features: Dict) -> np.ndarray:
+        """
+        Convierte un diccionario de features crudas en una matriz (1, n_features).
+        """
+        X = np.zeros((1, self.n_features), dtype=np.float32)
+        self._fill_row(X[0], features)
+        return X
+    
+    def build_batch(self, records: List[Dict]) -> np.ndarray:
+        """
+        Convierte una lista de diccionarios en una matriz (n, n_features).
+        """
+        X = np.zeros((len(records), self.n_features), dtype=np.float32)
+        for row, features in zip(X, records):
+            self._fill_row(row, features)
+        return X
+
+
 def get_features_for_model() -> List[str]:
     """
     Retorna la lista de features a usar en el modelo.
@@ -248,19 +333,11 @@ def get_excluded_features() -> List[str]:
     ]
 
 
-def prepare_input_from_api(input_data: Dict) -> pd.DataFrame:
+def api_input_to_features(input_data: Dict) -> Dict:
     """
-    Prepara los datos de entrada del API para predicción.
-    Convierte el formato del contrato al formato del modelo.
-    
-    Input esperado:
-    {
-        "aerolinea": "AA",
-        "origen": "JFK",
-        "destino": "LAX",
-        "fecha_partida": "2025-03-15T14:30:00",
-        "distancia_km": 3983
-    }
+    Convierte el formato del contrato del API en un diccionario de features crudas.
+    Latitud/longitud del origen y la distancia (si falta `distancia_km`) se
+    obtienen del índice de aeropuertos.
     """
     from datetime import datetime
     
@@ -268,12 +345,10 @@ def prepare_input_from_api(input_data: Dict) -> pd.DataFrame:
     fecha = datetime.fromisoformat(input_data['fecha_partida'])
 
     # Convertir distancia de km a millas (modelo espera millas)
-    distance_km = input_data['distancia_km']
-    distance_miles = distance_km * 0.621371
+    distance_km = input_data.get('distancia_km')
+    distance_miles = distance_km * 0.621371 if distance_km is not None else None
 
-    
-    # Crear DataFrame con formato del modelo
-    df = pd.DataFrame([{
+    features = {
         'year': fecha.year,
         'month': fecha.month,
         'day_of_month': fecha.day,
@@ -290,8 +365,33 @@ def prepare_input_from_api(input_data: Dict) -> pd.DataFrame:
         'precip_1h': input_data.get('precip_1h', input_data.get('precipitacion', 0.0)),
         'climate_severity_idx': input_data.get('climate_severity_idx', 0.0),
         'dist_met_km': input_data.get('dist_met_km', 10.0),
-        'latitude': input_data.get('latitude', 40.0),
-        'longitude': input_data.get('longitude', -74.0),
-    }])
+        'latitude': input_data.get('latitude'),
+        'longitude': input_data.get('longitude'),
+    }
+    
+    fill_geo_features(features, default_coords=(40.0, -74.0))
+    if features['distance'] is None:
+        raise ValueError(
+            f"distancia_km no informada y no se pudo estimar para "
+            f"{input_data['origen']} → {input_data['destino']}"
+        )
+    
+    return features
+
+
+def prepare_input_from_api(input_data: Dict) -> pd.DataFrame:
+    """
+    Prepara los datos de entrada del API para predicción.
+    Convierte el formato del contrato al formato del modelo.
     
-    return df
+    Input esperado:
+    {
+        "aerolinea": "AA",
+        "origen": "JFK",
+        "destino": "LAX",
+        "fecha_partida": "2025-03-15T14:30:00",
+        "distancia_km": 3983  # opcional si origen y destino están en el índice
+    }
+    """
+    # Crear DataFrame con formato del modelo
+    return pd.DataFrame([api_input_to_features(input_data)])
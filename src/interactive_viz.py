@@ -23,6 +23,11 @@ from sklearn.metrics import (
     roc_curve, auc, precision_recall_curve, average_precision_score
 )
 
+try:
+    from .operating_curve import OperatingCurve
+except ImportError:
+    from operating_curve import OperatingCurve
+
 
 class InteractiveVisualizer:
     """Clase para crear visualizaciones interactivas con Plotly."""
@@ -342,30 +347,14 @@ class InteractiveVisualizer:
         return fig
     
     def plot_threshold_analysis_interactive(self, y_true: np.ndarray, y_proba: np.ndarray,
-                                           model_name: str, save: bool = True):
+                                           model_name: str, save: bool = True,
+                                           curve: Optional[OperatingCurve] = None):
         """
         Genera análisis interactivo del impacto del umbral.
         """
+        curve = curve or OperatingCurve(y_true, y_proba)
         thresholds = np.arange(0.1, 0.95, 0.01)
-        metrics = []
-        
-        for threshold in thresholds:
-            y_pred = (y_proba >= threshold).astype(int)
-            cm = confusion_matrix(y_true, y_pred)
-            tn, fp, fn, tp = cm.ravel()
-            
-            precision = tp / (tp + fp) if (tp + fp) > 0 else 0
-            recall = tp / (tp + fn) if (tp + fn) > 0 else 0
-            f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
-            
-            metrics.append({
-                'threshold': threshold,
-                'precision': precision,
-                'recall': recall,
-                'f1': f1
-            })
-        
-        df = pd.DataFrame(metrics)
+        df = curve.metrics(thresholds)[['threshold', 'precision', 'recall', 'f1']]
         
         # Crear subplot
         fig = make_subplots(
@@ -546,13 +535,14 @@ class InteractiveVisualizer:
         
         y_pred = model.predict(X_test)
         y_proba = model.predict_proba(X_test)[:, 1]
+        curve = OperatingCurve(y_test, y_proba)
         
         # Generar todas las visualizaciones
         self.plot_confusion_matrix_interactive(y_test, y_pred, model_name)
         self.plot_roc_curve_interactive(y_test, y_proba, model_name)
         self.plot_pr_curve_interactive(y_test, y_proba, model_name)
         self.plot_feature_importance_interactive(importance_df, model_name)
-        self.plot_threshold_analysis_interactive(y_test, y_proba, model_name)
+        self.plot_threshold_analysis_interactive(y_test, y_proba, model_name, curve=curve)
         self.plot_models_comparison_interactive(results)
         
         print("\n✅ Dashboard completo generado")
@@ -4,6 +4,13 @@ FlightOnTime - Modelado
 Módulo para entrenamiento y comparación de modelos de clasificación.
 """
 
+import os
+import time
+import shutil
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Tuple, Any, Optional
@@ -18,15 +25,133 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import (
     accuracy_score, precision_score, recall_score, f1_score,
     roc_auc_score, average_precision_score, confusion_matrix,
-    precision_recall_curve, roc_curve, classification_report
+    roc_curve, classification_report
 )
 import xgboost as xgb
 from xgboost import XGBClassifier
+import lightgbm as lgb
 from lightgbm import LGBMClassifier
+from threadpoolctl import threadpool_limits
+
+try:
+    from .config import EARLY_STOPPING_ROUNDS
+    from .operating_curve import OperatingCurve
+except ImportError:
+    from config import EARLY_STOPPING_ROUNDS
+    from operating_curve import OperatingCurve
 
 import warnings
 warnings.filterwarnings('ignore')
 
+# Modelos que se entrenan en float64 aunque X venga en float32
+FLOAT64_FIT_MODELS = {'LogisticRegression'}
+
+# Candidatos boosting que se detienen con el set de validación
+EARLY_STOPPING_MODELS = {'XGBoost', 'LightGBM'}
+
+# Modelos de un solo hilo en el modo paralelo (lbfgs no escala con n_jobs)
+SINGLE_THREAD_MODELS = {'LogisticRegression'}
+
+
+def thread_budget(model_names: List[str], n_cores: Optional[int] = None) -> Dict[str, int]:
+    """
+    Reparte los núcleos entre modelos que se entrenan a la vez: los de
+    SINGLE_THREAD_MODELS usan 1 hilo y el resto de núcleos se divide en
+    partes iguales entre los demás (mínimo 1 hilo cada uno).
+    """
+    n_cores = n_cores or os.cpu_count() or 1
+    single = [n for n in model_names if n in SINGLE_THREAD_MODELS]
+    multi = [n for n in model_names if n not in SINGLE_THREAD_MODELS]
+    budget = {n: 1 for n in single}
+    if multi:
+        free = max(n_cores - len(single), len(multi))
+        share, extra = divmod(free, len(multi))
+        for i, name in enumerate(multi):
+            budget[name] = max(1, share + (1 if i < extra else 0))
+    return budget
+
+
+def fit_candidate(name: str, model: Any, X_train: pd.DataFrame, y_train: np.ndarray,
+                  X_eval: Optional[pd.DataFrame] = None, y_eval: Optional[np.ndarray] = None,
+                  early_stopping_rounds: int = EARLY_STOPPING_ROUNDS) -> Optional[Dict[str, int]]:
+    """
+    Entrena un candidato. Los de EARLY_STOPPING_MODELS se detienen cuando
+    la logloss en (X_eval, y_eval) no mejora en `early_stopping_rounds`
+    rondas y se truncan a la mejor iteración: el modelo guardado solo
+    contiene esos árboles y n_estimators queda igual a su número.
+
+    Retorna {'best_iteration', 'n_estimators', 'max_estimators'} si hubo
+    early stopping, o None.
+    """
+    # lbfgs resuelve en el dtype de X: float64 para que un frame compactado
+    # a float32 no cambie el resultado
+    X_fit = X_train.astype(np.float64) if name in FLOAT64_FIT_MODELS else X_train
+    
+    if name not in EARLY_STOPPING_MODELS or X_eval is None or not early_stopping_rounds:
+        model.fit(X_fit, y_train)
+        return None
+    
+    max_estimators = int(model.get_params()['n_estimators'])
+    if name == 'XGBoost':
+        model.set_params(early_stopping_rounds=early_stopping_rounds)
+        model.fit(X_fit, y_train, eval_set=[(X_eval, y_eval)], verbose=False)
+        n_trees = int(model.best_iteration) + 1
+        # El booster conserva las rondas posteriores a la mejor: recortarlo
+        model.load_model(model.get_booster()[:n_trees].save_raw(raw_format='ubj'))
+        model.set_params(early_stopping_rounds=None)
+    else:
+        # LightGBM ya guarda el booster hasta la mejor iteración
+        model.fit(X_fit, y_train, eval_set=[(X_eval, y_eval)],
+                  callbacks=[lgb.early_stopping(early_stopping_rounds, verbose=False)])
+        n_trees = int(model.best_iteration_) or max_estimators
+    model.set_params(n_estimators=n_trees)
+    
+    return {'best_iteration': n_trees - 1, 'n_estimators': n_trees,
+            'max_estimators': max_estimators}
+
+
+def share_arrays(data_dir: str, **arrays: np.ndarray) -> None:
+    """
+    Escribe arrays como .npy en `data_dir` para que los procesos del pool
+    los abran con `load_shared` (memmap) en lugar de recibirlos serializados.
+    """
+    for key, array in arrays.items():
+        np.save(os.path.join(data_dir, f'{key}.npy'), np.ascontiguousarray(array))
+
+
+def load_shared(data_dir: str, key: str) -> np.ndarray:
+    """
+    Abre en modo lectura (memmap) un array escrito por `share_arrays`.
+    """
+    return np.load(os.path.join(data_dir, f'{key}.npy'), mmap_mode='r')
+
+
+def _fit_candidate(name: str, model: Any, data_dir: str,
+                   feature_names: List[str], n_threads: int) -> Tuple:
+    """
+    Entrena un modelo en un proceso del pool. Las matrices se abren con
+    memmap desde `data_dir` (no se serializan al proceso) y el modelo se
+    limita a `n_threads` hilos, incluidos los de BLAS/OpenMP.
+
+    Retorna (name, modelo entrenado, y_pred, y_proba, segundos,
+    info de early stopping).
+    """
+    X_train = pd.DataFrame(load_shared(data_dir, 'X_train'), columns=feature_names, copy=False)
+    X_test = pd.DataFrame(load_shared(data_dir, 'X_test'), columns=feature_names, copy=False)
+    y_train = load_shared(data_dir, 'y_train')
+    y_test = load_shared(data_dir, 'y_test')
+
+    if 'n_jobs' in model.get_params():
+        model.set_params(n_jobs=n_threads)
+
+    start = time.time()
+    with threadpool_limits(limits=n_threads):
+        stopping = fit_candidate(name, model, X_train, y_train, X_test, y_test)
+        y_pred = model.predict(X_test)
+        y_proba = model.predict_proba(X_test)[:, 1]
+
+    return name, model, y_pred, y_proba, time.time() - start, stopping
+
 
 class FlightDelayModel:
     """
@@ -42,6 +167,8 @@ class FlightDelayModel:
         self.feature_names: List[str] = []
         self.metrics_history: Dict[str, Dict] = {}
         self.class_balance_ratio: float = 1.0
+        self.tuned_params: Dict[str, Dict] = {}
+        self.early_stopping: Dict[str, Dict] = {}
         
     def get_model_instances(self, class_weight_ratio: float = 1.0) -> Dict[str, Any]:
         """
@@ -81,6 +208,11 @@ class FlightDelayModel:
                 verbose=-1
             )
         }
+        
+        # Hiperparámetros encontrados por tune_hyperparameters
+        for name, params in self.tuned_params.items():
+            if name in models:
+                models[name].set_params(**params)
         return models
     
     def calculate_class_balance(self, y: np.ndarray) -> float:
@@ -93,7 +225,9 @@ class FlightDelayModel:
     
     def train_and_compare(self, X: pd.DataFrame, y: np.ndarray,
                           test_size: float = 0.2,
-                          X_val: pd.DataFrame = None, y_val: np.ndarray = None) -> Dict[str, Dict]:
+                          X_val: pd.DataFrame = None, y_val: np.ndarray = None,
+                          parallel: bool = False,
+                          n_cores: Optional[int] = None) -> Dict[str, Dict]:
         """
         Entrena y compara todos los modelos.
         
@@ -103,7 +237,13 @@ class FlightDelayModel:
             test_size: Tamaño del split de validación (ignorado si se pasa X_val/y_val)
             X_val: Features de validación externa (opcional)
             y_val: Target de validación externa (opcional)
-        
+            parallel: Entrenar los modelos a la vez en un pool de procesos
+                (ver `_train_parallel`)
+            n_cores: Núcleos a repartir en modo paralelo (None = todos)
+
+        XGBoost y LightGBM usan el set de validación (o el de prueba del
+        split interno) para early stopping; ver `fit_candidate`.
+
         Retorna métricas de cada modelo.
         """
         self.feature_names = X.columns.tolist()
@@ -129,15 +269,22 @@ class FlightDelayModel:
         # Obtener modelos
         models = self.get_model_instances(self.class_balance_ratio)
         
+        if parallel:
+            results = self._train_parallel(models, X_train, y_train, X_test, y_test, n_cores)
+            self.metrics_history = results
+            self._select_best_model(results)
+            return results
+        
         results = {}
         
         for name, model in models.items():
             print(f"\n🔄 Entrenando {name}...")
             
             try:
-                # Entrenar
-                model.fit(X_train, y_train)
+                # Entrenar (con early stopping para los boosting)
+                stopping = fit_candidate(name, model, X_train, y_train, X_test, y_test)
                 self.models[name] = model
+                self._record_early_stopping(name, stopping)
                 
                 # Predecir
                 y_pred = model.predict(X_test)
@@ -163,6 +310,108 @@ class FlightDelayModel:
         
         return results
     
+    def tune_hyperparameters(self, X: pd.DataFrame, y: np.ndarray,
+                             X_val: pd.DataFrame, y_val: np.ndarray,
+                             output_path: Optional[str] = None,
+                             n_cores: Optional[int] = None,
+                             **search_kwargs) -> pd.DataFrame:
+        """
+        Busca hiperparámetros de XGBoost y LightGBM con successive halving
+        (ver `tuning.SuccessiveHalvingSearch`). Los mejores quedan en
+        `tuned_params` y los usa el siguiente `train_and_compare`.
+        
+        Args:
+            X, y: Datos de entrenamiento
+            X_val, y_val: Datos de validación para ordenar las pruebas
+            output_path: JSON donde guardar el leaderboard (opcional)
+            n_cores: Núcleos a repartir entre pruebas (None = todos)
+            **search_kwargs: n_configs, eta, min_rows, max_rounds, metric...
+        
+        Retorna el leaderboard de la búsqueda.
+        """
+        try:
+            from .tuning import SuccessiveHalvingSearch
+        except ImportError:
+            from tuning import SuccessiveHalvingSearch
+        
+        self.class_balance_ratio = self.calculate_class_balance(y)
+        search = SuccessiveHalvingSearch(
+            self.get_model_instances(self.class_balance_ratio),
+            random_state=self.random_state, n_cores=n_cores, **search_kwargs
+        )
+        leaderboard = search.run(X, y, X_val, y_val)
+        self.tuned_params.update(search.best_params_)
+        
+        if output_path is not None:
+            search.save(output_path)
+        return leaderboard
+    
+    def _train_parallel(self, models: Dict[str, Any],
+                        X_train: pd.DataFrame, y_train: np.ndarray,
+                        X_test: pd.DataFrame, y_test: np.ndarray,
+                        n_cores: Optional[int] = None) -> Dict[str, Dict]:
+        """
+        Entrena los modelos a la vez, uno por proceso, con un presupuesto de
+        hilos por modelo (`thread_budget`) para no sobresuscribir los núcleos.
+
+        Las matrices se escriben una vez como .npy en un directorio temporal
+        y cada proceso las abre con memmap, así el sistema operativo comparte
+        las páginas en lugar de copiar los datos a cada worker. Las métricas
+        se calculan a medida que llega cada modelo.
+        """
+        budget = thread_budget(list(models), n_cores)
+        print(f"\n⚡ Entrenamiento paralelo: {len(models)} procesos, hilos por modelo: {budget}")
+        
+        data_dir = tempfile.mkdtemp(prefix='flightontime_models_')
+        results = {}
+        try:
+            share_arrays(data_dir, X_train=X_train.to_numpy(), X_test=X_test.to_numpy(),
+                         y_train=np.asarray(y_train), y_test=np.asarray(y_test))
+            feature_names = X_train.columns.tolist()
+            
+            # spawn: XGBoost/LightGBM usan OpenMP, que no es seguro tras fork
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=len(models), mp_context=context) as pool:
+                futures = {
+                    pool.submit(_fit_candidate, name, model, data_dir,
+                                feature_names, budget[name]): name
+                    for name, model in models.items()
+                }
+                for future in as_completed(futures):
+                    name = futures[future]
+                    try:
+                        _, model, y_pred, y_proba, elapsed, stopping = future.result()
+                    except Exception as e:
+                        print(f"\n🔄 {name}")
+                        print(f"   ❌ Error: {str(e)}")
+                        results[name] = {'error': str(e)}
+                        continue
+                    
+                    self.models[name] = model
+                    metrics = self._calculate_metrics(y_test, y_pred, y_proba)
+                    results[name] = metrics
+                    
+                    print(f"\n✅ {name} listo en {elapsed:.1f}s")
+                    self._record_early_stopping(name, stopping)
+                    print(f"   ✅ Accuracy: {metrics['accuracy']:.4f}")
+                    print(f"   ✅ F1-Score: {metrics['f1']:.4f}")
+                    print(f"   ✅ Recall: {metrics['recall']:.4f}")
+                    print(f"   ✅ Precision: {metrics['precision']:.4f}")
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+        
+        # Mismo orden que el modo secuencial (desempates del mejor modelo)
+        return {name: results[name] for name in models if name in results}
+    
+    def _record_early_stopping(self, name: str, stopping: Optional[Dict[str, int]]) -> None:
+        """
+        Registra y muestra la iteración elegida por early stopping.
+        """
+        if stopping is None:
+            return
+        self.early_stopping[name] = stopping
+        print(f"   ⏹️ Early stopping: {stopping['n_estimators']}/{stopping['max_estimators']} árboles")
+    
     def _calculate_metrics(self, y_true: np.ndarray, y_pred: np.ndarray, 
                           y_proba: np.ndarray) -> Dict[str, float]:
         """
@@ -218,27 +467,17 @@ class FlightDelayModel:
         
         y_proba = self.best_model.predict_proba(X)[:, 1]
         
-        # Calcular precision-recall para diferentes umbrales
-        precision_vals, recall_vals, thresholds = precision_recall_curve(y, y_proba)
-        
-        # Encontrar umbral óptimo que cumpla restricciones
-        best_threshold = 0.5
-        best_f1 = 0
-        
-        for i, threshold in enumerate(thresholds):
-            if precision_vals[i] >= min_precision and recall_vals[i] >= min_recall:
-                f1 = 2 * (precision_vals[i] * recall_vals[i]) / (precision_vals[i] + recall_vals[i] + 1e-10)
-                if f1 > best_f1:
-                    best_f1 = f1
-                    best_threshold = threshold
+        # Todos los puntos de corte sobre una única ordenación de las probabilidades
+        curve = OperatingCurve(y, y_proba)
+        best_threshold = curve.best_threshold(min_recall=min_recall, min_precision=min_precision)
         
         self.best_threshold = best_threshold
         print(f"\n🎯 Umbral optimizado: {best_threshold:.4f}")
         
-        # Recalcular métricas con nuevo umbral
-        y_pred_opt = (y_proba >= best_threshold).astype(int)
-        print(f"   Precision con umbral optimizado: {precision_score(y, y_pred_opt):.4f}")
-        print(f"   Recall con umbral optimizado: {recall_score(y, y_pred_opt):.4f}")
+        # Métricas con el nuevo umbral
+        metrics = curve.at(best_threshold)
+        print(f"   Precision con umbral optimizado: {metrics['precision']:.4f}")
+        print(f"   Recall con umbral optimizado: {metrics['recall']:.4f}")
         
         return best_threshold
     
@@ -308,6 +547,11 @@ class FlightDelayModel:
             'trained_at': datetime.now().isoformat(),
             'random_state': self.random_state
         }
+        if self.tuned_params:
+            metadata['tuned_params'] = self.tuned_params
+        if self.best_model_name in self.early_stopping:
+            metadata['best_iteration'] = self.early_stopping[self.best_model_name]['best_iteration']
+            metadata['early_stopping'] = self.early_stopping[self.best_model_name]
         
         with open(metadata_path, 'w') as f:
             json.dump(metadata, f, indent=2, default=str)
@@ -332,6 +576,7 @@ class FlightDelayModel:
         instance.best_threshold = metadata['threshold']
         instance.feature_names = metadata['feature_names']
         instance.class_balance_ratio = metadata.get('class_balance_ratio', 1.0)
+        instance.tuned_params = metadata.get('tuned_params', {})
         
         return instance
 
@@ -357,6 +602,10 @@ class OutOfCoreXGBModel:
         self._booster = xgb.Booster()
         self._booster.load_model(state['booster_bytes'])
 
+    def get_booster(self) -> Any:
+        """Booster subyacente (misma interfaz que XGBClassifier)."""
+        return self._booster
+
     def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
         if isinstance(X, pd.DataFrame):
             X_data = X[self.feature_names]
@@ -0,0 +1,381 @@
+"""
+FlightOnTime - Curva de Operación
+=================================
+Matriz de confusión y métricas de la regla `y_proba >= umbral` para
+cualquier grilla de umbrales, compartida por la evaluación, las
+visualizaciones y la optimización del umbral.
+
+- `OperatingCurve`: exacta. Las probabilidades se ordenan una sola vez
+  (O(n log n)) junto con la suma acumulada de positivos; después cada umbral
+  se resuelve con una búsqueda binaria, así que una grilla de k umbrales
+  cuesta O(k log n) adicional en lugar de recorrer el test k veces.
+- `ScoreHistogram`: streaming. Acumula lotes de (label, score) en
+  histogramas de resolución fija por clase, con memoria O(n_bins) sin
+  importar el tamaño del test; los histogramas de distintos procesos se
+  combinan con `merge`. Los umbrales se redondean a los bordes de bin.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# Resolución por defecto de ScoreHistogram (bins de ancho 1e-4 en [0, 1])
+HISTOGRAM_BINS = 10_000
+
+
+def _safe_ratio(numerator, denominator):
+    """numerator / denominator con 0 donde el denominador es 0 (zero_division=0)."""
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    out = np.zeros_like(numerator)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
+
+
+def histogram_roc_auc(pos: np.ndarray, neg: np.ndarray) -> np.ndarray:
+    """
+    ROC-AUC a partir de histogramas de scores por clase. Acepta lotes de
+    histogramas con forma (..., n_bins); NaN si falta alguna clase.
+    """
+    pos = np.asarray(pos, dtype=np.float64)
+    neg = np.asarray(neg, dtype=np.float64)
+    # Positivos en bins estrictamente superiores a cada bin
+    pos_above = np.cumsum(pos[..., ::-1], axis=-1)[..., ::-1] - pos
+    wins = np.sum(neg * (pos_above + 0.5 * pos), axis=-1)
+    pairs = pos.sum(axis=-1) * neg.sum(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(pairs > 0, wins / pairs, np.nan)
+
+
+def histogram_pr_auc(pos: np.ndarray, neg: np.ndarray) -> np.ndarray:
+    """
+    Average precision a partir de histogramas de scores por clase, con un
+    punto de corte por bin (los bins vacíos no suman). Acepta lotes de
+    histogramas con forma (..., n_bins); NaN si no hay positivos.
+    """
+    pos = np.asarray(pos, dtype=np.float64)
+    neg = np.asarray(neg, dtype=np.float64)
+    # Umbrales de mayor a menor: conteos acumulados desde el bin superior
+    tp = np.cumsum(pos[..., ::-1], axis=-1)
+    fp = np.cumsum(neg[..., ::-1], axis=-1)
+    n_pos = tp[..., -1:]
+    precision = _safe_ratio(tp, tp + fp)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        recall = tp / n_pos
+        ap = np.sum(np.diff(recall, axis=-1, prepend=0.0) * precision, axis=-1)
+    return np.where(n_pos[..., 0] > 0, ap, np.nan)
+
+
+def histogram_metrics(pos: np.ndarray, neg: np.ndarray, cut: int) -> Dict[str, np.ndarray]:
+    """
+    Métricas de test a partir de histogramas por clase con forma
+    (..., n_bins) y el umbral en el borde inferior del bin `cut`: accuracy,
+    precision, recall y F1 de la regla, más ROC-AUC y PR-AUC.
+    """
+    pos = np.asarray(pos)
+    neg = np.asarray(neg)
+    tp = pos[..., cut:].sum(axis=-1)
+    fp = neg[..., cut:].sum(axis=-1)
+    n_pos = pos.sum(axis=-1)
+    n_neg = neg.sum(axis=-1)
+    fn = n_pos - tp
+    tn = n_neg - fp
+    return {
+        'accuracy': _safe_ratio(tp + tn, n_pos + n_neg),
+        'precision': _safe_ratio(tp, tp + fp),
+        'recall': _safe_ratio(tp, n_pos),
+        'f1': _safe_ratio(2 * tp, 2 * tp + fp + fn),
+        'roc_auc': histogram_roc_auc(pos, neg),
+        'pr_auc': histogram_pr_auc(pos, neg),
+    }
+
+
+def bootstrap_histogram(pos: np.ndarray, neg: np.ndarray, cut: int, n_resamples: int,
+                        seed, metrics: List[str]) -> np.ndarray:
+    """
+    Réplicas bootstrap de `histogram_metrics`. Remuestrear las n filas con
+    reposición equivale a un sorteo multinomial de n sobre las celdas
+    (clase, bin) con probabilidad proporcional a su conteo, así que cada
+    réplica cuesta O(n_bins) y no O(n).
+
+    Returns:
+        Array (n_resamples, len(metrics))
+    """
+    counts = np.concatenate([pos, neg]).astype(np.int64)
+    n_rows = int(counts.sum())
+    rng = np.random.default_rng(seed)
+    draws = rng.multinomial(n_rows, counts / n_rows, size=n_resamples)
+    values = histogram_metrics(draws[:, :len(pos)], draws[:, len(pos):], cut)
+    return np.column_stack([values[m] for m in metrics])
+
+
+class _ThresholdCurve(ABC):
+    """
+    Métricas por umbral a partir de `counts()`; las subclases definen cómo
+    se obtienen los conteos y cuáles son los puntos de corte.
+    """
+
+    @abstractmethod
+    def counts(self, thresholds) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """(tp, fp, tn, fn) como arrays int64 del largo de `thresholds`."""
+
+    @abstractmethod
+    def distinct_thresholds(self) -> np.ndarray:
+        """Puntos de corte en los que cambia la matriz de confusión, ascendentes."""
+
+    def metrics(self, thresholds) -> pd.DataFrame:
+        """
+        Métricas por umbral: precision, recall, F1, especificidad, tasas de
+        error y los cuatro conteos de la matriz de confusión.
+        """
+        thresholds = np.asarray(thresholds, dtype=np.float64)
+        tp, fp, tn, fn = self.counts(thresholds)
+
+        return pd.DataFrame({
+            'threshold': thresholds,
+            'precision': _safe_ratio(tp, tp + fp),
+            'recall': _safe_ratio(tp, tp + fn),
+            'f1': _safe_ratio(2 * tp, 2 * tp + fp + fn),
+            'specificity': _safe_ratio(tn, tn + fp),
+            'false_positive_rate': _safe_ratio(fp, fp + tn),
+            'false_negative_rate': _safe_ratio(fn, fn + tp),
+            'true_positives': tp,
+            'false_positives': fp,
+            'true_negatives': tn,
+            'false_negatives': fn
+        })
+
+    def curve(self) -> pd.DataFrame:
+        """
+        `metrics` en todos los puntos de corte (curvas ROC y PR completas).
+        """
+        return self.metrics(self.distinct_thresholds())
+
+    def at(self, threshold: float) -> Dict[str, float]:
+        """
+        Métricas de un único umbral como diccionario.
+        """
+        row = self.metrics([threshold]).iloc[0].to_dict()
+        return {k: (int(v) if k.endswith(('positives', 'negatives')) else float(v))
+                for k, v in row.items()}
+
+    def best_threshold(self, min_recall: float = 0.0, min_precision: float = 0.0,
+                       default: float = 0.5) -> float:
+        """
+        Umbral de máximo F1 entre los que cumplen precision >= `min_precision`
+        y recall >= `min_recall`, evaluando todos los puntos de corte.
+
+        Ante empates gana el umbral más bajo; si ningún umbral cumple las
+        restricciones (o todos tienen F1 nulo) retorna `default`.
+        """
+        thresholds = self.distinct_thresholds()
+        if len(thresholds) == 0:
+            return float(default)
+
+        tp, fp, _, fn = self.counts(thresholds)
+        precision = _safe_ratio(tp, tp + fp)
+        recall = _safe_ratio(tp, tp + fn)
+        f1 = 2 * (precision * recall) / (precision + recall + 1e-10)
+
+        valid = (precision >= min_precision) & (recall >= min_recall)
+        f1 = np.where(valid, f1, 0.0)
+        best = int(np.argmax(f1))
+        if f1[best] <= 0:
+            return float(default)
+        return float(thresholds[best])
+
+
+class OperatingCurve(_ThresholdCurve):
+    """
+    Conteos TP/FP/TN/FN y métricas derivadas para umbrales arbitrarios.
+
+    Uso:
+        curve = OperatingCurve(y_test, y_proba)
+        df = curve.metrics(np.arange(0.1, 0.95, 0.01))
+        threshold = curve.best_threshold(min_recall=0.4, min_precision=0.35)
+    """
+
+    def __init__(self, y_true: np.ndarray, y_proba: np.ndarray):
+        y_true = np.asarray(y_true).astype(bool)
+        order = np.argsort(y_proba, kind='stable')
+        self.sorted_proba = np.asarray(y_proba, dtype=np.float64)[order]
+        # positives_below[i] = positivos entre las i probabilidades más bajas
+        self.positives_below = np.concatenate([[0], np.cumsum(y_true[order], dtype=np.int64)])
+
+        self.n_total = len(self.sorted_proba)
+        self.n_pos = int(self.positives_below[-1])
+        self.n_neg = self.n_total - self.n_pos
+
+    def counts(self, thresholds) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        TP/FP/TN/FN para cada umbral.
+
+        Returns:
+            (tp, fp, tn, fn) como arrays int64 del largo de `thresholds`
+        """
+        thresholds = np.asarray(thresholds, dtype=np.float64)
+        # Primera posición con probabilidad >= umbral: de ahí en adelante se predice 1
+        cut = np.searchsorted(self.sorted_proba, thresholds, side='left')
+        tp = self.n_pos - self.positives_below[cut]
+        fp = (self.n_total - cut) - tp
+        fn = self.n_pos - tp
+        tn = self.n_neg - fp
+        return tp, fp, tn, fn
+
+    def distinct_thresholds(self) -> np.ndarray:
+        """
+        Probabilidades distintas en orden ascendente: los puntos de corte en
+        los que cambia la matriz de confusión (los umbrales de
+        `precision_recall_curve`).
+        """
+        if self.n_total == 0:
+            return self.sorted_proba
+        keep = np.concatenate([[True], np.diff(self.sorted_proba) != 0])
+        return self.sorted_proba[keep]
+
+
+class ScoreHistogram(_ThresholdCurve):
+    """
+    Histogramas de scores por clase en `n_bins` bins de igual ancho sobre
+    [0, 1], acumulables por lotes y combinables entre procesos.
+
+    El bin i contiene los scores con edges[i] <= score < edges[i + 1], así que
+    para un umbral que cae en un borde los conteos son exactos; un umbral
+    intermedio se redondea al borde siguiente. ROC-AUC y PR-AUC tratan los
+    scores de un mismo bin como empatados (error acotado por la resolución).
+
+    Uso:
+        histogram = ScoreHistogram()
+        for y_batch, proba_batch in batches:
+            histogram.update(y_batch, proba_batch)
+        histogram.merge(histogram_de_otro_proceso)
+        histogram.roc_auc(), histogram.pr_auc(), histogram.best_threshold(0.4, 0.35)
+    """
+
+    def __init__(self, n_bins: int = HISTOGRAM_BINS):
+        self.n_bins = int(n_bins)
+        # k / n_bins con redondeo correcto, igual al umbral que se reporta
+        self.edges = np.arange(self.n_bins + 1, dtype=np.float64) / self.n_bins
+        self.pos = np.zeros(self.n_bins, dtype=np.int64)
+        self.neg = np.zeros(self.n_bins, dtype=np.int64)
+
+    @classmethod
+    def from_scores(cls, y_true: np.ndarray, y_proba: np.ndarray,
+                    n_bins: int = HISTOGRAM_BINS,
+                    batch_size: int = 1_000_000) -> 'ScoreHistogram':
+        """
+        Construye el histograma recorriendo arrays ya cargados por lotes, para
+        no crear temporales del tamaño del test.
+        """
+        histogram = cls(n_bins)
+        for start in range(0, len(y_proba), batch_size):
+            histogram.update(y_true[start:start + batch_size], y_proba[start:start + batch_size])
+        return histogram
+
+    @property
+    def n_pos(self) -> int:
+        return int(self.pos.sum())
+
+    @property
+    def n_neg(self) -> int:
+        return int(self.neg.sum())
+
+    @property
+    def n_total(self) -> int:
+        return self.n_pos + self.n_neg
+
+    def bin_index(self, y_proba: np.ndarray) -> np.ndarray:
+        """
+        Bin de cada score (los scores fuera de [0, 1] van al bin extremo).
+        """
+        scores = np.asarray(y_proba, dtype=np.float64)
+        index = np.clip((scores * self.n_bins).astype(np.int64), 0, self.n_bins - 1)
+        # El producto puede caer en el bin vecino por redondeo: se corrige
+        # contra los bordes para que bin >= k equivalga a score >= edges[k]
+        index -= (scores < self.edges[index]) & (index > 0)
+        index += (scores >= self.edges[index + 1]) & (index < self.n_bins - 1)
+        return index
+
+    def update(self, y_true: np.ndarray, y_proba: np.ndarray) -> 'ScoreHistogram':
+        """
+        Agrega un lote de (label, score) a los histogramas.
+        """
+        y_true = np.asarray(y_true).astype(bool)
+        index = self.bin_index(y_proba)
+        self.pos += np.bincount(index[y_true], minlength=self.n_bins)
+        self.neg += np.bincount(index[~y_true], minlength=self.n_bins)
+        return self
+
+    def merge(self, other: 'ScoreHistogram') -> 'ScoreHistogram':
+        """
+        Suma en este histograma los conteos de otro con la misma resolución.
+        """
+        if other.n_bins != self.n_bins:
+            raise ValueError(f"Resoluciones distintas: {self.n_bins} vs {other.n_bins} bins")
+        self.pos += other.pos
+        self.neg += other.neg
+        return self
+
+    def counts(self, thresholds) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        TP/FP/TN/FN para cada umbral (redondeado al borde de bin siguiente).
+
+        Returns:
+            (tp, fp, tn, fn) como arrays int64 del largo de `thresholds`
+        """
+        thresholds = np.asarray(thresholds, dtype=np.float64)
+        # pos_from[k] = positivos con score >= edges[k]
+        pos_from = np.concatenate([np.cumsum(self.pos[::-1])[::-1], [0]])
+        neg_from = np.concatenate([np.cumsum(self.neg[::-1])[::-1], [0]])
+
+        cut = np.searchsorted(self.edges, thresholds, side='left')
+        tp = pos_from[cut]
+        fp = neg_from[cut]
+        fn = pos_from[0] - tp
+        tn = neg_from[0] - fp
+        return tp, fp, tn, fn
+
+    def distinct_thresholds(self) -> np.ndarray:
+        """
+        Borde inferior de cada bin no vacío, en orden ascendente.
+        """
+        return self.edges[:-1][(self.pos + self.neg) > 0]
+
+    def roc_auc(self) -> float:
+        """
+        Área bajo la curva ROC (los scores de un mismo bin cuentan como empate).
+        """
+        return float(histogram_roc_auc(self.pos, self.neg))
+
+    def pr_auc(self) -> float:
+        """
+        Average precision (como `average_precision_score`) con un punto de
+        corte por bin no vacío.
+        """
+        return float(histogram_pr_auc(self.pos, self.neg))
+
+    def to_dict(self) -> Dict[str, list]:
+        """
+        Conteos serializables (solo los bins no vacíos).
+        """
+        nonzero = np.flatnonzero(self.pos + self.neg)
+        return {
+            'n_bins': self.n_bins,
+            'bins': nonzero.tolist(),
+            'pos': self.pos[nonzero].tolist(),
+            'neg': self.neg[nonzero].tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, list]) -> 'ScoreHistogram':
+        """
+        Reconstruye un histograma guardado con `to_dict`.
+        """
+        histogram = cls(data['n_bins'])
+        bins = np.asarray(data['bins'], dtype=np.int64)
+        histogram.pos[bins] = data['pos']
+        histogram.neg[bins] = data['neg']
+        return histogram
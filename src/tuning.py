@@ -0,0 +1,292 @@
+"""
+FlightOnTime - Búsqueda de Hiperparámetros
+==========================================
+Successive halving sobre submuestras de filas y rondas de boosting para los
+candidatos XGBoost y LightGBM de `FlightDelayModel`.
+
+- Ronda 0: `n_configs` configuraciones aleatorias por modelo, entrenadas con
+  pocas filas y pocos árboles.
+- Cada ronda multiplica filas y árboles por `eta` y conserva solo el mejor
+  1/`eta` de cada modelo según la métrica de validación.
+- La última ronda usa el train completo y `max_rounds` árboles.
+
+Las pruebas de una ronda se ejecutan en paralelo en un pool de procesos;
+los datos se comparten por memmap (`share_arrays`) y cada prueba recibe su
+parte de los núcleos. Las submuestras son prefijos de una permutación fija,
+así que las filas de una ronda incluyen las de la anterior.
+"""
+
+import os
+import json
+import math
+import time
+import shutil
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import roc_auc_score, average_precision_score
+from threadpoolctl import threadpool_limits
+
+try:
+    from .config import HYPERPARAMETER_SPACES, HYPERPARAMETER_SEARCH, RANDOM_STATE
+    from .modeling import share_arrays, load_shared
+except ImportError:
+    from config import HYPERPARAMETER_SPACES, HYPERPARAMETER_SEARCH, RANDOM_STATE
+    from modeling import share_arrays, load_shared
+
+
+# Métricas de validación disponibles para ordenar las pruebas
+SEARCH_METRICS = {
+    'roc_auc': roc_auc_score,
+    'pr_auc': average_precision_score,
+}
+
+
+def sample_config(space: Dict[str, Any], rng: np.random.Generator) -> Dict[str, Any]:
+    """
+    Muestrea una configuración del espacio: listas por elección uniforme y
+    tuplas (mínimo, máximo, 'linear'|'log') por muestreo continuo.
+    """
+    config = {}
+    for name, spec in space.items():
+        if isinstance(spec, tuple):
+            low, high, scale = spec
+            if scale == 'log':
+                value = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+            else:
+                value = float(rng.uniform(low, high))
+            config[name] = round(value, 6)
+        else:
+            value = spec[rng.integers(len(spec))]
+            config[name] = value.item() if isinstance(value, np.generic) else value
+    return config
+
+
+def halving_schedule(n_configs: int, n_rows: int, eta: int, min_rows: int,
+                     max_rounds: int, min_rounds: int) -> List[Dict[str, int]]:
+    """
+    Rondas del halving: configuraciones, filas y árboles de cada una.
+
+    El número de rondas lo limita tanto el presupuesto de filas (la primera
+    ronda no baja de `min_rows`) como el de configuraciones (la última
+    conserva al menos una).
+    """
+    by_rows = int(math.floor(math.log(max(n_rows / max(min_rows, 1), 1), eta))) + 1
+    by_configs = int(math.floor(math.log(max(n_configs, 1), eta))) + 1
+    n_rungs = max(1, min(by_rows, by_configs))
+
+    schedule = []
+    for rung in range(n_rungs):
+        shrink = eta ** (n_rungs - 1 - rung)
+        schedule.append({
+            'rung': rung,
+            'configs': max(1, n_configs // eta ** rung),
+            'rows': n_rows if shrink == 1 else max(1, n_rows // shrink),
+            'rounds': max(min_rounds, max_rounds // shrink),
+        })
+    return schedule
+
+
+def _run_trial(model_name: str, base_model: Any, params: Dict[str, Any],
+               data_dir: str, feature_names: List[str], n_rows: int,
+               n_rounds: int, n_threads: int, metric: str) -> Dict[str, Any]:
+    """
+    Entrena una configuración sobre las primeras `n_rows` filas de la
+    permutación compartida y la evalúa en el set de validación completo.
+    """
+    X_train = load_shared(data_dir, 'X_train')
+    y_train = load_shared(data_dir, 'y_train')
+    if n_rows < len(y_train):
+        rows = np.sort(load_shared(data_dir, 'order')[:n_rows])
+        X_train, y_train = X_train[rows], y_train[rows]
+    X_train = pd.DataFrame(X_train, columns=feature_names, copy=False)
+    X_val = pd.DataFrame(load_shared(data_dir, 'X_val'), columns=feature_names, copy=False)
+    y_val = load_shared(data_dir, 'y_val')
+
+    model = clone(base_model).set_params(**params, n_estimators=n_rounds, n_jobs=n_threads)
+
+    start = time.time()
+    with threadpool_limits(limits=n_threads):
+        model.fit(X_train, y_train)
+        y_proba = model.predict_proba(X_val)[:, 1]
+    score = float(SEARCH_METRICS[metric](y_val, y_proba))
+
+    return {'score': score, 'fit_seconds': time.time() - start}
+
+
+class SuccessiveHalvingSearch:
+    """
+    Successive halving por modelo con las pruebas de cada ronda en paralelo.
+
+    Uso:
+        search = SuccessiveHalvingSearch(base_models)
+        leaderboard = search.run(X_train, y_train, X_val, y_val)
+        search.best_params_   # {'XGBoost': {...}, 'LightGBM': {...}}
+    """
+
+    def __init__(self, base_models: Dict[str, Any],
+                 spaces: Optional[Dict[str, Dict]] = None,
+                 n_configs: int = HYPERPARAMETER_SEARCH['n_configs'],
+                 eta: int = HYPERPARAMETER_SEARCH['eta'],
+                 min_rows: int = HYPERPARAMETER_SEARCH['min_rows'],
+                 max_rounds: int = HYPERPARAMETER_SEARCH['max_rounds'],
+                 min_rounds: int = HYPERPARAMETER_SEARCH['min_rounds'],
+                 metric: str = HYPERPARAMETER_SEARCH['metric'],
+                 random_state: int = RANDOM_STATE,
+                 n_cores: Optional[int] = None):
+        spaces = spaces or HYPERPARAMETER_SPACES
+        self.base_models = {name: model for name, model in base_models.items() if name in spaces}
+        self.spaces = spaces
+        self.n_configs = n_configs
+        self.eta = eta
+        self.min_rows = min_rows
+        self.max_rounds = max_rounds
+        self.min_rounds = min_rounds
+        self.metric = metric
+        self.random_state = random_state
+        self.n_cores = n_cores or os.cpu_count() or 1
+
+        self.schedule_: List[Dict[str, int]] = []
+        self.leaderboard_: pd.DataFrame = pd.DataFrame()
+        self.best_params_: Dict[str, Dict[str, Any]] = {}
+        self.best_scores_: Dict[str, float] = {}
+
+    def run(self, X_train: pd.DataFrame, y_train: np.ndarray,
+            X_val: pd.DataFrame, y_val: np.ndarray) -> pd.DataFrame:
+        """
+        Ejecuta la búsqueda y retorna el leaderboard (una fila por prueba).
+        """
+        if self.metric not in SEARCH_METRICS:
+            raise ValueError(f"Métrica no soportada: {self.metric}. Opciones: {list(SEARCH_METRICS)}")
+
+        rng = np.random.default_rng(self.random_state)
+        n_rows = len(X_train)
+        self.schedule_ = halving_schedule(self.n_configs, n_rows, self.eta, self.min_rows,
+                                          self.max_rounds, self.min_rounds)
+        candidates = {
+            name: [sample_config(self.spaces[name], rng) for _ in range(self.n_configs)]
+            for name in self.base_models
+        }
+
+        print(f"\n🔎 Successive halving: {len(self.base_models)} modelos x {self.n_configs} configuraciones, "
+              f"eta={self.eta}, métrica={self.metric}")
+        for step in self.schedule_:
+            print(f"   - Ronda {step['rung']}: {step['configs']} configs/modelo, "
+                  f"{step['rows']:,} filas, {step['rounds']} árboles")
+
+        data_dir = tempfile.mkdtemp(prefix='flightontime_search_')
+        records = []
+        try:
+            share_arrays(data_dir, X_train=X_train.to_numpy(), y_train=np.asarray(y_train),
+                         X_val=X_val.to_numpy(), y_val=np.asarray(y_val),
+                         order=rng.permutation(n_rows))
+            feature_names = X_train.columns.tolist()
+
+            # spawn: XGBoost/LightGBM usan OpenMP, que no es seguro tras fork
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=self.n_cores, mp_context=context) as pool:
+                for step in self.schedule_:
+                    candidates = self._run_rung(pool, step, candidates, data_dir,
+                                                feature_names, records)
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+        self.leaderboard_ = (pd.DataFrame(records)
+                             .sort_values(['rung', 'score'], ascending=[False, False],
+                                          na_position='last')
+                             .reset_index(drop=True))
+
+        final = self.leaderboard_[self.leaderboard_['rung'] == self.schedule_[-1]['rung']]
+        for name in self.base_models:
+            rows = final[(final['model'] == name) & final['score'].notna()]
+            if rows.empty:
+                continue
+            best = rows.iloc[0]
+            self.best_params_[name] = {**best['params'], 'n_estimators': int(best['n_estimators'])}
+            self.best_scores_[name] = float(best['score'])
+            print(f"   🏆 {name}: {self.metric}={best['score']:.4f} {self.best_params_[name]}")
+
+        return self.leaderboard_
+
+    def _run_rung(self, pool: ProcessPoolExecutor, step: Dict[str, int],
+                  candidates: Dict[str, List[Dict]], data_dir: str,
+                  feature_names: List[str], records: List[Dict]) -> Dict[str, List[Dict]]:
+        """
+        Entrena en paralelo las configuraciones de una ronda y retorna las
+        promovidas a la siguiente (las `configs` de la ronda siguiente).
+        """
+        n_trials = sum(len(configs) for configs in candidates.values())
+        n_threads = max(1, self.n_cores // min(n_trials, self.n_cores))
+
+        futures = {}
+        for name, configs in candidates.items():
+            for params in configs:
+                future = pool.submit(_run_trial, name, self.base_models[name], params, data_dir,
+                                     feature_names, step['rows'], step['rounds'], n_threads,
+                                     self.metric)
+                futures[future] = (name, params)
+
+        scored = {name: [] for name in candidates}
+        for future in as_completed(futures):
+            name, params = futures[future]
+            record = {
+                'model': name,
+                'rung': step['rung'],
+                'rows': step['rows'],
+                'n_estimators': step['rounds'],
+                'params': params,
+                'score': np.nan,
+                'fit_seconds': np.nan,
+            }
+            try:
+                record.update(future.result())
+                scored[name].append((record['score'], params))
+            except Exception as e:
+                record['error'] = str(e)
+                print(f"   ❌ {name} {params}: {str(e)}")
+            records.append(record)
+
+        best = {name: max((score for score, _ in results), default=np.nan)
+                for name, results in scored.items()}
+        print(f"   ✓ Ronda {step['rung']}: " +
+              ", ".join(f"{name} mejor {self.metric}={score:.4f}" for name, score in best.items()))
+
+        keep = max(1, self.n_configs // self.eta ** (step['rung'] + 1))
+        return {
+            name: [params for _, params in sorted(results, key=lambda r: r[0], reverse=True)[:keep]]
+            for name, results in scored.items()
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Resumen serializable: configuración, rondas, mejores parámetros y
+        leaderboard completo.
+        """
+        leaderboard = self.leaderboard_.replace({np.nan: None}).to_dict(orient='records')
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'metric': self.metric,
+            'eta': self.eta,
+            'n_configs': self.n_configs,
+            'schedule': self.schedule_,
+            'best_params': self.best_params_,
+            'best_scores': self.best_scores_,
+            'leaderboard': leaderboard,
+        }
+
+    def save(self, path: Path) -> None:
+        """
+        Guarda el resumen de la búsqueda en JSON.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+        print(f"   💾 Leaderboard guardado: {path}")
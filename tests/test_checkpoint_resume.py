@@ -0,0 +1,123 @@
+"""
+Reanudación del entrenamiento out-of-core desde un checkpoint: el booster
+reanudado y su early stopping coinciden con los de una ejecución sin cortes.
+"""
+
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+import json
+
+import numpy as np
+import pytest
+import xgboost as xgb
+
+import train_model as tm
+
+
+PARAMS = {
+    'objective': 'binary:logistic',
+    'eval_metric': 'logloss',
+    'tree_method': 'hist',
+    'max_depth': 6,
+    'eta': 0.3,
+    'seed': 0,
+    'nthread': 1,
+}
+NUM_BOOST_ROUND = 200
+EARLY_STOPPING_ROUNDS = 5
+CRASH_ROUND = 12
+
+
+class Preempted(Exception):
+    pass
+
+
+class CrashAt(xgb.callback.TrainingCallback):
+    """Interrumpe el entrenamiento al completar `rounds` rondas."""
+
+    def __init__(self, rounds: int):
+        super().__init__()
+        self.rounds = rounds
+
+    def after_iteration(self, model, epoch: int, evals_log) -> bool:
+        if model.num_boosted_rounds() == self.rounds:
+            raise Preempted()
+        return False
+
+
+@pytest.fixture
+def matrices():
+    """Datos ruidosos: la logloss de validación deja de mejorar en ~15 rondas."""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(3000, 8)).astype(np.float32)
+    y = (X[:, 0] + X[:, 1] * X[:, 2] + rng.normal(size=len(X)) > 0).astype(np.float32)
+    dtrain = xgb.DMatrix(X[:2000], label=y[:2000])
+    dval = xgb.DMatrix(X[2000:], label=y[2000:])
+    return dtrain, dval
+
+
+@pytest.fixture
+def checkpoints(tmp_path, monkeypatch):
+    monkeypatch.setattr(tm, 'OOC_CHECKPOINT_DIR', tmp_path / 'checkpoints')
+    monkeypatch.setattr(tm, 'OOC_CHECKPOINT_ROUNDS', 5)
+    monkeypatch.setattr(tm, 'OOC_CHECKPOINT_SECONDS', 0)
+    return tmp_path / 'checkpoints'
+
+
+def train(dtrain, dval, resume: bool):
+    return tm.train_booster_with_checkpoints(
+        PARAMS, dtrain, dval, 'test-data', num_boost_round=NUM_BOOST_ROUND,
+        early_stopping_rounds=EARLY_STOPPING_ROUNDS, resume=resume)
+
+
+def test_resume_matches_uninterrupted_run(matrices, checkpoints, monkeypatch):
+    dtrain, dval = matrices
+    reference = train(dtrain, dval, resume=False)
+    best_iteration = int(reference.attr('best_iteration'))
+    # El early stopping debe cortar después del checkpoint para que la
+    # reanudación dependa del estado guardado
+    assert CRASH_ROUND <= best_iteration + EARLY_STOPPING_ROUNDS < NUM_BOOST_ROUND
+
+    xgb_train = tm.xgb.train
+
+    def crashing_train(*args, **kwargs):
+        kwargs['callbacks'] = kwargs['callbacks'] + [CrashAt(CRASH_ROUND)]
+        return xgb_train(*args, **kwargs)
+
+    monkeypatch.setattr(tm.xgb, 'train', crashing_train)
+    with pytest.raises(Preempted):
+        train(dtrain, dval, resume=False)
+    monkeypatch.setattr(tm.xgb, 'train', xgb_train)
+
+    (run_dir,) = checkpoints.iterdir()
+    with open(run_dir / 'state.json') as f:
+        state = json.load(f)
+    assert state['rounds'] == 10
+    assert state['best_iteration'] is not None and state['best_score'] is not None
+
+    resumed = train(dtrain, dval, resume=True)
+    assert resumed.num_boosted_rounds() == reference.num_boosted_rounds()
+    assert resumed.attr('best_iteration') == reference.attr('best_iteration')
+    assert resumed.attr('best_score') == reference.attr('best_score')
+    np.testing.assert_array_equal(resumed.predict(dval), reference.predict(dval))
+    assert not run_dir.exists()
+
+
+def test_early_stopping_state_round_trip(matrices):
+    dtrain, dval = matrices
+    early_stopping = tm.ResumableEarlyStopping(EARLY_STOPPING_ROUNDS, 'logloss')
+    xgb.train(PARAMS, dtrain, num_boost_round=NUM_BOOST_ROUND,
+              evals=[(dval, 'val')], callbacks=[early_stopping], verbose_eval=False)
+    state = early_stopping.state_dict()
+    assert state['rounds_without_improvement'] == EARLY_STOPPING_ROUNDS
+
+    restored = tm.ResumableEarlyStopping(EARLY_STOPPING_ROUNDS, 'logloss',
+                                         state=json.loads(json.dumps(state)))
+    assert restored.state_dict() == state
+    # Sin state (modelo base incremental) parte de cero
+    assert tm.ResumableEarlyStopping(EARLY_STOPPING_ROUNDS, 'logloss').best_score is None
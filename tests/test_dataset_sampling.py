@@ -0,0 +1,79 @@
+"""
+Muestreo de `load_dataset`: uniforme sobre todo el archivo aunque el parquet
+esté ordenado por fecha, de modo que se preserva la mezcla de meses y
+aerolíneas.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from dataset import load_dataset, ROW_GROUP_OVERSAMPLE
+
+
+N_ROWS = 120_000
+
+
+@pytest.fixture(scope='module')
+def date_ordered_parquet(tmp_path_factory):
+    """Parquet ordenado por fecha (como los exports de BTS) con 24 row groups."""
+    rng = np.random.default_rng(0)
+    months = np.sort(rng.integers(1, 13, N_ROWS))
+    carriers = np.array(['AA', 'DL', 'UA', 'WN', 'B6'])
+    # La mezcla de aerolíneas cambia con el mes
+    carrier_idx = (months + rng.integers(0, 2, N_ROWS)) % len(carriers)
+    df = pd.DataFrame({
+        'YEAR': 2024,
+        'MONTH': months,
+        'DAY_OF_MONTH': rng.integers(1, 29, N_ROWS),
+        'OP_UNIQUE_CARRIER': carriers[carrier_idx],
+        'ORIGIN': 'JFK',
+        'DEST': 'LAX',
+        'DISTANCE': rng.uniform(100, 3000, N_ROWS),
+        'DEP_DEL15': (rng.random(N_ROWS) < 0.2).astype(float),
+    })
+    path = tmp_path_factory.mktemp('data') / 'ordered.parquet'
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path,
+                   row_group_size=N_ROWS // 24)
+    return path, df
+
+
+def mix(series: pd.Series) -> pd.Series:
+    return series.value_counts(normalize=True).sort_index()
+
+
+def test_sample_preserves_month_and_carrier_mix(date_ordered_parquet):
+    path, full = date_ordered_parquet
+    sample = load_dataset(path, sample_size=5_000)
+
+    assert len(sample) == int(5_000 * ROW_GROUP_OVERSAMPLE)
+    for column in ('MONTH', 'OP_UNIQUE_CARRIER'):
+        expected, actual = mix(full[column]), mix(sample[column])
+        assert list(actual.index) == list(expected.index)
+        np.testing.assert_allclose(actual.to_numpy(), expected.to_numpy(), atol=0.02)
+
+
+def test_sample_respects_filters(date_ordered_parquet):
+    path, full = date_ordered_parquet
+    sample = load_dataset(path, months=[6, 7], carriers=['dl', 'ua'], sample_size=1_000)
+
+    assert set(sample['MONTH']) == {6, 7}
+    assert set(sample['OP_UNIQUE_CARRIER']) == {'DL', 'UA'}
+    assert len(sample) == int(1_000 * ROW_GROUP_OVERSAMPLE)
+
+
+def test_sample_is_reproducible_and_capped(date_ordered_parquet):
+    path, full = date_ordered_parquet
+    first = load_dataset(path, sample_size=2_000)
+    second = load_dataset(path, sample_size=2_000)
+    pd.testing.assert_frame_equal(first, second)
+
+    everything = load_dataset(path, sample_size=N_ROWS)
+    assert len(everything) == N_ROWS
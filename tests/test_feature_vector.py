@@ -0,0 +1,118 @@
+"""
+Paridad de FeatureVectorBuilder con la ruta de pandas
+(`transform_categorical` + reindexado por `feature_names`).
+"""
+
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import METADATA_PATH, FEATURE_ENGINEER_PATH
+from features import FlightFeatureEngineer, FeatureVectorBuilder, get_features_for_model
+
+
+BASE_FLIGHT = {
+    'year': 2024, 'month': 3, 'day_of_month': 15, 'day_of_week': 5,
+    'dep_hour': 14, 'sched_minute_of_day': 870,
+    'op_unique_carrier': 'AA', 'origin': 'JFK', 'dest': 'LAX',
+    'distance': 2475.0, 'temp': 18.5, 'wind_spd': 7.2, 'precip_1h': 0.0,
+    'climate_severity_idx': 0.3, 'dist_met_km': 10.0,
+    'latitude': 40.6413, 'longitude': -73.7781,
+}
+
+
+def pandas_reference(engineer, feature_names, records):
+    """Ruta de referencia: DataFrame, transform_categorical y reindex."""
+    df = engineer.transform_categorical(pd.DataFrame(records))
+    return df.reindex(columns=feature_names, fill_value=0).to_numpy(dtype=np.float32)
+
+
+def synthetic_engineer():
+    df = pd.DataFrame({
+        'op_unique_carrier': ['AA', 'DL', 'UA', 'WN'],
+        'origin': ['JFK', 'ATL', 'ORD', 'LAX'],
+        'dest': ['LAX', 'JFK', 'ATL', 'ORD'],
+    })
+    engineer = FlightFeatureEngineer()
+    engineer.fit_encoders(df, ['op_unique_carrier', 'origin', 'dest'])
+    return engineer
+
+
+def saved_engineer():
+    if not (METADATA_PATH.exists() and FEATURE_ENGINEER_PATH.exists()):
+        pytest.skip("No hay modelo guardado en models/")
+    with open(METADATA_PATH, 'r') as f:
+        feature_names = json.load(f)['feature_names']
+    return joblib.load(FEATURE_ENGINEER_PATH), feature_names
+
+
+@pytest.fixture(params=['synthetic', 'saved'])
+def setup(request):
+    if request.param == 'synthetic':
+        return synthetic_engineer(), get_features_for_model()
+    return saved_engineer()
+
+
+CASES = {
+    'known_codes': [BASE_FLIGHT],
+    'unknown_carrier': [{**BASE_FLIGHT, 'op_unique_carrier': 'ZZ'}],
+    'unknown_airports': [{**BASE_FLIGHT, 'origin': 'XXX', 'dest': 'YYY'}],
+    'none_optionals': [{**BASE_FLIGHT, 'latitude': None, 'longitude': None,
+                        'temp': None, 'distance': None}],
+    'missing_optionals': [{k: v for k, v in BASE_FLIGHT.items()
+                           if k not in ('climate_severity_idx', 'dist_met_km', 'latitude')}],
+}
+
+
+@pytest.mark.parametrize('case', list(CASES))
+def test_build_matches_pandas(setup, case):
+    engineer, feature_names = setup
+    builder = FeatureVectorBuilder.from_engineer(engineer, feature_names)
+    records = CASES[case]
+
+    expected = pandas_reference(engineer, feature_names, records)
+    actual = builder.build(records[0])
+
+    assert actual.dtype == np.float32
+    assert actual.shape == (1, len(feature_names))
+    np.testing.assert_array_equal(actual, expected)
+
+
+def test_build_batch_matches_pandas(setup):
+    engineer, feature_names = setup
+    builder = FeatureVectorBuilder.from_engineer(engineer, feature_names)
+    records = [CASES[name][0] for name in
+               ('known_codes', 'unknown_carrier', 'unknown_airports', 'none_optionals')]
+
+    expected = pandas_reference(engineer, feature_names, records)
+    actual = builder.build_batch(records)
+
+    assert actual.dtype == np.float32
+    assert actual.shape == (len(records), len(feature_names))
+    np.testing.assert_array_equal(actual, expected)
+
+
+def test_build_batch_missing_optionals(setup):
+    engineer, feature_names = setup
+    builder = FeatureVectorBuilder.from_engineer(engineer, feature_names)
+    records = CASES['missing_optionals'] * 3
+
+    expected = pandas_reference(engineer, feature_names, records)
+    np.testing.assert_array_equal(builder.build_batch(records), expected)
+
+
+def test_column_order_follows_feature_names():
+    engineer = synthetic_engineer()
+    feature_names = list(reversed(get_features_for_model()))
+    builder = FeatureVectorBuilder.from_engineer(engineer, feature_names)
+
+    expected = pandas_reference(engineer, feature_names, [BASE_FLIGHT])
+    np.testing.assert_array_equal(builder.build(BASE_FLIGHT), expected)
+    assert builder.build(BASE_FLIGHT)[0, 0] == engineer.label_encoders['dest'].transform(['LAX'])[0]
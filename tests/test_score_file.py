@@ -0,0 +1,91 @@
+"""
+Scoring de archivos con el contrato del API: Parquet, CSV y JSONL dan las
+mismas probabilidades, y un registro inválido solo invalida su fila.
+"""
+
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+import csv
+import json
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from score_file import score_file
+
+
+ROWS = [
+    {'aerolinea': 'AA', 'origen': 'JFK', 'destino': 'LAX',
+     'fecha_partida': '2025-11-10T14:30:00', 'distancia_km': 3983.0, 'temp': '21.5'},
+    {'aerolinea': 'DL', 'origen': 'ATL', 'destino': 'ORD',
+     'fecha_partida': '2025-06-01T08:00:00', 'distancia_km': None, 'temp': None},
+    {'aerolinea': 'UA', 'origen': 'SFO', 'destino': 'JFK',
+     'fecha_partida': '2025-12-20T18:15:00', 'distancia_km': 4150.0, 'temp': '3'},
+    # Inválidos: fecha mal formada, valor no numérico y distancia no estimable
+    {'aerolinea': 'AA', 'origen': 'JFK', 'destino': 'LAX',
+     'fecha_partida': 'no-es-fecha', 'distancia_km': 3983.0, 'temp': None},
+    {'aerolinea': 'WN', 'origen': 'DAL', 'destino': 'HOU',
+     'fecha_partida': '2025-04-05T12:00:00', 'distancia_km': 385.0, 'temp': 'hot'},
+    {'aerolinea': 'AA', 'origen': 'JFK', 'destino': 'ZZZ',
+     'fecha_partida': '2025-11-10T14:30:00', 'distancia_km': None, 'temp': None},
+]
+VALID = [True, True, True, False, False, False]
+
+
+def write_parquet(rows, path):
+    pq.write_table(pa.Table.from_pylist(rows), path)
+
+
+def write_csv(rows, path):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows({k: '' if v is None else v for k, v in row.items()} for row in rows)
+
+
+def write_jsonl(rows, path):
+    with open(path, 'w') as f:
+        for row in rows:
+            f.write(json.dumps({k: v for k, v in row.items() if v is not None}) + '\n')
+
+
+WRITERS = {'parquet': write_parquet, 'csv': write_csv, 'jsonl': write_jsonl}
+
+
+@pytest.fixture(scope='module')
+def scores(tmp_path_factory):
+    """Salida de score_file por formato de entrada."""
+    tmp = tmp_path_factory.mktemp('score_file')
+    results = {}
+    for fmt, write in WRITERS.items():
+        input_path = tmp / f"vuelos.{fmt}"
+        write(ROWS, input_path)
+        output_path = tmp / f"scores_{fmt}.parquet"
+        assert score_file(input_path, output_path, batch_size=4) == len(ROWS)
+        results[fmt] = pd.read_parquet(output_path)
+    return results
+
+
+@pytest.mark.parametrize('fmt', list(WRITERS))
+def test_invalid_rows_do_not_abort_the_file(scores, fmt):
+    df = scores[fmt]
+    assert df['row_id'].tolist() == list(range(len(ROWS)))
+    valid = np.array(VALID)
+    assert df['error'].isna().to_numpy().tolist() == VALID
+    assert df.loc[valid, 'prob_retraso'].between(0, 1).all()
+    assert df.loc[~valid, 'prob_retraso'].isna().all()
+    assert df.loc[~valid, 'prediccion'].isna().all()
+    assert 'hot' in df.loc[4, 'error']
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'jsonl'])
+def test_formats_score_identically(scores, fmt):
+    pd.testing.assert_frame_equal(scores[fmt], scores['parquet'])
@@ -21,12 +21,22 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
 import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 import xgboost as xgb
 from sklearn.preprocessing import LabelEncoder
 from pathlib import Path
 import warnings
 import time
+import json
+import hashlib
+import collections
+import shutil
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 warnings.filterwarnings('ignore')
 
 # Imports locales
@@ -34,11 +44,18 @@ from config import (
     DATASET_PATH, MODEL_PATH, METADATA_PATH,
     OUTPUTS_DIR,
     FIGURES_DIR, METRICS_DIR, RANDOM_STATE,
-    DELAY_THRESHOLD_MINUTES, MIN_RECALL_TARGET, MIN_PRECISION_TARGET
+    DELAY_THRESHOLD_MINUTES, MIN_RECALL_TARGET, MIN_PRECISION_TARGET,
+    DISTANCE_FEATURES, CLIMATE_FEATURES, GEO_FEATURES, ENCODED_FEATURES,
+    HYPERPARAMETER_SEARCH
 )
 from features import FlightFeatureEngineer, get_features_for_model
+from dataset import (
+    DATASET_COLUMN_MAPPING, RAW_COLUMN_NAMES,
+    load_dataset, build_filter, dataset_filters_from_env
+)
 from modeling import FlightDelayModel, OutOfCoreXGBModel
 from evaluation import ModelEvaluator
+from operating_curve import OperatingCurve, ScoreHistogram, HISTOGRAM_BINS
 
 # =============================================================================
 # CONFIGURACIÓN DEL ENTRENAMIENTO
@@ -48,9 +65,66 @@ from evaluation import ModelEvaluator
 _env_sample_size = os.getenv("SAMPLE_SIZE")
 SAMPLE_SIZE = int(_env_sample_size) if _env_sample_size else None
 
+# Filtros de año/mes/aerolínea empujados al parquet
+# (DATA_YEARS, DATA_MONTHS, DATA_CARRIERS; listas separadas por coma)
+DATA_FILTERS = dataset_filters_from_env()
+
 # Entrenamiento out-of-core (XGBoost) para dataset completo
 OUT_OF_CORE = os.getenv("OUT_OF_CORE") == "1"
 
+# Comparación de modelos en paralelo (un proceso por modelo)
+PARALLEL_TRAINING = os.getenv("PARALLEL_TRAINING") == "1"
+
+# Búsqueda de hiperparámetros (successive halving) antes de comparar modelos
+TUNE_HYPERPARAMS = os.getenv("TUNE_HYPERPARAMS") == "1"
+TUNE_CONFIGS = int(os.getenv("TUNE_CONFIGS", HYPERPARAMETER_SEARCH['n_configs']))
+
+# Out-of-core en una sola lectura del parquet: el iterador de train reparte
+# cada batch y guarda val/test en memoria (OOC_SINGLE_PASS=0 = 3 lecturas)
+OOC_SINGLE_PASS = os.getenv("OOC_SINGLE_PASS", "1") == "1"
+
+# Prefetch de batches en segundo plano (0 = lectura síncrona) y workers que
+# preparan los batches mientras XGBoost consume el actual
+OOC_PREFETCH = int(os.getenv("OOC_PREFETCH", "4"))
+OOC_WORKERS = int(os.getenv("OOC_WORKERS", str(min(4, os.cpu_count() or 1))))
+# 'thread' o 'process' (procesos evitan el GIL a costa de serializar los batches)
+OOC_PREFETCH_MODE = os.getenv("OOC_PREFETCH_MODE", "thread")
+
+# Caché en disco de las matrices cuantizadas entre ejecuciones (OOC_CACHE=0
+# la desactiva); se invalida sola si cambia el dataset, features o encoders
+OOC_CACHE = os.getenv("OOC_CACHE", "1") == "1"
+OOC_CACHE_DIR = Path(os.getenv("OOC_CACHE_DIR", str(MODEL_PATH.parent / "cache")))
+OOC_MAX_BIN = 256
+
+# Rondas de boosting y early stopping del entrenamiento out-of-core
+OOC_NUM_BOOST_ROUND = 120
+OOC_EARLY_STOPPING_ROUNDS = 10
+# Métricas de evaluación de XGBoost en las que mayor es mejor
+MAXIMIZE_METRICS = ('auc', 'aucpr', 'map', 'ndcg', 'pre')
+
+# Checkpoints del booster durante el entrenamiento out-of-core: cada N rondas
+# y/o cada N segundos (0 desactiva ese criterio; ambos en 0 = sin checkpoints).
+# OOC_RESUME=1 continúa desde el último checkpoint compatible
+OOC_CHECKPOINT_DIR = Path(os.getenv("OOC_CHECKPOINT_DIR", str(MODEL_PATH.parent / "checkpoints")))
+OOC_CHECKPOINT_ROUNDS = int(os.getenv("OOC_CHECKPOINT_ROUNDS", "10"))
+OOC_CHECKPOINT_SECONDS = float(os.getenv("OOC_CHECKPOINT_SECONDS", "0"))
+OOC_RESUME = os.getenv("OOC_RESUME") == "1"
+
+# Métricas de test out-of-core sobre histogramas de scores con esta cantidad
+# de bins, sin ordenar las probabilidades (0 = métricas exactas con sklearn)
+OOC_METRIC_BINS = int(os.getenv("OOC_METRIC_BINS", str(HISTOGRAM_BINS)))
+# Filas por actualización del histograma al puntuar dtest en memoria
+OOC_METRIC_CHUNK_ROWS = 500_000
+
+# Reentrenamiento incremental (warm start) del modelo guardado con un período
+# nuevo: INCREMENTAL_DATA (por defecto el dataset) filtrado con DATA_YEARS /
+# DATA_MONTHS. INCREMENTAL_MODE='continue' agrega INCREMENTAL_ROUNDS árboles;
+# 'refresh' solo recalcula las hojas de los árboles existentes
+INCREMENTAL = os.getenv("INCREMENTAL") == "1"
+INCREMENTAL_DATA = Path(os.getenv("INCREMENTAL_DATA", str(DATASET_PATH)))
+INCREMENTAL_MODE = os.getenv("INCREMENTAL_MODE", "continue")
+INCREMENTAL_ROUNDS = int(os.getenv("INCREMENTAL_ROUNDS", "30"))
+
 
 # División de datos
 TRAIN_SIZE = 0.70      # 70% para entrenamiento
@@ -58,24 +132,33 @@ VALIDATION_SIZE = 0.15 # 15% para validaci?n
 TEST_SIZE = 0.15       # 15% para test final
 
 
-def load_and_explore_data(dataset_path: Path, sample_size: int = None) -> pd.DataFrame:
-    """Carga el dataset y muestra información básica."""
+def load_and_explore_data(dataset_path: Path, sample_size: int = None,
+                          filters: dict = None) -> pd.DataFrame:
+    """
+    Carga el dataset y muestra información básica.
+
+    Solo se leen las columnas del modelo y el target; los `filters`
+    (years, months, carriers) se aplican en el parquet y, con `sample_size`,
+    se sortean filas uniformemente sin materializar el archivo completo.
+    """
     print("\n" + "="*70)
     print("📂 FASE 1: CARGA DE DATOS")
     print("="*70)
     
     print(f"📁 Cargando dataset desde: {dataset_path}")
+    if filters:
+        print(f"🔎 Filtros: {filters}")
     start_time = time.time()
-    df = pd.read_parquet(dataset_path)
+    df = load_dataset(dataset_path, sample_size=sample_size, **(filters or {}))
     load_time = time.time() - start_time
     
     original_size = len(df)
-    print(f"\n📊 Dimensiones originales: {original_size:,} filas x {df.shape[1]} columnas")
+    print(f"\n📊 Dimensiones leídas: {original_size:,} filas x {df.shape[1]} columnas")
     print(f"⏱️ Tiempo de carga: {load_time:.1f} segundos")
     
     # Muestreo estratificado si el dataset es muy grande
     if sample_size and len(df) > sample_size:
-        print(f"\n⚠️ Usando sample de {sample_size:,} registros ({100*sample_size/original_size:.1f}% del total)")
+        print(f"\n⚠️ Usando sample de {sample_size:,} registros ({100*sample_size/original_size:.1f}% de lo leído)")
         
         # Muestreo estratificado por la variable objetivo
         if 'DEP_DEL15' in df.columns:
@@ -285,23 +368,63 @@ def feature_engineering(df: pd.DataFrame) -> tuple:
     return df, fe, feature_cols
 
 
-def build_label_encoders(dataset_path: Path, batch_size: int = 200000) -> tuple:
+def _unique_values(array) -> pa.Array:
+    """
+    Valores únicos no nulos de una columna Arrow. Si viene codificada con
+    diccionario (páginas de diccionario del parquet) solo se miran los índices.
+    """
+    if pa.types.is_dictionary(array.type):
+        used = pc.unique(array.indices)
+        array = array.dictionary.take(used.drop_null())
+    return pc.unique(array).drop_null()
+
+
+def _scan_unique_values(fragment, columns: list, batch_size: int,
+                        row_filter=None) -> dict:
+    """Únicos por columna de un fragmento (row group) del dataset."""
+    uniques = {col: [] for col in columns}
+    for batch in fragment.to_batches(columns=columns, filter=row_filter, batch_size=batch_size):
+        for col in columns:
+            uniques[col].append(_unique_values(batch.column(col)))
+    return uniques
+
+
+def build_label_encoders(dataset_path: Path, batch_size: int = 200000,
+                         workers: int = None, row_filter=None) -> tuple:
     """
     Construye LabelEncoders para categoricas leyendo el dataset por lotes.
+
+    Los únicos se calculan con `pc.unique` por batch (sin materializar los
+    strings en Python) leyendo las columnas como diccionario cuando el parquet
+    lo permite, y los row groups se procesan en paralelo con `workers` hilos.
+    Con `row_filter` (ver `build_filter`) solo se leen las filas que pasan el
+    filtro, descartando row groups por sus estadísticas.
     """
-    dataset = ds.dataset(str(dataset_path))
     columns = ['OP_UNIQUE_CARRIER', 'ORIGIN', 'DEST']
-    category_sets = {col: set() for col in columns}
+    parquet_format = ds.ParquetFileFormat(read_options={'dictionary_columns': columns})
+    dataset = ds.dataset(str(dataset_path), format=parquet_format)
 
-    for batch in dataset.to_batches(columns=columns, batch_size=batch_size):
-        for col in columns:
-            values = batch.column(col).to_pylist()
-            category_sets[col].update(v for v in values if v is not None)
+    fragments = [
+        row_group
+        for fragment in dataset.get_fragments(filter=row_filter)
+        for row_group in fragment.split_by_row_group(row_filter, schema=dataset.schema)
+    ]
+    workers = OOC_WORKERS if workers is None else workers
+
+    def scan(fragment):
+        return _scan_unique_values(fragment, columns, batch_size, row_filter)
+
+    category_arrays = {col: [] for col in columns}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for uniques in pool.map(scan, fragments):
+            for col in columns:
+                category_arrays[col].extend(uniques[col])
 
     encoders = {}
     class_sets = {}
-    for col, values in category_sets.items():
-        ordered = sorted(values)
+    for col, arrays in category_arrays.items():
+        values = pc.unique(pa.concat_arrays(arrays)) if arrays else pa.array([], pa.string())
+        ordered = sorted(values.to_pylist())
         ordered.append('__unknown__')
         le = LabelEncoder()
         le.fit(ordered)
@@ -312,32 +435,39 @@ def build_label_encoders(dataset_path: Path, batch_size: int = 200000) -> tuple:
     return encoders, class_sets
 
 
+def extend_label_encoders(encoders: dict, new_encoders: dict) -> tuple:
+    """
+    Extiende los LabelEncoders de un modelo ya entrenado con las categorías
+    nuevas de `new_encoders`, sin mover las existentes: los códigos con los
+    que se entrenaron los árboles no cambian y las categorías nuevas se
+    agregan al final (después de '__unknown__'), en orden alfabético.
+
+    `le.transform`, `encode_with_unknown` y el encoding Arrow buscan por
+    valor, así que no requieren `classes_` ordenado.
+
+    Returns:
+        (encoders, class_sets, {columna: categorías agregadas})
+    """
+    extended = {}
+    class_sets = {}
+    added = {}
+    for col, le in encoders.items():
+        known = set(le.classes_)
+        new_values = sorted(c for c in new_encoders.get(col, le).classes_ if c not in known)
+        merged = LabelEncoder()
+        merged.classes_ = np.array(list(le.classes_) + new_values)
+        extended[col] = merged
+        class_sets[col] = set(merged.classes_)
+        added[col] = new_values
+    return extended, class_sets, added
+
+
 def prepare_batch_dataframe(batch, encoders: dict, class_sets: dict) -> pd.DataFrame:
     """
     Convierte un batch Arrow a DataFrame con features normalizadas y categorizadas.
     """
     df = batch.to_pandas()
-
-    column_mapping = {
-        'YEAR': 'year',
-        'MONTH': 'month',
-        'DAY_OF_MONTH': 'day_of_month',
-        'DAY_OF_WEEK': 'day_of_week',
-        'OP_UNIQUE_CARRIER': 'op_unique_carrier',
-        'ORIGIN': 'origin',
-        'DEST': 'dest',
-        'DISTANCE': 'distance',
-        'DEP_HOUR': 'dep_hour',
-        'LATITUDE': 'latitude',
-        'LONGITUDE': 'longitude',
-        'DIST_MET_KM': 'dist_met_km',
-        'TEMP': 'temp',
-        'WIND_SPD': 'wind_spd',
-        'PRECIP_1H': 'precip_1h',
-        'CLIMATE_SEVERITY_IDX': 'climate_severity_idx',
-        'DEP_DEL15': 'is_delayed'
-    }
-    df = df.rename(columns=column_mapping)
+    df = df.rename(columns=DATASET_COLUMN_MAPPING)
 
     if 'precip_1h' in df.columns:
         df['precip_1h'] = df['precip_1h'].replace(-1, 0)
@@ -353,13 +483,302 @@ def prepare_batch_dataframe(batch, encoders: dict, class_sets: dict) -> pd.DataF
     return df
 
 
+def build_encoder_vocabularies(encoders: dict) -> dict:
+    """
+    Prepara, por columna categórica, las clases del LabelEncoder como array
+    Arrow y el código de '__unknown__', para codificar con `pc.index_in`.
+
+    El código de cada valor es su posición en `le.classes_`, igual que
+    `LabelEncoder.transform`.
+    """
+    return {
+        col: (pa.array([str(c) for c in le.classes_], type=pa.string()),
+              list(le.classes_).index('__unknown__'))
+        for col, le in encoders.items()
+    }
+
+
+def encode_arrow_column(values, vocabulary: tuple) -> pa.Array:
+    """
+    Codifica una columna Arrow de texto con el vocabulario de un encoder;
+    valores nulos o fuera del vocabulario reciben el código '__unknown__'.
+    """
+    classes, unknown_code = vocabulary
+    if not (pa.types.is_string(values.type) or pa.types.is_large_string(values.type)):
+        values = pc.cast(values, pa.string())
+    if classes.type != values.type:
+        classes = classes.cast(values.type)
+    codes = pc.index_in(pc.utf8_upper(values), value_set=classes)
+    return pc.fill_null(codes, unknown_code)
+
+
+def prepare_batch_arrays(batch, vocabularies: dict, feature_cols: list) -> tuple:
+    """
+    Versión Arrow de `prepare_batch_dataframe` para el entrenamiento
+    out-of-core: sin pasar por pandas, codifica las categóricas con
+    `encode_arrow_column`, limpia precip_1h (-1 → 0) con `pc.if_else` y
+    escribe cada feature directamente en una matriz float32 C-contigua.
+
+    Returns:
+        (X float32 (n, len(feature_cols)), y int, splits int8) o None si el
+        batch está vacío
+    """
+    if batch.num_rows == 0:
+        return None
+
+    X = np.empty((batch.num_rows, len(feature_cols)), dtype=np.float32)
+    for j, name in enumerate(feature_cols):
+        if name.endswith('_encoded'):
+            col = name[:-len('_encoded')]
+            values = encode_arrow_column(batch.column(RAW_COLUMN_NAMES.get(col, col)),
+                                         vocabularies[col])
+        else:
+            values = batch.column(RAW_COLUMN_NAMES.get(name, name))
+            if name == 'precip_1h':
+                values = pc.if_else(pc.equal(values, -1),
+                                    pa.scalar(0, type=values.type), values)
+        # Nulos → NaN al convertir; sin nulos y ya float32 no hay copia intermedia
+        X[:, j] = pc.cast(values, pa.float32()).to_numpy(zero_copy_only=False)
+
+    # Equivalente a fillna(0): nulos y NaN del parquet
+    X[np.isnan(X)] = 0
+
+    y = batch.column(RAW_COLUMN_NAMES['is_delayed']).to_numpy(zero_copy_only=False)
+    y = np.nan_to_num(y, nan=0).astype(int)
+
+    return X, y, assign_splits(batch)
+
+
+# Columnas (ya normalizadas) que identifican un vuelo para el split por hash
+SPLIT_KEY_COLUMNS = [
+    'year', 'month', 'day_of_month', 'op_unique_carrier',
+    'origin', 'dest', 'sched_minute_of_day'
+]
+SPLIT_CODES = {'train': 0, 'val': 1, 'test': 2}
+
+
+def _hash_key_column(values) -> np.ndarray:
+    """
+    Hash uint64 por fila de una columna llave (Arrow o pandas). Los números se
+    normalizan a float64 para que el hash no dependa del dtype del batch.
+    """
+    if isinstance(values, pd.Series):
+        values = pa.Array.from_pandas(values)
+    if isinstance(values, pa.ChunkedArray):
+        values = values.combine_chunks()
+
+    if pa.types.is_string(values.type) or pa.types.is_large_string(values.type):
+        # Se hashean solo los valores únicos del batch y se expanden por índice
+        encoded = pc.dictionary_encode(pc.fill_null(values, ''))
+        unique_hashes = pd.util.hash_array(
+            np.asarray(encoded.dictionary.to_pylist(), dtype=object)
+        )
+        return unique_hashes[encoded.indices.to_numpy(zero_copy_only=False)]
+
+    numbers = pc.cast(values, pa.float64()).to_numpy(zero_copy_only=False)
+    return pd.util.hash_array(numbers)
+
+
+def assign_splits(data) -> np.ndarray:
+    """
+    Asigna cada fila a train (0), val (1) o test (2) con un hash de su llave
+    (fecha + aerolínea + origen + destino + hora programada).
+
+    `data` puede ser un DataFrame con columnas normalizadas o un batch/tabla
+    Arrow con los nombres del parquet; ambos dan la misma asignación.
+    La asignación depende solo del contenido de la fila, por lo que es estable
+    ante cambios de tamaño u orden de los batches y entre ejecuciones.
+    """
+    if isinstance(data, pd.DataFrame):
+        columns = [data[c] for c in SPLIT_KEY_COLUMNS if c in data.columns]
+    else:
+        names = set(data.schema.names)
+        raw_keys = [RAW_COLUMN_NAMES.get(c, c) for c in SPLIT_KEY_COLUMNS]
+        columns = [data.column(c) for c in raw_keys if c in names]
+
+    hashes = np.full(len(data), 0xcbf29ce484222325, dtype=np.uint64)
+    for column in columns:
+        hashes = (hashes ^ _hash_key_column(column)) * np.uint64(0x100000001b3)
+
+    # 53 bits altos del hash → uniforme en [0, 1)
+    u = (hashes >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+    return np.where(u < TRAIN_SIZE, 0,
+                    np.where(u < TRAIN_SIZE + VALIDATION_SIZE, 1, 2)).astype(np.int8)
+
+
+class BatchPreparer:
+    """
+    Prepara un batch Arrow para XGBoost con `prepare_batch_arrays`: retorna
+    (X, y, splits) o None si queda vacío. Es serializable para poder
+    ejecutarse en otros procesos.
+    """
+
+    def __init__(self, encoders: dict, class_sets: dict, feature_cols: list):
+        self.vocabularies = build_encoder_vocabularies(encoders)
+        self.feature_cols = feature_cols
+
+    def __call__(self, batch):
+        return prepare_batch_arrays(batch, self.vocabularies, self.feature_cols)
+
+
+# Función de preparación de cada proceso del pool (se fija una vez al crearlo)
+_WORKER_PROCESS_FN = None
+
+
+def _init_prefetch_worker(process_fn) -> None:
+    global _WORKER_PROCESS_FN
+    _WORKER_PROCESS_FN = process_fn
+
+
+def _run_prefetch_worker(batch):
+    return _WORKER_PROCESS_FN(batch)
+
+
+class BatchPrefetcher:
+    """
+    Pipeline de lectura en segundo plano para el entrenamiento out-of-core.
+
+    Un hilo productor lee los RecordBatches de Arrow y envía cada uno a un pool
+    (de hilos o de procesos, según `mode`) que aplica `process_fn`; los futures
+    se encolan en orden en una cola acotada a `depth` elementos, así que como
+    máximo hay `depth` batches preparados (o en preparación) por delante del
+    consumidor.
+
+    Estadísticas acumuladas (ver `stats()`):
+    - stall_seconds: tiempo que el consumidor esperó un batch
+    - queue_depth_mean / queue_depth_max: batches listos en cola al pedir uno
+      (futures en vuelo ya terminados, contados en `_in_flight`)
+    """
+
+    _END = object()
+
+    def __init__(self, batches, process_fn, depth: int = 4, workers: int = 2,
+                 mode: str = 'thread'):
+        self.depth = max(1, depth)
+        if mode == 'process':
+            self._pool = ProcessPoolExecutor(max_workers=max(1, workers),
+                                             initializer=_init_prefetch_worker,
+                                             initargs=(process_fn,))
+            self._submit = lambda batch: self._pool.submit(_run_prefetch_worker, batch)
+        elif mode == 'thread':
+            self._pool = ThreadPoolExecutor(max_workers=max(1, workers),
+                                            thread_name_prefix='ooc-prefetch')
+            self._submit = lambda batch: self._pool.submit(process_fn, batch)
+        else:
+            raise ValueError(f"Modo de prefetch no soportado: {mode}")
+        self._queue = queue.Queue(maxsize=self.depth)
+        # Futures enviados y aún no entregados, en orden de lectura
+        self._in_flight = collections.deque()
+        self._in_flight_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._producer = threading.Thread(target=self._produce, args=(batches,), daemon=True)
+        self._closed = False
+
+        self.batches = 0
+        self.stall_seconds = 0.0
+        self._depth_sum = 0
+        self.queue_depth_max = 0
+
+        self._producer.start()
+
+    def _put(self, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self, batches) -> None:
+        try:
+            for batch in batches:
+                future = self._submit(batch)
+                with self._in_flight_lock:
+                    self._in_flight.append(future)
+                if not self._put(future):
+                    return
+        except Exception as e:
+            self._put(e)
+        self._put(self._END)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        """Retorna el siguiente batch procesado, en el orden de lectura."""
+        if self._closed:
+            raise StopIteration
+
+        with self._in_flight_lock:
+            depth = sum(1 for f in self._in_flight if f.done())
+        self._depth_sum += depth
+        self.queue_depth_max = max(self.queue_depth_max, depth)
+
+        start = time.perf_counter()
+        item = self._queue.get()
+        if item is self._END:
+            self.stall_seconds += time.perf_counter() - start
+            self.close()
+            raise StopIteration
+        if isinstance(item, Exception):
+            self.close()
+            raise item
+        with self._in_flight_lock:
+            self._in_flight.popleft()
+        try:
+            result = item.result()
+        except Exception:
+            self.close()
+            raise
+        self.stall_seconds += time.perf_counter() - start
+        self.batches += 1
+        return result
+
+    def close(self) -> None:
+        """Detiene el productor y libera el pool (idempotente)."""
+        if self._closed:
+            return
+        self._closed = True
+        self._stop.set()
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if hasattr(item, 'cancel'):
+                item.cancel()
+        self._producer.join()
+        with self._in_flight_lock:
+            self._in_flight.clear()
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {
+            'batches': self.batches,
+            'stall_seconds': self.stall_seconds,
+            'queue_depth_sum': self._depth_sum,
+            'queue_depth_max': self.queue_depth_max,
+        }
+
+
 class ParquetDataIter(xgb.core.DataIter):
     """
     Iterador para XGBoost QuantileDMatrix leyendo Parquet por lotes.
+
+    Con `fanout=True` (solo split='train'), durante la primera pasada completa
+    también se guardan las filas de val/test, que luego se obtienen con
+    `side_data()` sin volver a leer el parquet.
+
+    Con `prefetch > 0` la lectura y preparación de los siguientes batches
+    corre en segundo plano (`BatchPrefetcher`) mientras XGBoost consume el
+    actual; `prefetch_stats()` acumula las esperas de todas las pasadas.
     """
 
     def __init__(self, dataset_path: Path, encoders: dict, class_sets: dict,
-                 feature_cols: list, split: str, batch_size: int = 50000):
+                 feature_cols: list, split: str, batch_size: int = 50000,
+                 fanout: bool = False, prefetch: int = None,
+                 workers: int = None, prefetch_mode: str = None):
         super().__init__()
         self.dataset = ds.dataset(str(dataset_path))
         self.encoders = encoders
@@ -367,6 +786,17 @@ class ParquetDataIter(xgb.core.DataIter):
         self.feature_cols = feature_cols
         self.split = split
         self.batch_size = batch_size
+        self.fanout = fanout and split == 'train'
+        self.row_filter = build_filter(**DATA_FILTERS)
+        self._side = {'val': ([], []), 'test': ([], [])}
+        self._side_complete = False
+        self.prefetch = OOC_PREFETCH if prefetch is None else prefetch
+        self.workers = OOC_WORKERS if workers is None else workers
+        self.prefetch_mode = prefetch_mode or OOC_PREFETCH_MODE
+        self.preparer = BatchPreparer(encoders, class_sets, feature_cols)
+        self._prefetcher = None
+        self._stats = {'passes': 0, 'batches': 0, 'stall_seconds': 0.0,
+                       'queue_depth_sum': 0, 'queue_depth_max': 0}
         self.columns = [
             'YEAR', 'MONTH', 'DAY_OF_MONTH', 'DAY_OF_WEEK',
             'OP_UNIQUE_CARRIER', 'ORIGIN', 'DEST', 'DEP_DEL15',
@@ -374,44 +804,92 @@ class ParquetDataIter(xgb.core.DataIter):
             'LATITUDE', 'LONGITUDE', 'DIST_MET_KM',
             'TEMP', 'WIND_SPD', 'PRECIP_1H', 'CLIMATE_SEVERITY_IDX'
         ]
-        self.rng = np.random.default_rng(RANDOM_STATE)
         self._reset_batches()
 
     def _reset_batches(self) -> None:
-        self._batches = iter(self.dataset.to_batches(columns=self.columns, batch_size=self.batch_size))
+        self._close_prefetcher()
+        batches = self.dataset.to_batches(columns=self.columns, filter=self.row_filter,
+                                          batch_size=self.batch_size)
+        if self.prefetch > 0:
+            self._prefetcher = BatchPrefetcher(batches, self.preparer,
+                                               depth=self.prefetch, workers=self.workers,
+                                               mode=self.prefetch_mode)
+            self._batches = self._prefetcher
+            self._stats['passes'] += 1
+        else:
+            self._batches = map(self.preparer, batches)
+
+    def _close_prefetcher(self) -> None:
+        if self._prefetcher is None:
+            return
+        self._prefetcher.close()
+        current = self._prefetcher.stats()
+        for key in ('batches', 'stall_seconds', 'queue_depth_sum'):
+            self._stats[key] += current[key]
+        self._stats['queue_depth_max'] = max(self._stats['queue_depth_max'], current['queue_depth_max'])
+        self._prefetcher = None
 
     def reset(self) -> None:
-        self.rng = np.random.default_rng(RANDOM_STATE)
+        # Una pasada interrumpida deja val/test incompletos: se descartan
+        if self.fanout and not self._side_complete:
+            self._side = {'val': ([], []), 'test': ([], [])}
         self._reset_batches()
 
+    def close(self) -> None:
+        """Detiene el prefetch en curso (si lo hay)."""
+        self._close_prefetcher()
+
+    def prefetch_stats(self) -> dict:
+        """
+        Estadísticas del prefetch acumuladas en todas las pasadas:
+        batches, tiempo total de espera del consumidor y profundidad de cola.
+        """
+        stats = dict(self._stats)
+        if self._prefetcher is not None:
+            current = self._prefetcher.stats()
+            for key in ('batches', 'stall_seconds', 'queue_depth_sum'):
+                stats[key] += current[key]
+            stats['queue_depth_max'] = max(stats['queue_depth_max'], current['queue_depth_max'])
+        stats['queue_depth_mean'] = stats.pop('queue_depth_sum') / max(stats['batches'], 1)
+        return stats
+
+    def side_data(self, split: str) -> tuple:
+        """
+        Retorna (X, y) del split 'val' o 'test' recogido en la pasada de train.
+        """
+        if not self._side_complete:
+            raise RuntimeError("No hay datos de val/test: el iterador de train no completó una pasada")
+        X_parts, y_parts = self._side[split]
+        if not X_parts:
+            return np.empty((0, len(self.feature_cols)), dtype=np.float32), np.empty(0, dtype=np.float32)
+        return np.concatenate(X_parts), np.concatenate(y_parts)
+
+    def release_side_data(self) -> None:
+        """Libera la memoria de val/test una vez construidas sus DMatrix."""
+        self._side = {'val': ([], []), 'test': ([], [])}
+
     def next(self, input_data) -> int:
         while True:
             try:
-                batch = next(self._batches)
+                processed = next(self._batches)
             except StopIteration:
+                if self.fanout:
+                    self._side_complete = True
                 return 0
 
-            df = prepare_batch_dataframe(batch, self.encoders, self.class_sets)
-            df[self.feature_cols] = df[self.feature_cols].fillna(0)
-            df['is_delayed'] = df['is_delayed'].fillna(0)
-
-            if df.empty:
+            if processed is None:
                 continue
 
-            y = df['is_delayed'].astype(int).to_numpy()
-            X = df[self.feature_cols].to_numpy()
+            X, y, splits = processed
 
-            rand = self.rng.random(len(y))
-            train_mask = rand < TRAIN_SIZE
-            val_mask = (rand >= TRAIN_SIZE) & (rand < TRAIN_SIZE + VALIDATION_SIZE)
-            test_mask = rand >= (TRAIN_SIZE + VALIDATION_SIZE)
+            if self.fanout and not self._side_complete:
+                for name in ('val', 'test'):
+                    side_mask = splits == SPLIT_CODES[name]
+                    if np.any(side_mask):
+                        self._side[name][0].append(X[side_mask].astype(np.float32))
+                        self._side[name][1].append(y[side_mask].astype(np.float32))
 
-            if self.split == 'train':
-                mask = train_mask
-            elif self.split == 'val':
-                mask = val_mask
-            else:
-                mask = test_mask
+            mask = splits == SPLIT_CODES[self.split]
 
             if not np.any(mask):
                 continue
@@ -420,50 +898,462 @@ class ParquetDataIter(xgb.core.DataIter):
             return 1
 
 
-def optimize_threshold(y_true: np.ndarray, y_proba: np.ndarray,
-                       min_recall: float, min_precision: float) -> float:
+# =============================================================================
+# CACHÉ DE MATRICES CUANTIZADAS
+# =============================================================================
+
+# Subir al cambiar el formato de la caché o la preparación de features
+QUANTIZED_CACHE_VERSION = 1
+
+
+def dataset_fingerprint(dataset_path: Path) -> list:
     """
-    Optimiza el umbral usando precision/recall.
+    Huella barata del dataset: por archivo, ruta relativa, tamaño, mtime y
+    filas/row groups del footer del parquet (sin leer los datos).
+    """
+    dataset_path = Path(dataset_path)
+    base = dataset_path if dataset_path.is_dir() else dataset_path.parent
+    fingerprint = []
+    for path in sorted(ds.dataset(str(dataset_path)).files):
+        stat = os.stat(path)
+        metadata = pq.ParquetFile(path).metadata
+        fingerprint.append([
+            os.path.relpath(path, base), stat.st_size, stat.st_mtime_ns,
+            metadata.num_rows, metadata.num_row_groups
+        ])
+    return fingerprint
+
+
+def quantized_cache_key(dataset_path: Path, feature_cols: list,
+                        encoders: dict, max_bin: int) -> str:
+    """
+    Llave de contenido de la caché: huella del dataset, features, vocabulario
+    de los encoders, max_bin, configuración del split, filtros de datos y
+    versión de XGBoost.
     """
-    from sklearn.metrics import precision_recall_curve
+    payload = {
+        'version': QUANTIZED_CACHE_VERSION,
+        'dataset': dataset_fingerprint(dataset_path),
+        'features': list(feature_cols),
+        'vocabulary': {col: [str(c) for c in le.classes_] for col, le in sorted(encoders.items())},
+        'max_bin': max_bin,
+        'split': {'keys': SPLIT_KEY_COLUMNS, 'train': TRAIN_SIZE, 'validation': VALIDATION_SIZE},
+        'filters': DATA_FILTERS,
+        'xgboost': xgb.__version__,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()[:20]
 
-    precision_vals, recall_vals, thresholds = precision_recall_curve(y_true, y_proba)
-    best_threshold = 0.5
-    best_f1 = 0
 
-    for i, threshold in enumerate(thresholds):
-        if precision_vals[i] >= min_precision and recall_vals[i] >= min_recall:
-            f1 = 2 * (precision_vals[i] * recall_vals[i]) / (precision_vals[i] + recall_vals[i] + 1e-10)
-            if f1 > best_f1:
-                best_f1 = f1
-                best_threshold = threshold
+def iter_data_chunks(data_iter: xgb.core.DataIter):
+    """
+    Recorre una pasada completa de un ParquetDataIter (o QuantizedCacheIter)
+    y produce (X, y).
+    """
+    chunks = []
+    data_iter.reset()
+    while data_iter.next(lambda data, label: chunks.append((data, label))):
+        yield chunks.pop()
+    data_iter.close()
 
-    return float(best_threshold)
+
+def bin_features(X: np.ndarray, cut_ptrs: np.ndarray, cut_values: np.ndarray,
+                 dtype=np.uint8) -> np.ndarray:
+    """
+    Índice de bin de cada valor con los cortes de XGBoost: el bin es el del
+    primer corte mayor al valor, y se guarda su límite inferior (el valor que
+    XGBoost usa como representante del bin).
+    """
+    bins = np.empty(X.shape, dtype=dtype)
+    for f in range(X.shape[1]):
+        cuts = cut_values[cut_ptrs[f]:cut_ptrs[f + 1]]
+        idx = np.searchsorted(cuts, X[:, f], side='right') - 1
+        bins[:, f] = np.clip(idx, 0, max(len(cuts) - 2, 0))
+    return bins
 
 
-def train_out_of_core_xgboost(encoders: dict, class_sets: dict,
-                              feature_cols: list) -> dict:
+def write_quantized_cache(cache_dir: Path, dtrain, split_chunks: dict,
+                          feature_cols: list) -> None:
     """
-    Entrena XGBoost en modo out-of-core usando archivos libsvm.
+    Guarda en `cache_dir` los cortes de `dtrain` y, por split, la matriz de
+    bins (uint8 con max_bin <= 256) y las etiquetas como .npy.
+
+    `split_chunks` mapea split → (num_filas, iterable de (X, y)). Se escribe en
+    un directorio temporal que se renombra al final, así una ejecución
+    interrumpida nunca deja una caché incompleta.
     """
-    print("\n" + "="*70)
-    print("🚀 ENTRENAMIENTO OUT-OF-CORE (XGBoost)")
-    print("="*70)
-    print("📌 Modo: QuantileDMatrix con DataIter")
-    print("📌 Modelos: solo XGBoost")
-    train_iter = ParquetDataIter(DATASET_PATH, encoders, class_sets, feature_cols, split='train')
-    val_iter = ParquetDataIter(DATASET_PATH, encoders, class_sets, feature_cols, split='val')
-    test_iter = ParquetDataIter(DATASET_PATH, encoders, class_sets, feature_cols, split='test')
+    cut_ptrs, cut_values = dtrain.get_quantile_cut()
+    dtype = np.uint8 if np.diff(cut_ptrs).max() <= 257 else np.uint16
+
+    tmp_dir = cache_dir.with_name(cache_dir.name + '.tmp')
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    np.save(tmp_dir / 'cut_ptrs.npy', cut_ptrs)
+    np.save(tmp_dir / 'cut_values.npy', cut_values)
+
+    counts = {}
+    for split, (num_rows, chunks) in split_chunks.items():
+        bins = np.lib.format.open_memmap(tmp_dir / f'{split}_bins.npy', mode='w+',
+                                         dtype=dtype, shape=(num_rows, len(feature_cols)))
+        labels = np.lib.format.open_memmap(tmp_dir / f'{split}_labels.npy', mode='w+',
+                                           dtype=np.float32, shape=(num_rows,))
+        offset = 0
+        for X, y in chunks:
+            bins[offset:offset + len(y)] = bin_features(X, cut_ptrs, cut_values, dtype)
+            labels[offset:offset + len(y)] = y
+            offset += len(y)
+        if offset != num_rows:
+            raise RuntimeError(f"Caché inconsistente en {split}: {offset} filas, esperadas {num_rows}")
+        bins.flush()
+        labels.flush()
+        del bins, labels
+        counts[split] = num_rows
+
+    meta = {
+        'feature_names': list(feature_cols),
+        'counts': counts,
+        'bin_dtype': np.dtype(dtype).name,
+        'created_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with open(tmp_dir / 'meta.json', 'w') as f:
+        json.dump(meta, f, indent=2)
 
-    dtrain = xgb.QuantileDMatrix(train_iter, max_bin=256)
-    dval = xgb.QuantileDMatrix(val_iter, max_bin=256, ref=dtrain)
-    dtest = xgb.QuantileDMatrix(test_iter, max_bin=256, ref=dtrain)
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(tmp_dir, cache_dir)
 
-    train_labels = dtrain.get_label()
-    train_pos = np.sum(train_labels == 1)
-    train_neg = np.sum(train_labels == 0)
-    class_balance_ratio = train_neg / train_pos if train_pos else 1.0
-    params = {
+
+class QuantizedCacheIter(xgb.core.DataIter):
+    """
+    Iterador para QuantileDMatrix sobre un split de la caché: lee los bins
+    con memmap por bloques y los decodifica a su valor representativo, que
+    XGBoost vuelve a asignar exactamente al mismo bin.
+    """
+
+    def __init__(self, cache_dir: Path, split: str, chunk_rows: int = 500000):
+        super().__init__()
+        self.bins = np.load(cache_dir / f'{split}_bins.npy', mmap_mode='r')
+        self.labels = np.load(cache_dir / f'{split}_labels.npy', mmap_mode='r')
+        cut_ptrs = np.load(cache_dir / 'cut_ptrs.npy')
+        self.cut_values = np.load(cache_dir / 'cut_values.npy')
+        self.offsets = cut_ptrs[:-1].astype(np.int64)
+        self.chunk_rows = chunk_rows
+        self._pos = 0
+
+    def reset(self) -> None:
+        self._pos = 0
+
+    def next(self, input_data) -> int:
+        if self._pos >= len(self.labels):
+            return 0
+        end = min(self._pos + self.chunk_rows, len(self.labels))
+        X = self.cut_values[self.bins[self._pos:end].astype(np.int64) + self.offsets]
+        input_data(data=X, label=np.asarray(self.labels[self._pos:end]))
+        self._pos = end
+        return 1
+
+    def close(self) -> None:
+        """Sin prefetch que detener (misma interfaz que ParquetDataIter)."""
+
+
+def iter_split_chunks(split: str, encoders: dict, class_sets: dict, feature_cols: list,
+                      data_key: str, dataset_path: Path = None):
+    """
+    Recorre un split por bloques (X, y) sin materializarlo: desde la caché
+    cuantizada si existe y, si no, releyendo el parquet con el mismo split
+    por hash.
+    """
+    dataset_path = DATASET_PATH if dataset_path is None else dataset_path
+    cache_dir = OOC_CACHE_DIR / data_key
+    if OOC_CACHE and (cache_dir / 'meta.json').exists():
+        data_iter = QuantizedCacheIter(cache_dir, split)
+    else:
+        data_iter = ParquetDataIter(dataset_path, encoders, class_sets, feature_cols, split=split)
+    yield from iter_data_chunks(data_iter)
+
+
+def load_quantized_cache(cache_dir: Path, max_bin: int = OOC_MAX_BIN) -> tuple:
+    """
+    Reconstruye (dtrain, dval, dtest) desde la caché sin leer el parquet.
+    """
+    dtrain = xgb.QuantileDMatrix(QuantizedCacheIter(cache_dir, 'train'), max_bin=max_bin)
+    dval = xgb.QuantileDMatrix(QuantizedCacheIter(cache_dir, 'val'), max_bin=max_bin, ref=dtrain)
+    dtest = xgb.QuantileDMatrix(QuantizedCacheIter(cache_dir, 'test'), max_bin=max_bin, ref=dtrain)
+    return dtrain, dval, dtest
+
+
+def build_out_of_core_matrices(encoders: dict, class_sets: dict,
+                               feature_cols: list, dataset_path: Path = None) -> tuple:
+    """
+    Construye las QuantileDMatrix de train/val/test desde el parquet, o desde
+    la caché en disco si ya existe una para las mismas entradas.
+
+    Tras leer el parquet se escribe la caché y las matrices se reconstruyen
+    desde ella, de modo que una ejecución con o sin caché entrena sobre los
+    mismos datos.
+
+    Returns:
+        (dtrain, dval, dtest, prefetch_stats)
+    """
+    dataset_path = DATASET_PATH if dataset_path is None else dataset_path
+    cache_dir = None
+    if OOC_CACHE:
+        cache_key = quantized_cache_key(dataset_path, feature_cols, encoders, OOC_MAX_BIN)
+        cache_dir = OOC_CACHE_DIR / cache_key
+        if (cache_dir / 'meta.json').exists():
+            print(f"📌 Caché de matrices cuantizadas: {cache_dir} (sin leer el parquet)")
+            return (*load_quantized_cache(cache_dir, OOC_MAX_BIN), {})
+
+    if OOC_SINGLE_PASS:
+        # Una sola lectura: train por streaming, val/test recogidos al vuelo
+        train_iter = ParquetDataIter(dataset_path, encoders, class_sets, feature_cols,
+                                     split='train', fanout=True)
+        dtrain = xgb.QuantileDMatrix(train_iter, max_bin=OOC_MAX_BIN)
+        val_data = train_iter.side_data('val')
+        dval = xgb.QuantileDMatrix(val_data[0], label=val_data[1], max_bin=OOC_MAX_BIN, ref=dtrain)
+        test_data = train_iter.side_data('test')
+        dtest = xgb.QuantileDMatrix(test_data[0], label=test_data[1], max_bin=OOC_MAX_BIN, ref=dtrain)
+        train_iter.release_side_data()
+        data_iters = {'train': train_iter}
+        split_sources = {'val': [val_data], 'test': [test_data]}
+    else:
+        train_iter = ParquetDataIter(dataset_path, encoders, class_sets, feature_cols, split='train')
+        val_iter = ParquetDataIter(dataset_path, encoders, class_sets, feature_cols, split='val')
+        test_iter = ParquetDataIter(dataset_path, encoders, class_sets, feature_cols, split='test')
+
+        dtrain = xgb.QuantileDMatrix(train_iter, max_bin=OOC_MAX_BIN)
+        dval = xgb.QuantileDMatrix(val_iter, max_bin=OOC_MAX_BIN, ref=dtrain)
+        dtest = xgb.QuantileDMatrix(test_iter, max_bin=OOC_MAX_BIN, ref=dtrain)
+        data_iters = {'train': train_iter, 'val': val_iter, 'test': test_iter}
+        split_sources = {'val': iter_data_chunks(val_iter), 'test': iter_data_chunks(test_iter)}
+
+    # XGBoost llama reset() al terminar cada pasada: se corta el prefetch ya lanzado
+    for data_iter in data_iters.values():
+        data_iter.close()
+
+    if cache_dir is not None:
+        write_quantized_cache(cache_dir, dtrain, {
+            'train': (dtrain.num_row(), iter_data_chunks(train_iter)),
+            'val': (dval.num_row(), split_sources['val']),
+            'test': (dtest.num_row(), split_sources['test']),
+        }, feature_cols)
+        print(f"📌 Caché de matrices cuantizadas guardada en: {cache_dir}")
+        del dtrain, dval, dtest
+        dtrain, dval, dtest = load_quantized_cache(cache_dir, OOC_MAX_BIN)
+    del split_sources
+
+    prefetch_stats = {name: data_iter.prefetch_stats() for name, data_iter in data_iters.items()}
+    if OOC_PREFETCH > 0:
+        for name, stats in prefetch_stats.items():
+            print(f"📌 Prefetch {name}: {stats['batches']} batches, "
+                  f"espera {stats['stall_seconds']:.2f}s, "
+                  f"cola media {stats['queue_depth_mean']:.1f} (máx {stats['queue_depth_max']})")
+
+    return dtrain, dval, dtest, prefetch_stats
+
+
+def checkpoint_run_key(data_key: str, params: dict, num_boost_round: int,
+                       early_stopping_rounds: int, init_model=None) -> str:
+    """
+    Llave de un entrenamiento: solo se reanuda un checkpoint con los mismos
+    datos (llave de la caché cuantizada), parámetros, número de rondas y
+    modelo inicial (entrenamiento incremental).
+    """
+    payload = {
+        'data': data_key,
+        'params': {k: v for k, v in params.items() if k != 'nthread'},
+        'num_boost_round': num_boost_round,
+        'early_stopping_rounds': early_stopping_rounds,
+        'init_model': hashlib.sha256(init_model.save_raw()).hexdigest() if init_model else None,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:20]
+
+
+class ResumableEarlyStopping(xgb.callback.TrainingCallback):
+    """
+    Early stopping con estado propio: mejor score, mejor iteración y rondas
+    sin mejora. `state_dict` lo exporta al checkpoint y `state` lo restaura
+    al reanudar, sin depender de los internos de xgb.callback.EarlyStopping.
+
+    Como el callback estándar, deja best_score y best_iteration como
+    atributos del booster en cada mejora.
+    """
+
+    def __init__(self, rounds: int, metric_name: str, data_name: str = 'val',
+                 state: dict = None):
+        super().__init__()
+        self.rounds = rounds
+        self.metric_name = metric_name
+        self.data_name = data_name
+        self.maximize = metric_name.split('@')[0] in MAXIMIZE_METRICS
+        self.best_score = None
+        self.best_iteration = None
+        self.rounds_without_improvement = 0
+        # Sin state (o sin best_score) se empieza de cero, p. ej. sobre un
+        # modelo base incremental cuyo best_score es de otros datos
+        if state and state.get('best_score') is not None:
+            self.best_score = float(state['best_score'])
+            self.best_iteration = int(state['best_iteration'])
+            self.rounds_without_improvement = int(state.get('rounds_without_improvement', 0))
+
+    def _improved(self, score: float) -> bool:
+        if self.best_score is None:
+            return True
+        return score > self.best_score if self.maximize else score < self.best_score
+
+    def after_iteration(self, model, epoch: int, evals_log) -> bool:
+        score = float(evals_log[self.data_name][self.metric_name][-1])
+        if self._improved(score):
+            self.best_score = score
+            self.best_iteration = model.num_boosted_rounds() - 1
+            self.rounds_without_improvement = 0
+            model.set_attr(best_score=str(score), best_iteration=str(self.best_iteration))
+        else:
+            self.rounds_without_improvement += 1
+        return self.rounds_without_improvement >= self.rounds
+
+    def state_dict(self) -> dict:
+        return {
+            'best_score': self.best_score,
+            'best_iteration': self.best_iteration,
+            'rounds_without_improvement': self.rounds_without_improvement,
+        }
+
+
+class BoosterCheckpoint(xgb.callback.TrainingCallback):
+    """
+    Guarda el booster en `checkpoint_dir` cada `every_rounds` rondas y/o cada
+    `every_seconds` segundos. La escritura es atómica (archivo temporal +
+    os.replace): un corte durante el guardado deja el checkpoint anterior.
+
+    Archivos: booster.ubj y state.json (rondas hechas, estado del early
+    stopping y fecha).
+    """
+
+    def __init__(self, checkpoint_dir: Path, early_stopping: ResumableEarlyStopping,
+                 every_rounds: int = None, every_seconds: float = None):
+        super().__init__()
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.early_stopping = early_stopping
+        self.every_rounds = OOC_CHECKPOINT_ROUNDS if every_rounds is None else every_rounds
+        self.every_seconds = OOC_CHECKPOINT_SECONDS if every_seconds is None else every_seconds
+        self.saved = 0
+        self._last_save = time.time()
+
+    def after_iteration(self, model, epoch: int, evals_log) -> bool:
+        rounds = model.num_boosted_rounds()
+        due_rounds = self.every_rounds > 0 and rounds % self.every_rounds == 0
+        due_time = self.every_seconds > 0 and time.time() - self._last_save >= self.every_seconds
+        if due_rounds or due_time:
+            self.save(model)
+        return False
+
+    def save(self, model) -> None:
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        booster_path = self.checkpoint_dir / 'booster.ubj'
+        tmp_path = self.checkpoint_dir / 'booster.tmp.ubj'
+        model.save_model(str(tmp_path))
+        os.replace(tmp_path, booster_path)
+
+        state = {
+            'rounds': model.num_boosted_rounds(),
+            **self.early_stopping.state_dict(),
+            'saved_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        tmp_state = self.checkpoint_dir / 'state.tmp.json'
+        with open(tmp_state, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_state, self.checkpoint_dir / 'state.json')
+
+        self.saved += 1
+        self._last_save = time.time()
+        print(f"💾 Checkpoint: ronda {state['rounds']} en {self.checkpoint_dir}")
+
+
+def load_checkpoint(checkpoint_dir: Path) -> tuple:
+    """
+    Retorna (booster, state) del checkpoint o (None, None) si no hay uno
+    completo en `checkpoint_dir`.
+    """
+    booster_path = checkpoint_dir / 'booster.ubj'
+    state_path = checkpoint_dir / 'state.json'
+    if not (booster_path.exists() and state_path.exists()):
+        return None, None
+    with open(state_path, 'r') as f:
+        state = json.load(f)
+    booster = xgb.Booster(model_file=str(booster_path))
+    # El state se escribe después del booster: si quedaron desfasados por un
+    # corte entre ambos, manda el número de rondas del booster
+    state['rounds'] = booster.num_boosted_rounds()
+    # Checkpoints anteriores a que el state guardara el mejor score: se toma
+    # del booster, donde lo deja el early stopping
+    if 'best_score' not in state and booster.attr('best_score') is not None:
+        state['best_score'] = float(booster.attr('best_score'))
+        state['best_iteration'] = int(booster.attr('best_iteration'))
+    return booster, state
+
+
+def train_booster_with_checkpoints(params: dict, dtrain, dval, data_key: str,
+                                   num_boost_round: int = OOC_NUM_BOOST_ROUND,
+                                   early_stopping_rounds: int = OOC_EARLY_STOPPING_ROUNDS,
+                                   resume: bool = None, init_model=None):
+    """
+    xgb.train con checkpoints periódicos y, con `resume` (None = OOC_RESUME),
+    continuación desde el último checkpoint del mismo entrenamiento
+    (`checkpoint_run_key`). El checkpoint se borra al terminar sin errores.
+
+    Con `init_model` se sigue boosteando ese booster (`num_boost_round`
+    rondas nuevas), como en el reentrenamiento incremental.
+
+    El generador aleatorio de XGBoost no se guarda en el modelo: con
+    subsample/colsample < 1 las rondas posteriores al checkpoint muestrean
+    distinto que en una ejecución sin cortes (sin muestreo son idénticas).
+    """
+    resume = OOC_RESUME if resume is None else resume
+    checkpoint_enabled = OOC_CHECKPOINT_ROUNDS > 0 or OOC_CHECKPOINT_SECONDS > 0
+    run_key = checkpoint_run_key(data_key, params, num_boost_round, early_stopping_rounds,
+                                 init_model)
+    checkpoint_dir = OOC_CHECKPOINT_DIR / run_key
+    base_rounds = init_model.num_boosted_rounds() if init_model is not None else 0
+
+    booster, state = (init_model, None)
+    if resume:
+        checkpoint, state = load_checkpoint(checkpoint_dir)
+        if checkpoint is None:
+            print(f"📌 Sin checkpoint para reanudar en {checkpoint_dir}: entrenamiento desde cero")
+        else:
+            booster = checkpoint
+            print(f"📌 Reanudando desde checkpoint: ronda {state['rounds'] - base_rounds}/"
+                  f"{num_boost_round} ({state['saved_at']})")
+
+    done = state['rounds'] - base_rounds if state else 0
+    stalled = state.get('rounds_without_improvement', 0) if state else 0
+    if done >= num_boost_round or stalled >= early_stopping_rounds:
+        print("📌 El checkpoint ya había terminado el entrenamiento")
+    else:
+        early_stopping = ResumableEarlyStopping(early_stopping_rounds, params['eval_metric'],
+                                                state=state)
+        callbacks = [early_stopping]
+        if checkpoint_enabled:
+            callbacks.append(BoosterCheckpoint(checkpoint_dir, early_stopping))
+        evals = [(dtrain, 'train'), (dval, 'val')]
+        booster = xgb.train(params, dtrain, num_boost_round=num_boost_round - done,
+                            evals=evals, callbacks=callbacks, xgb_model=booster)
+
+    shutil.rmtree(checkpoint_dir, ignore_errors=True)
+    return booster
+
+
+def optimize_threshold(y_true: np.ndarray, y_proba: np.ndarray,
+                       min_recall: float, min_precision: float) -> float:
+    """
+    Optimiza el umbral usando precision/recall.
+    """
+    curve = OperatingCurve(y_true, y_proba)
+    return curve.best_threshold(min_recall=min_recall, min_precision=min_precision)
+
+
+def out_of_core_params(class_balance_ratio: float) -> dict:
+    """Parámetros de XGBoost del entrenamiento out-of-core."""
+    return {
         'objective': 'binary:logistic',
         'eval_metric': 'logloss',
         'tree_method': 'hist',
@@ -475,20 +1365,15 @@ def train_out_of_core_xgboost(encoders: dict, class_sets: dict,
         'nthread': -1
     }
 
-    evals = [(dtrain, 'train'), (dval, 'val')]
-    booster = xgb.train(params, dtrain, num_boost_round=120, evals=evals, early_stopping_rounds=10)
-
-    y_test = dtest.get_label()
-    y_proba = booster.predict(dtest)
-
-    threshold = optimize_threshold(y_test, y_proba, MIN_RECALL_TARGET, MIN_PRECISION_TARGET)
-    y_pred = (y_proba >= threshold).astype(int)
 
+def binary_test_metrics(y_test: np.ndarray, y_proba: np.ndarray, threshold: float) -> dict:
+    """Métricas de test con el umbral dado (mismo formato que metadata.json)."""
     from sklearn.metrics import (
         accuracy_score, precision_score, recall_score, f1_score,
         roc_auc_score, average_precision_score, confusion_matrix
     )
 
+    y_pred = (y_proba >= threshold).astype(int)
     test_metrics = {
         'accuracy': accuracy_score(y_test, y_pred),
         'precision': precision_score(y_test, y_pred),
@@ -504,6 +1389,85 @@ def train_out_of_core_xgboost(encoders: dict, class_sets: dict,
     test_metrics['false_positives'] = int(cm[0, 1])
     test_metrics['false_negatives'] = int(cm[1, 0])
     test_metrics['true_positives'] = int(cm[1, 1])
+    return test_metrics
+
+
+def histogram_test_metrics(histogram: ScoreHistogram, threshold: float) -> dict:
+    """
+    Mismas métricas que `binary_test_metrics` a partir de un ScoreHistogram:
+    los conteos son exactos para un umbral en un borde de bin, y ROC-AUC y
+    PR-AUC quedan aproximadas a la resolución del histograma.
+    """
+    at = histogram.at(threshold)
+    tp, fp = at['true_positives'], at['false_positives']
+    tn, fn = at['true_negatives'], at['false_negatives']
+
+    test_metrics = {
+        'accuracy': (tp + tn) / max(histogram.n_total, 1),
+        'precision': at['precision'],
+        'recall': at['recall'],
+        'f1': at['f1'],
+        'roc_auc': histogram.roc_auc(),
+        'pr_auc': histogram.pr_auc(),
+    }
+
+    test_metrics['confusion_matrix'] = [[tn, fp], [fn, tp]]
+    test_metrics['true_negatives'] = tn
+    test_metrics['false_positives'] = fp
+    test_metrics['false_negatives'] = fn
+    test_metrics['true_positives'] = tp
+    return test_metrics
+
+
+def train_out_of_core_xgboost(encoders: dict, class_sets: dict,
+                              feature_cols: list) -> dict:
+    """
+    Entrena XGBoost en modo out-of-core usando archivos libsvm.
+    """
+    print("\n" + "="*70)
+    print("🚀 ENTRENAMIENTO OUT-OF-CORE (XGBoost)")
+    print("="*70)
+    print("📌 Modo: QuantileDMatrix con DataIter")
+    print("📌 Modelos: solo XGBoost")
+    print(f"📌 Split: hash determinístico por vuelo ({'una lectura' if OOC_SINGLE_PASS else 'una lectura por split'})")
+
+    dtrain, dval, dtest, prefetch_stats = build_out_of_core_matrices(encoders, class_sets, feature_cols)
+    data_key = quantized_cache_key(DATASET_PATH, feature_cols, encoders, OOC_MAX_BIN)
+
+    train_labels = dtrain.get_label()
+    train_pos = np.sum(train_labels == 1)
+    train_neg = np.sum(train_labels == 0)
+    class_balance_ratio = train_neg / train_pos if train_pos else 1.0
+    params = out_of_core_params(class_balance_ratio)
+
+    booster = train_booster_with_checkpoints(params, dtrain, dval, data_key)
+
+    # Los intervalos bootstrap remuestrean este mismo histograma de scores
+    if OOC_METRIC_BINS > 0:
+        # Predicción por bloques del test, acumulada en histogramas por clase:
+        # memoria O(bins + bloque) y umbral/métricas desde O(bins) conteos
+        histogram = ScoreHistogram(OOC_METRIC_BINS)
+        if OOC_CACHE:
+            for X, y in iter_split_chunks('test', encoders, class_sets, feature_cols, data_key):
+                histogram.update(y, booster.inplace_predict(X))
+        else:
+            # Sin caché, dtest ya está en memoria: predecirlo evita releer el
+            # parquet (solo se agrega un float32 por fila)
+            y_test, y_proba = dtest.get_label(), booster.predict(dtest)
+            for start in range(0, len(y_test), OOC_METRIC_CHUNK_ROWS):
+                end = start + OOC_METRIC_CHUNK_ROWS
+                histogram.update(y_test[start:end], y_proba[start:end])
+            del y_test, y_proba
+        threshold = histogram.best_threshold(MIN_RECALL_TARGET, MIN_PRECISION_TARGET)
+        test_metrics = histogram_test_metrics(histogram, threshold)
+        print(f"📌 Métricas de test sobre histogramas de {OOC_METRIC_BINS:,} bins")
+    else:
+        y_test = dtest.get_label()
+        y_proba = booster.predict(dtest)
+        threshold = optimize_threshold(y_test, y_proba, MIN_RECALL_TARGET, MIN_PRECISION_TARGET)
+        test_metrics = binary_test_metrics(y_test, y_proba, threshold)
+        histogram = ScoreHistogram.from_scores(y_test, y_proba)
+        del y_test, y_proba
 
     print(f"\n📌 Umbral optimizado: {threshold:.4f}")
     print(f"📌 Accuracy:  {test_metrics['accuracy']:.4f}")
@@ -526,10 +1490,12 @@ def train_out_of_core_xgboost(encoders: dict, class_sets: dict,
             'train_neg': int(train_neg),
             'val_pos': int(np.sum(dval.get_label() == 1)),
             'val_neg': int(np.sum(dval.get_label() == 0)),
-            'test_pos': int(np.sum(dtest.get_label() == 1)),
-            'test_neg': int(np.sum(dtest.get_label() == 0))
+            'test_pos': histogram.n_pos,
+            'test_neg': histogram.n_neg
         },
-        'class_balance_ratio': class_balance_ratio
+        'class_balance_ratio': class_balance_ratio,
+        'prefetch_stats': prefetch_stats,
+        'score_histogram': histogram
     }
 
 
@@ -584,7 +1550,8 @@ def save_out_of_core_artifacts(result: dict, encoders: dict,
         'test_pct': TEST_SIZE * 100,
         'feature_names': feature_cols,
         'test_metrics': result['metrics'],
-        'metrics_source': 'test_set_optimized_threshold_out_of_core'
+        'metrics_source': 'test_set_optimized_threshold_out_of_core',
+        'prefetch_stats': result.get('prefetch_stats', {})
     }
 
     splits_path = MODEL_PATH.parent / 'training_info.json'
@@ -594,14 +1561,300 @@ def save_out_of_core_artifacts(result: dict, encoders: dict,
 
     evaluator = ModelEvaluator(figures_dir=str(FIGURES_DIR), metrics_dir=str(METRICS_DIR))
     results = {'XGBoost': result['metrics']}
-    evaluator.save_metrics_report(results, 'XGBoost')
+    intervals = evaluator.bootstrap_confidence_intervals(histogram=result['score_histogram'],
+                                                         threshold=result['threshold'])
+    evaluator.save_metrics_report(results, 'XGBoost', confidence_intervals=intervals)
+
+
+def load_base_model() -> tuple:
+    """
+    Carga el modelo guardado (booster de XGBoost), su metadata y el feature
+    engineer para el reentrenamiento incremental.
+
+    Returns:
+        (booster, metadata, feature_engineer)
+    """
+    import joblib
+
+    model = joblib.load(MODEL_PATH)
+    if not hasattr(model, 'get_booster'):
+        raise ValueError("El reentrenamiento incremental requiere un modelo XGBoost "
+                         f"(modelo guardado: {type(model).__name__})")
+    booster = model.get_booster().copy()
+    # Las matrices del período nuevo no llevan nombres de columna (el orden
+    # es metadata['feature_names'], igual que en el entrenamiento)
+    booster.feature_names = None
+
+    with open(METADATA_PATH, 'r') as f:
+        metadata = json.load(f)
+    fe = joblib.load(MODEL_PATH.parent / 'feature_engineer.joblib')
+    return booster, metadata, fe
+
+
+def load_period_matrices(dataset_path: Path, encoders: dict, class_sets: dict,
+                         feature_cols: list) -> tuple:
+    """
+    DMatrix de train/val/test del período nuevo (filtrado con DATA_FILTERS),
+    con el mismo split por hash que el entrenamiento completo y en una sola
+    lectura.
+
+    Se usan DMatrix con los valores originales y no QuantileDMatrix: las
+    predicciones del modelo base sobre una matriz cuantizada con otros cortes
+    son aproximadas, y el refresco de hojas no soporta QuantileDMatrix. Un
+    período de pocos meses entra en memoria sin problema.
+
+    Returns:
+        (dtrain, dval, dtest)
+    """
+    train_iter = ParquetDataIter(dataset_path, encoders, class_sets, feature_cols,
+                                 split='train', fanout=True)
+    X_parts, y_parts = [], []
+    for X, y in iter_data_chunks(train_iter):
+        X_parts.append(X)
+        y_parts.append(y)
+    if not X_parts:
+        raise ValueError(f"No hay filas de train en {dataset_path} con los filtros {DATA_FILTERS}")
+
+    dtrain = xgb.DMatrix(np.concatenate(X_parts), label=np.concatenate(y_parts))
+    del X_parts, y_parts
+    dval = xgb.DMatrix(*train_iter.side_data('val'))
+    dtest = xgb.DMatrix(*train_iter.side_data('test'))
+    train_iter.release_side_data()
+    return dtrain, dval, dtest
+
+
+def train_incremental(dataset_path: Path = None, mode: str = None, rounds: int = None) -> dict:
+    """
+    Reentrenamiento incremental del modelo guardado con un período nuevo.
+
+    - Vocabulario: las aerolíneas/aeropuertos nuevos se agregan al final de
+      los encoders (`extend_label_encoders`), sin cambiar los códigos viejos.
+    - 'continue': sigue boosteando el modelo base con hasta `rounds` árboles
+      nuevos, early stopping en la validación del período nuevo y truncado
+      a la mejor iteración.
+    - 'refresh': mantiene la estructura de los árboles y recalcula los
+      valores de las hojas con el período nuevo.
+
+    Las métricas antes/después y el umbral se calculan sobre el test del
+    período nuevo.
+    """
+    dataset_path = INCREMENTAL_DATA if dataset_path is None else dataset_path
+    mode = mode or INCREMENTAL_MODE
+    rounds = INCREMENTAL_ROUNDS if rounds is None else rounds
+    if mode not in ('continue', 'refresh'):
+        raise ValueError(f"INCREMENTAL_MODE no soportado: {mode} (opciones: continue, refresh)")
+
+    print("\n" + "="*70)
+    print("🔁 REENTRENAMIENTO INCREMENTAL (XGBoost)")
+    print("="*70)
+    print(f"📌 Datos nuevos: {dataset_path} (filtros: {DATA_FILTERS or 'ninguno'})")
+    print(f"📌 Modo: {mode}")
+    if not DATA_FILTERS:
+        print("⚠️  Sin DATA_YEARS/DATA_MONTHS se usa todo INCREMENTAL_DATA como período nuevo")
+
+    booster, base_metadata, fe = load_base_model()
+    feature_cols = base_metadata['feature_names']
+    base_rounds = booster.num_boosted_rounds()
+
+    # Vocabulario: extender con las categorías del período nuevo
+    new_encoders, _ = build_label_encoders(dataset_path, row_filter=build_filter(**DATA_FILTERS))
+    encoders, class_sets, added = extend_label_encoders(fe.label_encoders, new_encoders)
+    for col, values in added.items():
+        if values:
+            print(f"📌 Vocabulario {col}: +{len(values)} ({', '.join(values[:10])}"
+                  f"{', ...' if len(values) > 10 else ''})")
+
+    dtrain, dval, dtest = load_period_matrices(dataset_path, encoders, class_sets, feature_cols)
+    print(f"📌 Período nuevo: train {dtrain.num_row():,} | val {dval.num_row():,} | "
+          f"test {dtest.num_row():,}")
+
+    y_test = dtest.get_label()
+    proba_before = booster.predict(dtest)
+    params = out_of_core_params(base_metadata.get('class_balance_ratio', 1.0))
+
+    if mode == 'refresh':
+        params.update({'process_type': 'update', 'updater': 'refresh', 'refresh_leaf': True})
+        params.pop('tree_method')
+        updated = xgb.train(params, dtrain, num_boost_round=base_rounds, xgb_model=booster)
+    else:
+        data_key = quantized_cache_key(dataset_path, feature_cols, encoders, OOC_MAX_BIN)
+        updated = train_booster_with_checkpoints(params, dtrain, dval, data_key,
+                                                 num_boost_round=rounds, init_model=booster)
+        best_iteration = updated.attr('best_iteration')
+        if best_iteration is not None and int(best_iteration) + 1 < updated.num_boosted_rounds():
+            updated = updated[:int(best_iteration) + 1]
+    print(f"📌 Árboles: {base_rounds} → {updated.num_boosted_rounds()}")
+
+    proba_after = updated.predict(dtest)
+    threshold = optimize_threshold(y_test, proba_after, MIN_RECALL_TARGET, MIN_PRECISION_TARGET)
+    metrics_before = binary_test_metrics(y_test, proba_before, base_metadata['threshold'])
+    test_metrics = binary_test_metrics(y_test, proba_after, threshold)
+
+    print(f"\n📊 Test del período nuevo (antes → después):")
+    for key in ('roc_auc', 'pr_auc', 'f1', 'recall', 'precision'):
+        print(f"   - {key}: {metrics_before[key]:.4f} → {test_metrics[key]:.4f}")
+    print(f"📌 Umbral: {base_metadata['threshold']:.4f} → {threshold:.4f}")
+
+    return {
+        'model': OutOfCoreXGBModel(updated, feature_cols),
+        'encoders': encoders,
+        'feature_engineer': fe,
+        'base_metadata': base_metadata,
+        'metrics': test_metrics,
+        'metrics_before': metrics_before,
+        'threshold': threshold,
+        'mode': mode,
+        'dataset_path': str(dataset_path),
+        'base_rounds': base_rounds,
+        'rounds': updated.num_boosted_rounds(),
+        'vocabulary_added': added,
+        'counts': {'train': int(dtrain.num_row()), 'val': int(dval.num_row()),
+                   'test': int(dtest.num_row())},
+    }
+
+
+def save_incremental_artifacts(result: dict) -> None:
+    """
+    Guarda el modelo actualizado, el feature engineer con el vocabulario
+    extendido y la metadata con el linaje de entrenamientos.
+    """
+    import joblib
+
+    base = result['base_metadata']
+    with open(MODEL_PATH, 'rb') as f:
+        parent_sha256 = hashlib.sha256(f.read()).hexdigest()
+
+    # Primer incremental: el entrenamiento original abre el linaje
+    lineage = base.get('lineage') or [{
+        'type': 'full',
+        'trained_at': base.get('trained_at'),
+        'metrics_source': base.get('metrics_source'),
+        'rounds': result['base_rounds'],
+    }]
+    summary = ('roc_auc', 'pr_auc', 'f1', 'recall', 'precision')
+    lineage.append({
+        'type': f"incremental_{result['mode']}",
+        'trained_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'parent_model_sha256': parent_sha256,
+        'data': result['dataset_path'],
+        'filters': DATA_FILTERS,
+        'counts': result['counts'],
+        'base_rounds': result['base_rounds'],
+        'rounds': result['rounds'],
+        'vocabulary_added': {col: values for col, values in result['vocabulary_added'].items() if values},
+        'metrics_before': {k: result['metrics_before'][k] for k in summary},
+        'metrics_after': {k: result['metrics'][k] for k in summary},
+    })
+
+    joblib.dump(result['model'], MODEL_PATH)
+    print(f"✅ Modelo guardado en: {MODEL_PATH}")
+
+    fe = result['feature_engineer']
+    fe.label_encoders = result['encoders']
+    fe_path = MODEL_PATH.parent / 'feature_engineer.joblib'
+    joblib.dump(fe, fe_path)
+    print(f"✅ Feature engineer guardado en: {fe_path}")
+
+    metadata = {
+        **base,
+        'threshold': result['threshold'],
+        'metrics': result['metrics'],
+        'metrics_source': 'test_set_new_period_incremental',
+        'trained_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'lineage': lineage,
+    }
+    with open(METADATA_PATH, 'w') as f:
+        json.dump(metadata, f, indent=2, default=str)
+    print(f"✅ Metadata guardada en: {METADATA_PATH}")
+
+
+# Features float a float32 en el frame en memoria, opcional (COMPACT_FLOATS=1):
+# ahorra memoria pero redondea los valores con que se entrena, y las métricas
+# pueden cambiar (LogisticRegression es sensible al redondeo de la entrada).
+# Por defecto quedan en float64 y la compactación es sin pérdida
+COMPACT_FLOATS = os.getenv("COMPACT_FLOATS", "0") == "1"
+
+# Dtypes compactos del frame de entrenamiento en memoria (los float32 solo
+# se aplican con COMPACT_FLOATS=1)
+COMPACT_DTYPES = {
+    'year': np.int16,
+    'month': np.int8,
+    'day_of_week': np.int8,
+    'day_of_month': np.int8,
+    'dep_hour': np.int8,
+    'sched_minute_of_day': np.int16,
+    **{f: np.float32 for f in DISTANCE_FEATURES + CLIMATE_FEATURES + GEO_FEATURES},
+    **{f: np.int16 for f in ENCODED_FEATURES},
+    'is_delayed': np.int8,
+}
+
+
+def _fits_integer(series: pd.Series, dtype) -> bool:
+    """True si la columna no tiene nulos ni decimales y cabe en el entero."""
+    if series.isna().any():
+        return False
+    values = series.to_numpy()
+    if not np.issubdtype(values.dtype, np.integer) and not np.all(np.mod(values, 1) == 0):
+        return False
+    info = np.iinfo(dtype)
+    return len(values) == 0 or (values.min() >= info.min and values.max() <= info.max)
+
+
+def optimize_dtypes(df: pd.DataFrame, feature_cols: list) -> pd.DataFrame:
+    """
+    Compacta el frame de entrenamiento antes del split:
+    - conserva solo las features y el target (descarta los strings crudos
+      ya codificados y columnas que el modelo no usa)
+    - temporales a int8/int16, categóricas codificadas a int16 y target a
+      int8; distancia/clima/geo quedan en float64 (float32 con
+      COMPACT_FLOATS=1, que redondea los valores de entrada)
+
+    Una columna entera con nulos o fuera de rango pasa a float (los nulos
+    se descartan después en `split_data`).
+    """
+    print("\n" + "="*70)
+    print("🗜️ FASE 3b: COMPACTACIÓN DE TIPOS")
+    print("="*70)
+
+    memory_before = df.memory_usage(deep=True).sum()
+
+    keep = [c for c in feature_cols if c in df.columns]
+    if 'is_delayed' in df.columns:
+        keep.append('is_delayed')
+    dropped = [c for c in df.columns if c not in keep]
+    df = df[keep]
+
+    float_dtype = np.float32 if COMPACT_FLOATS else np.float64
+    compact = {}
+    for col in keep:
+        dtype = COMPACT_DTYPES.get(col, float_dtype)
+        if np.issubdtype(dtype, np.integer) and not _fits_integer(df[col], dtype):
+            dtype = float_dtype
+        elif np.issubdtype(dtype, np.floating):
+            dtype = float_dtype
+        compact[col] = df[col].astype(dtype)
+    df = pd.DataFrame(compact, index=df.index)
+
+    memory_after = df.memory_usage(deep=True).sum()
+
+    print(f"   Columnas descartadas: {len(dropped)} {dropped}")
+    print(f"   Memoria antes:   {memory_before / 1024**2:,.1f} MB")
+    print(f"   Memoria después: {memory_after / 1024**2:,.1f} MB "
+          f"({memory_before / max(memory_after, 1):.1f}x menos)")
+
+    return df
 
 
 def split_data(df: pd.DataFrame, feature_cols: list) -> dict:
     """
     Divide los datos en Train/Validation/Test con estratificación.
     
-    Retorna diccionario con X_train, X_val, X_test, y_train, y_val, y_test
+    La estratificación se hace sobre índices enteros y las features se copian
+    una sola vez a una matriz compartida, ordenada Train | Validation | Test;
+    X_train, X_val y X_test son vistas (sin copia) de esa matriz.
+    
+    Retorna diccionario con X_train, X_val, X_test, y_train, y_val, y_test,
+    la matriz compartida `X` y los índices posicionales de `df` por conjunto
     """
     print("\n" + "="*70)
     print("📦 FASE 4: DIVISIÓN DE DATOS (Train/Validation/Test)")
@@ -612,19 +1865,18 @@ def split_data(df: pd.DataFrame, feature_cols: list) -> dict:
     # Filtrar solo features disponibles
     available_features = [c for c in feature_cols if c in df.columns]
     
-    # Eliminar filas con valores nulos
-    df_clean = df[available_features + ['is_delayed']].dropna()
+    # Filas sin valores nulos (máscara, sin copiar el frame)
+    valid = df[available_features + ['is_delayed']].notna().all(axis=1).to_numpy()
+    rows = np.flatnonzero(valid)
+    y = df['is_delayed'].to_numpy()[rows]
     
     print(f"\n📊 Registros totales: {len(df):,}")
-    print(f"📊 Registros después de limpiar nulos: {len(df_clean):,}")
+    print(f"📊 Registros después de limpiar nulos: {len(rows):,}")
     print(f"📊 Features: {len(available_features)}")
     
-    X = df_clean[available_features]
-    y = df_clean['is_delayed'].values
-    
     # Primera división: separar Test (15%)
-    X_temp, X_test, y_temp, y_test = train_test_split(
-        X, y, 
+    temp_pos, test_pos = train_test_split(
+        np.arange(len(rows)),
         test_size=TEST_SIZE, 
         random_state=RANDOM_STATE, 
         stratify=y
@@ -634,28 +1886,54 @@ def split_data(df: pd.DataFrame, feature_cols: list) -> dict:
     # Validation es 15% del total, que es ~17.6% de X_temp
     val_ratio = VALIDATION_SIZE / (TRAIN_SIZE + VALIDATION_SIZE)
     
-    X_train, X_val, y_train, y_val = train_test_split(
-        X_temp, y_temp, 
+    train_pos, val_pos = train_test_split(
+        temp_pos,
         test_size=val_ratio, 
         random_state=RANDOM_STATE, 
-        stratify=y_temp
+        stratify=y[temp_pos]
     )
     
+    # Matriz compartida: una única copia de las features, en orden de split
+    order = np.concatenate([train_pos, val_pos, test_pos])
+    dtype = np.result_type(*[df[c].dtype for c in available_features])
+    if not np.issubdtype(dtype, np.floating):
+        dtype = np.float64
+    X_all = np.empty((len(order), len(available_features)), dtype=dtype)
+    source_rows = rows[order]
+    for j, col in enumerate(available_features):
+        X_all[:, j] = df[col].to_numpy()[source_rows]
+    y_all = y[order]
+    
+    n_train, n_val = len(train_pos), len(val_pos)
+    bounds = {
+        'train': slice(0, n_train),
+        'val': slice(n_train, n_train + n_val),
+        'test': slice(n_train + n_val, len(order)),
+    }
+    views = {
+        name: pd.DataFrame(X_all[part], columns=available_features, copy=False)
+        for name, part in bounds.items()
+    }
+    X_train, X_val, X_test = views['train'], views['val'], views['test']
+    y_train, y_val, y_test = (y_all[bounds[k]] for k in ('train', 'val', 'test'))
+    
     print(f"\n📊 División de datos:")
     print(f"   ┌─────────────────────────────────────────────────┐")
     print(f"   │ Conjunto       │ Registros │ Porcentaje │ Retrasos │")
     print(f"   ├─────────────────────────────────────────────────┤")
-    print(f"   │ Train          │ {len(X_train):>9,} │   {100*len(X_train)/len(X):>5.1f}%  │  {100*y_train.mean():>5.1f}%  │")
-    print(f"   │ Validation     │ {len(X_val):>9,} │   {100*len(X_val)/len(X):>5.1f}%  │  {100*y_val.mean():>5.1f}%  │")
-    print(f"   │ Test           │ {len(X_test):>9,} │   {100*len(X_test)/len(X):>5.1f}%  │  {100*y_test.mean():>5.1f}%  │")
+    print(f"   │ Train          │ {len(X_train):>9,} │   {100*len(X_train)/len(X_all):>5.1f}%  │  {100*y_train.mean():>5.1f}%  │")
+    print(f"   │ Validation     │ {len(X_val):>9,} │   {100*len(X_val)/len(X_all):>5.1f}%  │  {100*y_val.mean():>5.1f}%  │")
+    print(f"   │ Test           │ {len(X_test):>9,} │   {100*len(X_test)/len(X_all):>5.1f}%  │  {100*y_test.mean():>5.1f}%  │")
     print(f"   └─────────────────────────────────────────────────┘")
-    print(f"   │ TOTAL          │ {len(X):>9,} │  100.0%  │  {100*y.mean():>5.1f}%  │")
+    print(f"   │ TOTAL          │ {len(X_all):>9,} │  100.0%  │  {100*y.mean():>5.1f}%  │")
     
     return {
         'X_train': X_train, 'y_train': y_train,
         'X_val': X_val, 'y_val': y_val,
         'X_test': X_test, 'y_test': y_test,
-        'feature_names': available_features
+        'feature_names': available_features,
+        'X': X_all,
+        'indices': {name: source_rows[part] for name, part in bounds.items()}
     }
 
 
@@ -683,8 +1961,17 @@ def train_models(data: dict) -> tuple:
     print(f"\n📈 Entrenando con {len(X_train):,} registros...")
     start_time = time.time()
     
+    # Búsqueda de hiperparámetros de XGBoost/LightGBM (opcional)
+    if TUNE_HYPERPARAMS:
+        model.tune_hyperparameters(
+            X_train, y_train, X_val, y_val,
+            output_path=METRICS_DIR / 'hyperparameter_search.json',
+            n_configs=TUNE_CONFIGS
+        )
+    
     # Usar train_and_compare con datos de validación externos
-    results = model.train_and_compare(X_train, y_train, X_val=X_val, y_val=y_val)
+    results = model.train_and_compare(X_train, y_train, X_val=X_val, y_val=y_val,
+                                      parallel=PARALLEL_TRAINING)
     
     train_time = time.time() - start_time
     print(f"\n⏱️ Tiempo de entrenamiento: {train_time:.1f} segundos ({train_time/60:.1f} min)")
@@ -849,6 +2136,13 @@ def main():
     total_start = time.time()
     
     try:
+        # Reentrenamiento incremental del modelo guardado con un período nuevo
+        if INCREMENTAL:
+            result = train_incremental()
+            save_incremental_artifacts(result)
+            print("✅ REENTRENAMIENTO INCREMENTAL COMPLETADO")
+            return 0
+
         # Entrenamiento out-of-core para dataset completo
         if OUT_OF_CORE and SAMPLE_SIZE is None:
             print("⚠️  OUT_OF_CORE=1: entrenamiento streaming con XGBoost")
@@ -860,7 +2154,7 @@ def main():
             return 0
 
         # 1. Cargar datos (dataset completo)
-        df = load_and_explore_data(DATASET_PATH, sample_size=SAMPLE_SIZE)
+        df = load_and_explore_data(DATASET_PATH, sample_size=SAMPLE_SIZE, filters=DATA_FILTERS)
         
         # 2. Crear variable objetivo
         df = create_target_variable(df, threshold=DELAY_THRESHOLD_MINUTES)
@@ -868,8 +2162,12 @@ def main():
         # 3. Feature engineering
         df, fe, feature_cols = feature_engineering(df)
         
-        # 4. Dividir datos (Train/Val/Test)
+        # 3b. Compactar tipos (features y target únicamente)
+        df = optimize_dtypes(df, feature_cols)
+        
+        # 4. Dividir datos (Train/Val/Test); desde aquí solo queda la matriz compartida
         data = split_data(df, feature_cols)
+        del df
         
         # 5. Entrenar modelos
         model, train_results, val_metrics = train_models(data)